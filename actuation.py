@@ -0,0 +1,162 @@
+"""
+اجرای دستورات ماوس و کیبورد در thread جداگانه با صف محدود و ادغام حرکت‌های پشت سر هم
+Asynchronous input-actuation worker with a bounded, move-coalescing queue
+"""
+
+import threading
+import time
+from collections import deque
+
+from latency_stats import LatencyHistogram
+
+
+class _Action:
+    """یک دستور در صف به همراه زمان ورود به صف"""
+    __slots__ = ("func", "args", "kwargs", "coalesce", "enqueued_at")
+
+    def __init__(self, func, args, kwargs, coalesce, enqueued_at):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.coalesce = coalesce
+        self.enqueued_at = enqueued_at
+
+
+class ActuationWorker:
+    def __init__(self, max_queue=64):
+        """
+        صف دستورات ورودی سیستم (pyautogui) که در thread جداگانه اجرا می‌شوند
+
+        مکث‌های داخلی pyautogui (PAUSE) و کندی تزریق ورودی سیستم عامل به جای حلقه
+        پردازش تصویر در این thread رخ می‌دهد. دستورات قابل ادغام (حرکت ماوس) اگر پشت
+        سر هم در صف باشند با آخرین مقدار جایگزین می‌شوند؛ بقیه دستورات (کلیک، فشردن و
+        رها کردن دکمه) دقیقاً به ترتیب ورود اجرا می‌شوند.
+
+        Args:
+            max_queue: حداکثر تعداد دستورات در صف
+        """
+        self.max_queue = max_queue
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # آمار
+        self.latency = LatencyHistogram()  # زمان ورود به صف تا پایان اجرا
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def pending(self):
+        """تعداد دستورات منتظر در صف"""
+        return len(self._queue)
+
+    def start(self):
+        """شروع thread اجرای دستورات"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """اجرای دستورات باقی‌مانده و توقف thread"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def submit(self, func, *args, coalesce=False, **kwargs):
+        """
+        افزودن یک دستور به صف (بدون انتظار)
+
+        اگر worker اجرا نشده باشد (مثلاً هنگام پخش مجدد نقاط ضبط شده)، دستور
+        همان لحظه اجرا می‌شود تا ترتیب و نتیجه قطعی بماند.
+
+        Args:
+            func: تابع، مثلاً output.click
+            coalesce: اگر True و آخرین دستور صف همین تابع باشد، آرگومان‌های آن جایگزین می‌شوند
+
+        Returns:
+            False اگر صف پر بود و دستور کنار گذاشته شد
+        """
+        now = time.perf_counter()
+        if not self._running:
+            self.submitted += 1
+            self._execute(_Action(func, args, kwargs, coalesce, now))
+            return True
+
+        with self._cond:
+            self.submitted += 1
+            if coalesce and self._queue:
+                tail = self._queue[-1]
+                if tail.coalesce and tail.func == func:
+                    # زمان ورود قدیمی‌ترین حرکت حفظ می‌شود تا تأخیر واقعی اندازه‌گیری شود
+                    tail.args = args
+                    tail.kwargs = kwargs
+                    self.coalesced += 1
+                    return True
+
+            if len(self._queue) >= self.max_queue and not self._make_room():
+                self.dropped += 1
+                return False
+
+            self._queue.append(_Action(func, args, kwargs, coalesce, now))
+            self._cond.notify()
+        return True
+
+    def _make_room(self):
+        """خالی کردن یک خانه صف با حذف قدیمی‌ترین حرکت؛ دستورات ترتیبی هرگز حذف نمی‌شوند"""
+        for index, action in enumerate(self._queue):
+            if action.coalesce:
+                del self._queue[index]
+                self.dropped += 1
+                return True
+        return False
+
+    def _run(self):
+        """حلقه اجرای دستورات"""
+        while True:
+            with self._cond:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                action = self._queue.popleft()
+            self._execute(action)
+
+    def _execute(self, action):
+        try:
+            action.func(*action.args, **action.kwargs)
+            self.executed += 1
+        except Exception as e:
+            # خطای یک دستور (مثلاً FailSafeException) نباید thread را متوقف کند
+            self.errors += 1
+            self.last_error = e
+        self.latency.record(time.perf_counter() - action.enqueued_at)
+
+    def get_stats(self):
+        """آمار صف و تأخیر اجرای دستورات"""
+        stats = {
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+        stats.update(self.latency.summary())
+        return stats
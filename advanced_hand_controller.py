@@ -7,39 +7,82 @@ import cv2
 import mediapipe as mp
 import time
 import numpy as np
-import pyautogui
 import math
 import threading
 import json
 import os
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from local_ai_controller import LocalAIController
-import customtkinter as ctk
-from PIL import Image, ImageTk
+from frame_capture import FrameGrabber
+from frame_sources import open_frame_source
+from landmark_recording import LandmarkRecorder, landmarks_from_results
+from hand_landmarks import HandLandmarkArrays
+from roi_tracker import RoiTracker
+from latency_stats import PipelineProfiler
+from actuation import ActuationWorker
+from output_backends import create_output_backend
+from screen_geometry import ScreenGeometry, ScreenMapper
+from motion_prediction import FingertipPredictor, LATENCY_STAGES
+from cursor_filters import create_cursor_filter
+from overlay import OverlayCompositor
+from virtual_keyboard import KeyboardLayer, KeyGrid, build_keyboard
+from resolution_governor import ResolutionGovernor, capture_size_for_quality, DEFAULT_QUALITY
+from hand_features import HandFeatureCache, HandFeatureTracker
+from temporal_gestures import TemporalGestureRecognizer
+from gesture_table import GestureTable, default_gestures, MODE_LABELS
+
+# رابط کاربری برای حالت headless لازم نیست
+try:
+    import customtkinter as ctk
+    from PIL import Image, ImageTk
+    GUI_AVAILABLE = True
+except ImportError:
+    GUI_AVAILABLE = False
+
+# کنترل صوتی (pyautogui و speech_recognition در سطح ماژول)؛ روی سیستم بدون display و میکروفون در دسترس نیست
+try:
+    from local_ai_controller import LocalAIController
+    AI_AVAILABLE = True
+except Exception:
+    AI_AVAILABLE = False
 
 class AdvancedHandController:
-    def __init__(self):
+    def __init__(self, frame_source=None, capture_quality=DEFAULT_QUALITY, headless=False, output=None, cursor_filter="one_euro",
+                 predict=False):
         """
         کنترلر دست پیشرفته با قابلیت‌های تجاری
+        
+        Args:
+            frame_source: منبع تصویر (پیش‌فرض دوربین) - open_frame_source را ببینید
+            capture_quality: کیفیت دریافت تصویر ("480p"، "720p" یا "1080p")
+            headless: اجرای موتور ژست بدون پنجره، پیش‌نمایش و رسم روی تصویر
+            output: خروجی دستورات ماوس، کیبورد و صدا (پیش‌فرض pyautogui و pycaw) - output_backends را ببینید
+            cursor_filter: فیلتر هموارسازی مکان‌نما ("one_euro"، "kalman"، "legacy" یا یک CursorFilter)
+            predict: پیش‌بینی مکان نوک انگشت در لحظه اجرای حرکت ماوس (جبران تأخیر دوربین و پردازش)
         """
         # راه‌اندازی اولیه
-        self.setup_camera()
+        self.headless = headless
+        self.output = output if output is not None else create_output_backend()
+        self.setup_camera(frame_source, capture_quality)
         self.setup_mediapipe()
         self.setup_audio()
-        self.setup_ai_controller()
+        # موتور headless فقط تصویر -> مدل -> ژست -> دستور است؛ بدون کنترل صوتی
+        self.ai_controller = None
+        if not headless:
+            self.setup_ai_controller()
         
         # متغیرهای کنترل
         self.state = "CALIBRATING"
         self.last_state_change_time = 0
         self.calibration_step = 0
         self.calibration_timer = time.time()
+        self.frame_time = time.time() # زمان دریافت فریم جاری (ساعت منطق ژست‌ها)
         
         # متغیرهای ماوس
-        self.smoothening = 5
-        self.plocX, self.plocY = 0, 0
+        # هموارسازی مکان‌نما (legacy همان هموارسازی قبلی با smoothening = 5 است)
+        self.cursor_filter = create_cursor_filter(cursor_filter) if isinstance(cursor_filter, str) else cursor_filter
+        self.predictor = FingertipPredictor() if predict else None
         self.is_dragging = False
+        self.pinch_dragging = False # کشیدن با نیشگون شست و اشاره
+        self.cursor_frame_time = None
         self.click_cooldown = 0
         self.CLICK_DELAY = 0.25
         
@@ -52,7 +95,8 @@ class AdvancedHandController:
         
         # متغیرهای رابط کاربری
         self.root = None
-        self.setup_gui()
+        if not headless:
+            self.setup_gui()
         
         # متغیرهای تجاری
         self.session_data = {
@@ -67,25 +111,32 @@ class AdvancedHandController:
         
         # قابلیت‌های پیشرفته
         self.gesture_history = []
-        self.performance_metrics = {}
-        
-    def setup_camera(self):
-        """راه‌اندازی دوربین"""
-        self.wCam, self.hCam = 1280, 720
-        # تلاش برای باز کردن دوربین‌های مختلف
-        for camera_id in [ 1, 2]:
-            self.cap = cv2.VideoCapture(camera_id)
-            if self.cap.isOpened():
-                print(f"دوربین {camera_id} با موفقیت باز شد")
-                break
-        else:
-            print("هیچ دوربینی پیدا نشد!")
-            self.cap = cv2.VideoCapture(0)  # fallback به دوربین پیش‌فرض
-            
-        self.cap.set(3, self.wCam)
-        self.cap.set(4, self.hCam)
+        self.performance_metrics = {} # خلاصه p50/p95/p99 زمان مراحل حلقه اصلی (میلی‌ثانیه)
+        self.profiler = PipelineProfiler()
+        self.actuator = ActuationWorker() # اجرای ماوس و کیبورد خارج از حلقه پردازش تصویر
+        self.overlay = OverlayCompositor()
+        self.hand_tracker = HandFeatureTracker()
+        self.temporal = TemporalGestureRecognizer() # تاریخچه حلقوی هر دست (نیشگون و کشیدن)
+        self.gestures = GestureTable(default_gestures(mouse_settle=0.0, dynamic=False)) # ژست‌های ماوس و تغییر حالت
+        self.landmark_recorder = None
+        
+    def setup_camera(self, frame_source=None, capture_quality=DEFAULT_QUALITY):
+        """راه‌اندازی دوربین یا منبع تصویر جایگزین (ویدیو، پوشه تصاویر، مصنوعی)"""
+        self.frame_source = open_frame_source(frame_source, *capture_size_for_quality(capture_quality))
+        self.wCam, self.hCam = self.frame_source.size
         self.frame_reduction = 100
         
+        # ابعاد مانیتورها یک بار خوانده و با تغییر آن‌ها به‌روز می‌شود؛ نگاشت تصویر به صفحه از پیش محاسبه شده است
+        self.screen_geometry = ScreenGeometry(self.output)
+        self.screen_mapper = ScreenMapper(self.screen_geometry, (self.wCam, self.hCam), self.frame_reduction)
+        
+        # دریافت تصویر در thread جداگانه (همیشه تازه‌ترین فریم پردازش می‌شود)
+        self.frame_grabber = FrameGrabber(self.frame_source)
+        
+        # کاهش خودکار رزولوشن مدل و نرخ پردازش در صورت کند بودن سیستم (فقط برای منبع زنده)
+        self.governor = ResolutionGovernor()
+        self.governor.enabled = self.frame_source.is_live
+        
     def setup_mediapipe(self):
         """راه‌اندازی MediaPipe"""
         self.mp_hands = mp.solutions.hands
@@ -96,27 +147,38 @@ class AdvancedHandController:
             min_tracking_confidence=0.5
         )
         self.mp_drawing = mp.solutions.drawing_utils
+        self.hand_arrays = HandLandmarkArrays(self.wCam, self.hCam)
+        self.hand_features = HandFeatureCache()
+        
+        # اجرای مدل روی ناحیه اطراف دست‌های فریم قبلی (کاهش هزینه روی CPU)
+        self.roi_tracker = RoiTracker(self.wCam, self.hCam)
         print("MediaPipe با موفقیت راه‌اندازی شد")
         
     def setup_audio(self):
         """راه‌اندازی کنترل صدا"""
-        try:
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            self.volume = cast(interface, POINTER(IAudioEndpointVolume))
-            volRange = self.volume.GetVolumeRange()
+        volRange = self.output.volume_range()
+        if volRange is not None:
             self.minVol, self.maxVol = volRange[0], volRange[1]
             self.volume_control_enabled = True
-        except Exception as e:
-            print(f"Could not initialize volume control: {e}")
+        else:
+            print("Could not initialize volume control")
             self.volume_control_enabled = False
             
     def setup_ai_controller(self):
         """راه‌اندازی کنترلر AI"""
-        self.ai_controller = LocalAIController()
+        if AI_AVAILABLE:
+            try:
+                self.ai_controller = LocalAIController()
+            except Exception as e:
+                print(f"❌ خطا در راه‌اندازی AI: {e}")
+                self.ai_controller = None
+        else:
+            self.ai_controller = None
         
     def setup_gui(self):
         """راه‌اندازی رابط کاربری"""
+        if not GUI_AVAILABLE:
+            raise ImportError("customtkinter نصب نیست؛ برای اجرای بدون رابط کاربری از headless.py استفاده کنید")
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
         
@@ -196,164 +258,146 @@ class AdvancedHandController:
         )
         self.settings_button.pack(pady=10)
         
-    def setup_virtual_keyboard(self):
-        """راه‌اندازی کیبورد مجازی پیشرفته"""
-        class AdvancedButton:
-            def __init__(self, pos, text, size=[80, 80], color=(100, 0, 100)):
-                self.pos = pos
-                self.size = size
-                self.text = text
-                self.color = color
-                self.is_pressed = False
-                
-        # کیبورد فارسی و انگلیسی
-        self.keys = [
-            ["Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P"],
-            ["A", "S", "D", "F", "G", "H", "J", "K", "L", ";"],
-            ["Z", "X", "C", "V", "B", "N", "M", ",", ".", "/"],
-            ["1", "2", "3", "4", "5", "6", "7", "8", "9", "0"]
-        ]
-        
-        self.buttonList = []
-        for i in range(len(self.keys)):
-            for j, key in enumerate(self.keys[i]):
-                self.buttonList.append(AdvancedButton([100 * j + 50, 100 * i + 150], key))
-        
-        # دکمه‌های ویژه
-        self.buttonList.append(AdvancedButton([50, 450], "Space", [400, 80], (0, 100, 100)))
-        self.buttonList.append(AdvancedButton([460, 450], "<-", [100, 80], (100, 100, 0)))
-        self.buttonList.append(AdvancedButton([570, 450], "Enter", [100, 80], (0, 100, 0)))
-        self.buttonList.append(AdvancedButton([680, 450], "Exit", [150, 80], (100, 0, 0)))
-        
-        self.final_text = ""
+    def setup_virtual_keyboard(self, layout="default"):
+        """
+        راه‌اندازی کیبورد مجازی پیشرفته
+
+        Args:
+            layout: "default"، "qwerty" (کامل) یا "persian"
+        """
+        self.keyboard_layout = layout
+        self.buttonList = build_keyboard(layout, self.wCam, self.hCam)
+        # اندیس شبکه‌ای برای پیدا کردن کلید زیر انگشت بدون بررسی همه کلیدها
+        self.keyboard_index = KeyGrid(self.buttonList)
         
-    def get_finger_states(self, hand_landmarks, hand_type):
-        """تشخیص وضعیت انگشتان"""
-        finger_tips = [4, 8, 12, 16, 20]
-        states = []
+        # لایه کیبورد با تغییر چیدمان دکمه‌ها یا ابعاد تصویر دوباره رسم می‌شود
+        self.keyboard_layer = KeyboardLayer()
         
-        # انگشت شست
-        if hand_type.lower() == 'right':
-            states.append(1 if hand_landmarks.landmark[finger_tips[0]].x > hand_landmarks.landmark[finger_tips[0] - 1].x else 0)
-        else:
-            states.append(1 if hand_landmarks.landmark[finger_tips[0]].x < hand_landmarks.landmark[finger_tips[0] - 1].x else 0)
+        # متن تایپ شده با تغییر زبان کیبورد حفظ می‌شود
+        if not hasattr(self, "final_text"):
+            self.final_text = ""
         
-        # 4 انگشت دیگر
-        for i in range(1, 5):
-            states.append(1 if hand_landmarks.landmark[finger_tips[i]].y < hand_landmarks.landmark[finger_tips[i] - 2].y else 0)
-            
-        return states
+    def get_finger_states(self, hand_landmarks, hand_type):
+        """تشخیص وضعیت انگشتان (یک بار برای هر دست در هر فریم)"""
+        return self.hand_features.get(hand_landmarks, hand_type)["finger_states"]
         
     def draw_text_with_bg(self, image, text, position, font_scale=1, color=(255, 255, 255), thickness=2, bg_color=(0, 0, 0, 128)):
-        """رسم متن با پس‌زمینه"""
-        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
-        top_left = (position[0] - 5, position[1] - text_height - 10)
-        bottom_right = (position[0] + text_width + 5, position[1] + baseline)
-        
-        overlay = image.copy()
-        cv2.rectangle(overlay, top_left, bottom_right, bg_color[:3], cv2.FILLED)
-        alpha = bg_color[3] / 255.0 if len(bg_color) > 3 else 0.5
-        cv2.addWeighted(overlay, alpha, image, 1 - alpha, 0, image)
-        
-        cv2.putText(image, text, position, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness, cv2.LINE_AA)
+        """رسم متن با پس‌زمینه (همه برچسب‌های فریم در پایان process_hands یک جا ترکیب می‌شوند)"""
+        if image is None:
+            return
+        self.overlay.add_label(text, position, font_scale, color, thickness, bg_color)
         
     def run_calibration(self, image, hand_landmarks):
         """کالیبراسیون پیشرفته"""
         if self.calibration_step == 0:
             self.draw_text_with_bg(image, "Step 1: Show OPEN HAND for 3 sec", (50, 50), bg_color=(200,0,0,150))
-            if hand_landmarks:
-                if time.time() - self.calibration_timer > 3:
-                    tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-                    ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
+            if hand_landmarks is not None:
+                if self.frame_time - self.calibration_timer > 3:
+                    tx, ty = hand_landmarks[4, 0], hand_landmarks[4, 1]
+                    ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
                     self.calibrated_thresholds["VOL_MAX_DIST"] = max(150, math.hypot(ix - tx, iy - ty))
                     self.calibration_step = 1
-                    self.calibration_timer = time.time()
+                    self.calibration_timer = self.frame_time
                     print(f"Calibrated MAX distance: {self.calibrated_thresholds['VOL_MAX_DIST']:.2f}")
             else:
-                self.calibration_timer = time.time()
+                self.calibration_timer = self.frame_time
         
         elif self.calibration_step == 1:
             self.draw_text_with_bg(image, "Step 2: Bring Thumb & Index together for 3 sec", (50, 50), bg_color=(200,0,0,150))
-            if hand_landmarks:
-                if time.time() - self.calibration_timer > 3:
-                    tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-                    ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
+            if hand_landmarks is not None:
+                if self.frame_time - self.calibration_timer > 3:
+                    tx, ty = hand_landmarks[4, 0], hand_landmarks[4, 1]
+                    ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
                     self.calibrated_thresholds["VOL_MIN_DIST"] = math.hypot(ix - tx, iy - ty) + 10
                     
-                    ix_tip, iy_tip = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-                    mx_tip, my_tip = hand_landmarks.landmark[12].x * self.wCam, hand_landmarks.landmark[12].y * self.hCam
+                    ix_tip, iy_tip = hand_landmarks[8, 0], hand_landmarks[8, 1]
+                    mx_tip, my_tip = hand_landmarks[12, 0], hand_landmarks[12, 1]
                     self.calibrated_thresholds["CLICK_DISTANCE"] = math.hypot(ix_tip-mx_tip, iy_tip-my_tip) + 15
                     
                     self.calibration_step = 2
                     print(f"Calibrated MIN distance: {self.calibrated_thresholds['VOL_MIN_DIST']:.2f}")
                     print(f"Calibrated CLICK distance: {self.calibrated_thresholds['CLICK_DISTANCE']:.2f}")
             else:
-                self.calibration_timer = time.time()
+                self.calibration_timer = self.frame_time
                 
         elif self.calibration_step == 2:
             self.draw_text_with_bg(image, "Calibration Complete!", (50, 50), color=(0, 255, 0), bg_color=(0,100,0,150))
-            if time.time() - self.calibration_timer > 2:
+            if self.frame_time - self.calibration_timer > 2:
                 self.state = "IDLE"
                 self.update_status("Ready")
                 
     def run_mouse_control(self, image, hand_landmarks):
         """کنترل ماوس پیشرفته"""
         self.draw_text_with_bg(image, "MOUSE CONTROL", (10, 40), color=(0, 255, 255))
-        cv2.rectangle(image, (self.frame_reduction, self.frame_reduction), 
-                     (self.wCam - self.frame_reduction, self.hCam - self.frame_reduction), (0, 255, 255), 2)
+        if image is not None:
+            x0, y0, x1, y1 = self.screen_mapper.active_region
+            cv2.rectangle(image, (x0, y0), (x1, y1), (0, 255, 255), 2)
+
+    def mouse_move(self, image, hand_landmarks, features):
+        """حرکت ماوس با انگشت اشاره (میانی بسته)"""
+        if self.is_dragging:
+            with self.profiler.measure("actuation"):
+                self.actuator.submit(self.output.mouse_up, 'left')
+            self.is_dragging = False
+        self.move_cursor(hand_landmarks)
 
-        fingers = self.get_finger_states(hand_landmarks, "right")
+    def move_cursor(self, hand_landmarks):
+        """بردن مکان‌نما به مکان نوک انگشت اشاره (حداکثر یک بار در هر فریم)"""
+        if self.cursor_frame_time == self.frame_time:
+            return
+        self.cursor_frame_time = self.frame_time
         
-        # حرکت ماوس
-        if fingers[1] == 1 and fingers[2] == 0:
-            if self.is_dragging:
-                pyautogui.mouseUp(button='left')
-                self.is_dragging = False
-            
-            ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-            
-            screen_w, screen_h = pyautogui.size()
-            x_mapped = np.interp(ix, (self.frame_reduction, self.wCam - self.frame_reduction), (0, screen_w))
-            y_mapped = np.interp(iy, (self.frame_reduction, self.hCam - self.frame_reduction), (0, screen_h))
-            
-            clocX = self.plocX + (x_mapped - self.plocX) / self.smoothening
-            clocY = self.plocY + (y_mapped - self.plocY) / self.smoothening
-            
-            pyautogui.moveTo(clocX, clocY)
-            self.plocX, self.plocY = clocX, clocY
-            self.session_data["gestures_detected"] += 1
+        ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
+        if self.predictor is not None:
+            self.predictor.update(ix, iy, self.frame_time)
+            ix, iy = self.predictor.predict()
+        
+        x_mapped, y_mapped = self.screen_mapper.to_screen(ix, iy)
+        
+        clocX, clocY = self.cursor_filter.filter(x_mapped, y_mapped, self.frame_time)
+        
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.move_to, clocX, clocY, coalesce=True)
+        self.session_data["gestures_detected"] += 1
 
-        # کلیک چپ
-        if fingers[1] == 1 and fingers[2] == 1:
-            ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-            mx, my = hand_landmarks.landmark[12].x * self.wCam, hand_landmarks.landmark[12].y * self.hCam
-            distance = math.hypot(mx - ix, my - iy)
-            
-            if distance < self.calibrated_thresholds["CLICK_DISTANCE"] and time.time() > self.click_cooldown:
-                pyautogui.click()
-                self.click_cooldown = time.time() + self.CLICK_DELAY
-                self.session_data["commands_executed"] += 1
+    def mouse_click(self, image, hand_landmarks, features, button):
+        """کلیک چپ (نزدیک شدن اشاره و میانی) یا راست (نزدیک شدن شست و اشاره)"""
+        if self.frame_time <= self.click_cooldown:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.click if button == "left" else self.output.right_click)
+        self.click_cooldown = self.frame_time + self.CLICK_DELAY + (0 if button == "left" else 0.2)
+        self.session_data["commands_executed"] += 1
 
-        # کلیک راست
-        if fingers[0] == 1 and fingers[1] == 1:
-            tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-            ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-            distance = math.hypot(tx - ix, ty - iy)
+    def pinch_gesture(self, image, hand_landmarks, features):
+        """نیشگون شست و اشاره: ضربه کوتاه کلیک راست و نیشگون همراه حرکت کشیدن و رها کردن است"""
+        event = self.temporal.pinch_event('right')
+        if event == "tap":
+            self.mouse_click(image, hand_landmarks, features, "right")
+        elif event == "drag_start":
+            with self.profiler.measure("actuation"):
+                self.actuator.submit(self.output.mouse_down, 'left')
+            self.pinch_dragging = True
+        elif event == "drag" and self.pinch_dragging:
+            self.move_cursor(hand_landmarks)
+        elif event == "drop":
+            self.release_pinch_drag()
 
-            if distance < self.calibrated_thresholds["CLICK_DISTANCE"] and time.time() > self.click_cooldown:
-                pyautogui.rightClick()
-                self.click_cooldown = time.time() + self.CLICK_DELAY + 0.2
-                self.session_data["commands_executed"] += 1
+    def release_pinch_drag(self):
+        """رها کردن دکمه ماوس در پایان کشیدن با نیشگون"""
+        if not self.pinch_dragging:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.mouse_up, 'left')
+        self.pinch_dragging = False
 
-        # Drag and Drop
-        if all(f == 0 for f in fingers):
-            if not self.is_dragging:
-                pyautogui.mouseDown(button='left')
-                self.is_dragging = True
-        else:
-            if self.is_dragging and not (fingers[1] == 1 and fingers[2] == 0):
-                pyautogui.mouseUp(button='left')
-                self.is_dragging = False
+    def drag(self, image, hand_landmarks, features, pressed):
+        """Drag and Drop: مشت بسته دکمه چپ را نگه می‌دارد و باز شدن دست آن را رها می‌کند"""
+        if pressed == self.is_dragging:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.mouse_down if pressed else self.output.mouse_up, 'left')
+        self.is_dragging = pressed
                 
     def run_system_control(self, image, hand_landmarks):
         """کنترل سیستم پیشرفته"""
@@ -362,12 +406,13 @@ class AdvancedHandController:
             self.draw_text_with_bg(image, "Volume control disabled", (10, 80), color=(255, 0, 0))
             return
 
-        tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-        ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
+        tx, ty = hand_landmarks[4, 0], hand_landmarks[4, 1]
+        ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
         
-        cv2.circle(image, (int(tx), int(ty)), 10, (0, 255, 0), cv2.FILLED)
-        cv2.circle(image, (int(ix), int(iy)), 10, (0, 255, 0), cv2.FILLED)
-        cv2.line(image, (int(tx), int(ty)), (int(ix), int(iy)), (0, 255, 0), 3)
+        if image is not None:
+            cv2.circle(image, (int(tx), int(ty)), 10, (0, 255, 0), cv2.FILLED)
+            cv2.circle(image, (int(ix), int(iy)), 10, (0, 255, 0), cv2.FILLED)
+            cv2.line(image, (int(tx), int(ty)), (int(ix), int(iy)), (0, 255, 0), 3)
 
         length_vol = math.hypot(ix - tx, iy - ty)
         
@@ -375,76 +420,64 @@ class AdvancedHandController:
         vol_bar = np.interp(length_vol, [self.calibrated_thresholds["VOL_MIN_DIST"], self.calibrated_thresholds["VOL_MAX_DIST"]], [400, 150])
         vol_per = np.interp(length_vol, [self.calibrated_thresholds["VOL_MIN_DIST"], self.calibrated_thresholds["VOL_MAX_DIST"]], [0, 100])
         
-        self.volume.SetMasterVolumeLevel(vol, None)
+        with self.profiler.measure("actuation"):
+            self.output.set_volume(vol)
         
-        cv2.rectangle(image, (50, 150), (85, 400), (0, 255, 0), 3)
-        cv2.rectangle(image, (50, int(vol_bar)), (85, 400), (0, 255, 0), cv2.FILLED)
-        cv2.putText(image, f'{int(vol_per)} %', (40, 450), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 3)
+        if image is not None:
+            cv2.rectangle(image, (50, 150), (85, 400), (0, 255, 0), 3)
+            cv2.rectangle(image, (50, int(vol_bar)), (85, 400), (0, 255, 0), cv2.FILLED)
+            cv2.putText(image, f'{int(vol_per)} %', (40, 450), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 3)
         
     def run_keyboard_mode(self, image, hand_landmarks):
         """حالت کیبورد پیشرفته"""
         image = self.draw_keyboard(image, self.buttonList)
-        ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-        
-        for button in self.buttonList:
-            x, y = button.pos
-            w, h = button.size
-            if x < ix < x + w and y < iy < y + h:
-                cv2.rectangle(image, (x - 5, y - 5), (x + w + 5, y + h + 5), (175, 0, 175), cv2.FILLED)
-                cv2.putText(image, button.text, (x + 20, y + 60), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
+        ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
+        
+        button = self.keyboard_index.hit(ix, iy)
+        if button is not None:
+            if image is not None:
+                self.keyboard_layer.draw_key(image, button, (175, 0, 175))
+            
+            features = self.hand_features.get(hand_landmarks, "right")
+            fingers = features["finger_states"]
+            if fingers[1] == 1 and fingers[2] == 1:
+                distance = features["index_middle_dist"]
                 
-                fingers = self.get_finger_states(hand_landmarks, "right")
-                if fingers[1] == 1 and fingers[2] == 1:
-                    mx, my = hand_landmarks.landmark[12].x * self.wCam, hand_landmarks.landmark[12].y * self.hCam
-                    distance = math.hypot(mx - ix, my - iy)
+                if distance < self.calibrated_thresholds["CLICK_DISTANCE"] * 1.2 and self.frame_time > self.click_cooldown:
+                    if button.key == "exit": 
+                        self.state = "IDLE"
+                    elif button.key.startswith("layout:"):
+                        self.setup_virtual_keyboard(button.key.split(":", 1)[1])
+                    else:
+                        with self.profiler.measure("actuation"):
+                            self.actuator.submit(self.output.press, button.key)
+                        self.final_text = button.apply(self.final_text)
                     
-                    if distance < self.calibrated_thresholds["CLICK_DISTANCE"] * 1.2 and time.time() > self.click_cooldown:
-                        if button.text == "Exit": 
-                            self.state = "IDLE"
-                        elif button.text == "<-": 
-                            pyautogui.press('backspace')
-                            self.final_text = self.final_text[:-1]
-                        elif button.text == "Space": 
-                            pyautogui.press('space')
-                            self.final_text += " "
-                        elif button.text == "Enter":
-                            pyautogui.press('enter')
-                            self.final_text += "\n"
-                        else: 
-                            pyautogui.press(button.text)
-                            self.final_text += button.text
-                        
-                        self.click_cooldown = time.time() + self.CLICK_DELAY + 0.3
-                        cv2.rectangle(image, (x - 5, y - 5), (x + w + 5, y + h + 5), (0, 255, 0), cv2.FILLED)
-                        self.session_data["commands_executed"] += 1
+                    self.click_cooldown = self.frame_time + self.CLICK_DELAY + 0.3
+                    if image is not None:
+                        self.keyboard_layer.draw_key(image, button, (0, 255, 0), label=False)
+                    self.session_data["commands_executed"] += 1
 
-        cv2.rectangle(image, (50, 550), (1200, 650), (50, 50, 50), cv2.FILLED)
-        cv2.putText(image, self.final_text, (60, 620), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
+        if image is not None:
+            cv2.rectangle(image, (50, 550), (1200, 650), (50, 50, 50), cv2.FILLED)
+            cv2.putText(image, self.final_text, (60, 620), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
         return image
         
     def draw_keyboard(self, image, buttonList):
-        """رسم کیبورد مجازی"""
-        img_new = np.zeros_like(image, np.uint8)
-        for button in buttonList:
-            x, y = button.pos
-            w, h = button.size
-            color = button.color if hasattr(button, 'color') else (100, 0, 100)
-            cv2.rectangle(img_new, (x, y), (x + w, y + h), color, cv2.FILLED)
-            cv2.putText(img_new, button.text, (x + 20, y + 60), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
-        
-        out = image.copy()
-        alpha = 0.5
-        mask = img_new.astype(bool)
-        out[mask] = cv2.addWeighted(image, alpha, img_new, 1 - alpha, 0)[mask]
-        return out
+        """رسم کیبورد مجازی (لایه کیبورد یک بار رسم و در هر فریم فقط ترکیب می‌شود)"""
+        if image is None:
+            return image
+        with self.profiler.measure("overlay"):
+            return self.keyboard_layer.draw(image, buttonList)
         
     def start_control(self):
         """شروع کنترل"""
         self.state = "CALIBRATING"
         self.calibration_step = 0
         self.calibration_timer = time.time()
-        self.start_button.configure(state="disabled")
-        self.stop_button.configure(state="normal")
+        if self.root is not None:
+            self.start_button.configure(state="disabled")
+            self.stop_button.configure(state="normal")
         self.update_status("Calibrating...")
         
         # شروع حلقه اصلی در thread جداگانه
@@ -455,8 +488,9 @@ class AdvancedHandController:
     def stop_control(self):
         """توقف کنترل"""
         self.state = "STOPPED"
-        self.start_button.configure(state="normal")
-        self.stop_button.configure(state="disabled")
+        if self.root is not None:
+            self.start_button.configure(state="normal")
+            self.stop_button.configure(state="disabled")
         self.update_status("Stopped")
         
     def toggle_voice_control(self):
@@ -467,11 +501,13 @@ class AdvancedHandController:
         if not self.voice_control_active:
             self.voice_control_active = True
             self.voice_button.configure(text="Stop Voice Control")
-            self.ai_controller.start_voice_control()
+            if self.ai_controller:
+                self.ai_controller.start_voice_control()
         else:
             self.voice_control_active = False
             self.voice_button.configure(text="Start Voice Control")
-            self.ai_controller.stop_voice_control()
+            if self.ai_controller:
+                self.ai_controller.stop_voice_control()
             
     def open_settings(self):
         """باز کردن تنظیمات"""
@@ -482,29 +518,66 @@ class AdvancedHandController:
         # تنظیمات مختلف
         ctk.CTkLabel(settings_window, text="Settings", font=ctk.CTkFont(size=20)).pack(pady=20)
         
+    def set_mode(self, image, hand_landmarks, features, state):
+        """تغییر حالت با ژست دست چپ"""
+        self.state = state
+        self.last_state_change_time = self.frame_time
+        if state == "IDLE":
+            self.final_text = ""
+        self.update_status(MODE_LABELS[state])
+        
     def update_status(self, status):
         """به‌روزرسانی وضعیت"""
+        if self.root is None:
+            return
         self.status_label.configure(text=f"Status: {status}")
         
     def update_stats(self):
         """به‌روزرسانی آمار"""
+        # محاسبه صدک‌ها هر 30 فریم یک بار کافی است
+        if self.profiler.frames % 30 == 0:
+            self.performance_metrics = self.profiler.summary()
+        if self.root is None:
+            return
+        frame_stats = self.performance_metrics.get("total", {})
         stats_text = f"""Statistics:
 Commands: {self.session_data['commands_executed']}
 Gestures: {self.session_data['gestures_detected']}
 Errors: {self.session_data['errors']}
+Dropped frames: {self.frame_grabber.frames_dropped}
+Inference: {self.governor.inference_scale:.0%} @ {self.governor.max_fps or 'max'} fps
+Frame p50/p95: {frame_stats.get('p50_ms', 0):.1f}/{frame_stats.get('p95_ms', 0):.1f} ms
+Actuation p95: {self.actuator.latency.percentile(95) * 1000:.1f} ms (queued {self.actuator.pending})
+Cursor filter: {self.cursor_filter.name} (+{self.cursor_filter.added_latency * 1000:.0f} ms)
 Uptime: {int(time.time() - self.session_data['start_time'])}s"""
         self.stats_label.configure(text=stats_text)
         
     def main_loop(self):
         """حلقه اصلی برنامه"""
+        self.frame_grabber.start()
+        self.actuator.start()
+        self.screen_geometry.start()
         while self.state != "STOPPED":
-            success, image = self.cap.read()
-            if not success: 
+            frame = self.frame_grabber.read()
+            if frame is None: 
+                if self.frame_grabber.exhausted:
+                    break
                 continue
                 
-            image = cv2.flip(image, 1)
+            if not self.governor.should_process(frame.timestamp):
+                continue
+                
+            # زمان‌گیری مراحل؛ capture فاصله دریافت فریم تا شروع پردازش آن است
+            self.profiler.begin_frame()
+            self.profiler.record("capture", max(0.0, time.time() - frame.timestamp))
+            self.frame_time = frame.timestamp
+            image = cv2.flip(frame.image, 1)
             image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(image_rgb)
+            self.profiler.lap("color_conversion")
+            results, roi = self.detect_hands(image_rgb)
+            
+            if self.landmark_recorder:
+                self.landmark_recorder.write(frame.timestamp, landmarks_from_results(results, roi, (self.wCam, self.hCam)))
             
             left_hand, right_hand = None, None
             
@@ -516,66 +589,157 @@ Uptime: {int(time.time() - self.session_data['start_time'])}s"""
                     else:
                         right_hand = hand_landmarks
                 
+                # تبدیل یک باره هر دست به آرایه پیکسلی؛ منطق ژست‌ها فقط با آرایه کار می‌کند
+                # نقاط نسبت به ناحیه برش هستند، پس روی همان ناحیه رسم و به مختصات فریم کامل تبدیل می‌شوند
+                view = image if roi is None else image[roi[1]:roi[3], roi[0]:roi[2]]
+                self.hand_arrays.set_roi(roi)
+                if not self.headless:
+                    with self.profiler.measure("overlay"):
+                        for hand in (left_hand, right_hand):
+                            if hand:
+                                self.mp_drawing.draw_landmarks(view, hand, self.mp_hands.HAND_CONNECTIONS)
                 if left_hand:
-                    self.mp_drawing.draw_landmarks(image, left_hand, self.mp_hands.HAND_CONNECTIONS)
+                    left_hand = self.hand_arrays.from_landmarks(left_hand, "Left")
                 if right_hand:
-                    self.mp_drawing.draw_landmarks(image, right_hand, self.mp_hands.HAND_CONNECTIONS)
-
-            # اجرای حالت‌ها
-            if self.state == "CALIBRATING":
-                active_hand = left_hand or right_hand
-                self.run_calibration(image, active_hand)
+                    right_hand = self.hand_arrays.from_landmarks(right_hand, "Right")
             
-            elif self.state == "IDLE":
-                self.draw_text_with_bg(image, "IDLE", (10, 40), color=(255, 255, 0))
-                self.draw_text_with_bg(image, "Use Left Hand to Select Mode:", (10, 80), 0.7)
-                self.draw_text_with_bg(image, "1 Finger: Mouse | 2 Fingers: System | 3 Fingers: Keyboard", (10, 110), 0.7)
-                self.draw_text_with_bg(image, "Open Palm (5 Fingers): Back to IDLE", (10, 140), 0.7)
+            self.roi_tracker.update([hand for hand in (left_hand, right_hand) if hand is not None])
+            self.profiler.lap("inference")
 
-            elif right_hand:
-                if self.state == "MOUSE_CONTROL":
-                    self.run_mouse_control(image, right_hand)
-                elif self.state == "SYSTEM_CONTROL":
-                    self.run_system_control(image, right_hand)
-                elif self.state == "KEYBOARD_MODE":
-                    image = self.run_keyboard_mode(image, right_hand)
-            else:
-                self.draw_text_with_bg(image, f"Show Right Hand to use {self.state}", (self.wCam//2 - 200, self.hCam//2), color=(0,0,255))
-            
-            # کنترل تغییر حالت با دست چپ
-            if left_hand and time.time() - self.last_state_change_time > 1.0:
-                left_fingers = self.get_finger_states(left_hand, "Left")
-                
-                if sum(left_fingers) == 5 and self.state != "IDLE" and self.state != "CALIBRATING":
-                    self.state = "IDLE"
-                    self.final_text = ""
-                    self.last_state_change_time = time.time()
-                    self.update_status("IDLE")
-                
-                elif self.state == "IDLE":
-                    if sum(left_fingers) == 1 and left_fingers[1] == 1:
-                        self.state = "MOUSE_CONTROL"
-                        self.last_state_change_time = time.time()
-                        self.update_status("Mouse Control")
-                    elif sum(left_fingers) == 2 and left_fingers[1] == 1 and left_fingers[2] == 1:
-                        self.state = "SYSTEM_CONTROL"
-                        self.last_state_change_time = time.time()
-                        self.update_status("System Control")
-                    elif sum(left_fingers) == 3 and left_fingers[1] == 1 and left_fingers[2] == 1 and left_fingers[3] == 1:
-                        self.state = "KEYBOARD_MODE"
-                        self.last_state_change_time = time.time()
-                        self.update_status("Keyboard Mode")
+            # در حالت headless هیچ چیزی روی تصویر رسم نمی‌شود
+            image = self.process_hands(None if self.headless else image, left_hand, right_hand)
+            self.profiler.lap("gesture_logic")
 
             # به‌روزرسانی آمار
             self.update_stats()
             
-            cv2.imshow("Advanced Hand Controller Pro v3.0", image)
+            key = -1
+            if not self.headless:
+                cv2.imshow("Advanced Hand Controller Pro v3.0", image)
+                key = cv2.waitKey(1) & 0xFF
+            self.profiler.lap("display")
+            self.profiler.end_frame()
+            # بودجه زمان پردازش بدون نمایش تصویر (imshow/waitKey)
+            processing = self.profiler.last["total"] - self.profiler.last.get("display", 0.0)
+            self.governor.update({"inference": self.profiler.last["inference"], "processing": processing})
+            if self.predictor is not None:
+                # تأخیر از دریافت تصویر تا اجرای حرکت ماوس در thread خروجی
+                last = self.profiler.last
+                self.predictor.observe_latency(sum(last.get(stage, 0.0) for stage in LATENCY_STAGES)
+                                               + self.actuator.latency.mean)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key == ord('q'):
                 break
                 
-        self.cap.release()
-        cv2.destroyAllWindows()
+        self.frame_grabber.stop()
+        self.actuator.stop()
+        self.screen_geometry.stop()
+        self.stop_landmark_recording()
+        self.frame_source.release()
+        if not self.headless:
+            cv2.destroyAllWindows()
+        
+    def detect_hands(self, image_rgb):
+        """
+        اجرای مدل روی ناحیه اطراف دست‌های فریم قبلی یا در صورت نیاز روی کل تصویر
+        
+        Returns:
+            (results, roi) - roi ناحیه برش استفاده شده یا None برای کل تصویر
+        """
+        roi = self.roi_tracker.next_roi()
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            crop = np.ascontiguousarray(image_rgb[y0:y1, x0:x1])
+            results = self.hands.process(self.governor.resize_for_inference(crop))
+            if results.multi_hand_landmarks:
+                return results, roi
+            # دست در ناحیه برش پیدا نشد؛ بررسی دوباره کل تصویر
+            self.roi_tracker.report_miss()
+        return self.hands.process(self.governor.resize_for_inference(image_rgb)), None
+        
+    def process_hands(self, image, left_hand, right_hand):
+        """
+        منطق حالت‌ها و ژست‌ها برای یک فریم (مستقل از دوربین و مدل)
+        
+        Args:
+            image: تصویر برای رسم راهنماها
+            left_hand, right_hand: نقاط دست چپ و راست یا None
+            
+        Returns:
+            تصویر نهایی
+        """
+        self.hand_features.new_frame()
+        self.overlay.clear()
+        
+        # تاریخچه چند فریم اخیر هر دست برای ژست‌های پویا
+        self.hand_tracker.update(left_hand, right_hand, self.frame_time)
+        for side, hand, hand_type in (('left', left_hand, "Left"), ('right', right_hand, "right")):
+            features = self.hand_features.get(hand, hand_type) if hand is not None else None
+            self.temporal.update(side, self.hand_tracker.current[side], features,
+                                 self.calibrated_thresholds["CLICK_DISTANCE"])
+        
+        # ژست‌های دست راست (ماوس) با یک جستجو در جدول ژست‌ها
+        if right_hand is not None:
+            features = self.hand_features.get(right_hand, "right")
+            self.gestures.dispatch(self, image, "right", right_hand, features, alone=left_hand is None)
+        if self.pinch_dragging and (right_hand is None or self.state != "MOUSE_CONTROL"):
+            self.release_pinch_drag()
+        
+        # اجرای حالت‌ها
+        if self.state == "CALIBRATING":
+            active_hand = left_hand if left_hand is not None else right_hand
+            self.run_calibration(image, active_hand)
+        
+        elif self.state == "IDLE":
+            self.draw_text_with_bg(image, "IDLE", (10, 40), color=(255, 255, 0))
+            self.draw_text_with_bg(image, "Use Left Hand to Select Mode:", (10, 80), 0.7)
+            self.draw_text_with_bg(image, "1 Finger: Mouse | 2 Fingers: System | 3 Fingers: Keyboard", (10, 110), 0.7)
+            self.draw_text_with_bg(image, "Open Palm (5 Fingers): Back to IDLE", (10, 140), 0.7)
+
+        elif right_hand is not None:
+            if self.state == "MOUSE_CONTROL":
+                self.run_mouse_control(image, right_hand)
+            elif self.state == "SYSTEM_CONTROL":
+                self.run_system_control(image, right_hand)
+            elif self.state == "KEYBOARD_MODE":
+                image = self.run_keyboard_mode(image, right_hand)
+        else:
+            self.draw_text_with_bg(image, f"Show Right Hand to use {self.state}", (self.wCam//2 - 200, self.hCam//2), color=(0,0,255))
+        
+        # کنترل تغییر حالت با دست چپ
+        if left_hand is not None:
+            features = self.hand_features.get(left_hand, "Left")
+            self.gestures.dispatch(self, image, "left", left_hand, features, alone=right_hand is None)
+                    
+        # ترکیب برچسب‌های نیمه شفاف فقط در محدوده کادرها و در یک مرحله
+        with self.profiler.measure("overlay"):
+            self.overlay.flush(image)
+            
+        return image
+        
+    def run_headless(self):
+        """اجرای موتور ژست در thread فعلی بدون رابط کاربری (Ctrl+C برای توقف)"""
+        try:
+            self.main_loop()
+        except KeyboardInterrupt:
+            self.state = "STOPPED"
+        finally:
+            self.frame_grabber.stop()
+            self.actuator.stop()
+            self.screen_geometry.stop()
+            self.stop_landmark_recording()
+            self.frame_source.release()
+            
+    def start_landmark_recording(self, path):
+        """شروع ضبط نقاط دست برای پخش مجدد و بنچمارک"""
+        self.stop_landmark_recording()
+        self.landmark_recorder = LandmarkRecorder(path)
+        
+    def stop_landmark_recording(self):
+        """توقف ضبط نقاط دست"""
+        if self.landmark_recorder:
+            self.landmark_recorder.close()
+            self.landmark_recorder = None
         
     def run(self):
         """اجرای برنامه"""
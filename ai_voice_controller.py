@@ -4,7 +4,6 @@ Advanced AI Voice Control System
 """
 
 import speech_recognition as sr
-import pyttsx3
 import openai
 import threading
 import time
@@ -17,6 +16,10 @@ import webbrowser
 import pyautogui
 import psutil
 
+from command_matcher import CommandMatcher
+from intent_index import IntentIndex
+from tts_worker import TTSWorker, PRIORITY_NORMAL, PRIORITY_HIGH
+
 class AIVoiceController:
     def __init__(self, openai_api_key: str = None):
         """
@@ -31,10 +34,9 @@ class AIVoiceController:
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
         
-        # راه‌اندازی تبدیل متن به گفتار
-        self.tts_engine = pyttsx3.init()
-        self.tts_engine.setProperty('rate', 150)
-        self.tts_engine.setProperty('volume', 0.8)
+        # راه‌اندازی تبدیل متن به گفتار (یک thread مالک موتور با صف جمله‌ها)
+        self.tts = TTSWorker(rate=150, volume=0.8)
+        self.tts.start()
         
         # تنظیمات OpenAI
         if self.openai_api_key:
@@ -52,8 +54,8 @@ class AIVoiceController:
             "صدا را قطع کن": self.mute_volume,
             
             # دستورات مرورگر
-            "کروم را باز کن": lambda: self.open_application("chrome"),
-            "فایرفاکس را باز کن": lambda: self.open_application("firefox"),
+            "کروم را باز کن": lambda cmd: self.open_application("کروم"),
+            "فایرفاکس را باز کن": lambda cmd: self.open_application("فایرفاکس"),
             "یوتیوب را باز کن": self.open_youtube,
             "گوگل را باز کن": self.open_google,
             "جستجو کن": self.search_web,
@@ -69,6 +71,10 @@ class AIVoiceController:
             "برنامه‌نویسی": self.programming_help,
             "ترجمه کن": self.translate_text,
         }
+        # همه عبارت‌ها در یک گذر روی متن؛ طولانی‌ترین (مشخص‌ترین) عبارت انتخاب می‌شود
+        self.command_matcher = CommandMatcher(self.commands)
+        # تطبیق معنایی وقتی هیچ عبارتی عیناً در متن نیست (بردارها یک بار ساخته و ذخیره می‌شوند)
+        self.intent_index = IntentIndex.from_commands(self.commands)
         
         # حالت‌های مختلف
         self.current_mode = "normal"  # normal, programming, web, system
@@ -79,15 +85,16 @@ class AIVoiceController:
         with self.microphone as source:
             self.recognizer.adjust_for_ambient_noise(source)
     
-    def speak(self, text: str):
-        """تبدیل متن به گفتار"""
-        def speak_thread():
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+    def speak(self, text: str, priority: int = PRIORITY_NORMAL, interrupt: bool = False):
+        """
+        تبدیل متن به گفتار (بدون انتظار؛ جمله در صف TTSWorker قرار می‌گیرد)
         
-        thread = threading.Thread(target=speak_thread)
-        thread.daemon = True
-        thread.start()
+        Args:
+            text: متن
+            priority: اولویت جمله در صف
+            interrupt: قطع جمله در حال گفتن و جمله‌های در انتظار کم‌اهمیت‌تر
+        """
+        self.tts.say(text, priority=priority, interrupt=interrupt)
     
     def listen(self) -> str:
         """شنیدن و تشخیص دستور صوتی"""
@@ -114,17 +121,23 @@ class AIVoiceController:
         if not command:
             return False
         
-        # جستجوی دستور در دیکشنری
-        for key, func in self.commands.items():
-            if key in command:
-                try:
-                    func(command)
-                    self.speak("انجام شد")
-                    return True
-                except Exception as e:
-                    print(f"خطا در اجرای دستور: {e}")
-                    self.speak("خطا در اجرای دستور")
-                    return False
+        # جستجوی مشخص‌ترین دستور در دیکشنری
+        if len(self.command_matcher) != len(self.commands):
+            self.command_matcher = CommandMatcher(self.commands)
+            self.intent_index = IntentIndex.from_commands(self.commands)
+        key = self.command_matcher.match(command)
+        if key is None:
+            # نزدیک‌ترین دستور از نظر معنایی (مثلاً "صدا رو بالا ببر")
+            key, _ = self.intent_index.match(command)
+        if key is not None:
+            try:
+                self.commands[key](command)
+                self.speak("انجام شد")
+                return True
+            except Exception as e:
+                print(f"خطا در اجرای دستور: {e}")
+                self.speak("خطا در اجرای دستور")
+                return False
         
         # اگر دستور پیدا نشد، از AI استفاده کن
         return self.handle_ai_command(command)
@@ -309,7 +322,7 @@ class AIVoiceController:
     def stop_voice_control(self):
         """توقف کنترل صوتی"""
         self.is_listening = False
-        self.speak("کنترل صوتی متوقف شد")
+        self.speak("کنترل صوتی متوقف شد", priority=PRIORITY_HIGH, interrupt=True)
 
 # تست سیستم
 if __name__ == "__main__":
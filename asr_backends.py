@@ -0,0 +1,308 @@
+"""
+موتورهای قابل تعویض تشخیص گفتار (Vosk آفلاین و جریانی، Google) با ابزار اندازه‌گیری روی فایل WAV
+Pluggable speech recognition backends: streaming offline Vosk, Google, and a WAV benchmark
+"""
+
+import json
+import os
+import time
+import wave
+
+import numpy as np
+
+# تشخیص گفتار آفلاین و جریانی
+try:
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+# تشخیص گفتار Google (نیاز به اینترنت)
+try:
+    import speech_recognition as sr
+    SPEECH_RECOGNITION_AVAILABLE = True
+except ImportError:
+    SPEECH_RECOGNITION_AVAILABLE = False
+
+ASR_BACKENDS = ("auto", "vosk", "google")
+
+# مسیر پیش‌فرض مدل فارسی Vosk (https://alphacephei.com/vosk/models)
+DEFAULT_VOSK_MODEL = os.environ.get("VOSK_MODEL", os.path.join("model_cache", "vosk-model-small-fa-0.5"))
+
+
+class Hypothesis:
+    """یک فرضیه تشخیص: متن، نهایی بودن و زمان صدا (ثانیه از ابتدای گفته)"""
+    __slots__ = ("text", "final", "audio_time")
+
+    def __init__(self, text, final, audio_time):
+        self.text = text
+        self.final = final
+        self.audio_time = audio_time
+
+    def __repr__(self):
+        return f"Hypothesis({self.text!r}, {'final' if self.final else 'partial'}, {self.audio_time:.2f}s)"
+
+
+class ASRBackend:
+    """
+    رابط تشخیص گفتار
+
+    صدا به صورت تکه‌های PCM شانزده بیتی تک کاناله با نرخ sample_rate داده می‌شود.
+    موتورهای جریانی (streaming = True) با هر تکه فرضیه میانی برمی‌گردانند؛ بقیه فقط
+    در finish نتیجه می‌دهند.
+    """
+    name = ""
+    streaming = False
+
+    def __init__(self, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self._audio_bytes = 0
+
+        # آمار
+        self.utterances = 0
+        self.decode_seconds = 0.0
+        self.audio_seconds = 0.0
+
+    @property
+    def audio_time(self):
+        """طول صدای دریافت شده در گفته جاری (ثانیه)"""
+        return self._audio_bytes / (2.0 * self.sample_rate)
+
+    def reset(self):
+        """شروع گفته جدید"""
+        self._audio_bytes = 0
+
+    def accept(self, chunk):
+        """
+        افزودن یک تکه صدا
+
+        Returns:
+            Hypothesis (میانی یا نهایی اگر موتور پایان جمله را تشخیص داده) یا None
+        """
+        start = time.perf_counter()
+        self._audio_bytes += len(chunk)
+        hypothesis = self._accept(chunk)
+        self.decode_seconds += time.perf_counter() - start
+        return hypothesis
+
+    def finish(self):
+        """پایان گفته و دریافت نتیجه نهایی"""
+        start = time.perf_counter()
+        text = self._finish()
+        self.decode_seconds += time.perf_counter() - start
+        self.utterances += 1
+        self.audio_seconds += self.audio_time
+        return Hypothesis(text, True, self.audio_time)
+
+    def transcribe(self, pcm):
+        """تشخیص یک گفته کامل"""
+        self.reset()
+        self.accept(pcm)
+        return self.finish().text
+
+    def _accept(self, chunk):
+        raise NotImplementedError
+
+    def _finish(self):
+        raise NotImplementedError
+
+    def get_stats(self):
+        """تعداد گفته‌ها و نسبت زمان پردازش به طول صدا (real-time factor)"""
+        return {
+            "backend": self.name,
+            "utterances": self.utterances,
+            "audio_seconds": self.audio_seconds,
+            "decode_seconds": self.decode_seconds,
+            "rtf": self.decode_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+        }
+
+
+class VoskBackend(ASRBackend):
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path=DEFAULT_VOSK_MODEL, sample_rate=16000):
+        """
+        تشخیص آفلاین و جریانی با Vosk (Kaldi)
+
+        Args:
+            model_path: پوشه مدل Vosk
+            sample_rate: نرخ نمونه‌برداری صدای ورودی
+        """
+        if not VOSK_AVAILABLE:
+            raise ImportError("vosk نصب نیست")
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"مدل Vosk پیدا نشد: {model_path}")
+        super().__init__(sample_rate)
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+        self._recognizer = KaldiRecognizer(self.model, sample_rate)
+        self._finals = []
+
+    def reset(self):
+        super().reset()
+        self._recognizer.Reset()
+        self._finals = []
+
+    def _text(self):
+        return " ".join(self._finals)
+
+    def _accept(self, chunk):
+        if self._recognizer.AcceptWaveform(bytes(chunk)):
+            # Vosk پایان یک جمله را تشخیص داده است
+            text = json.loads(self._recognizer.Result()).get("text", "")
+            if text:
+                self._finals.append(text)
+            return Hypothesis(self._text(), True, self.audio_time)
+        partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return Hypothesis(" ".join(self._finals + [partial]) if partial else self._text(), False, self.audio_time)
+
+    def _finish(self):
+        text = json.loads(self._recognizer.FinalResult()).get("text", "")
+        if text:
+            self._finals.append(text)
+        return self._text()
+
+
+class GoogleBackend(ASRBackend):
+    name = "google"
+
+    def __init__(self, language="fa-IR", sample_rate=16000):
+        """
+        تشخیص با Google Speech Recognition (غیر جریانی، نیاز به اینترنت)
+
+        Args:
+            language: زبان گفتار
+            sample_rate: نرخ نمونه‌برداری صدای ورودی
+        """
+        if not SPEECH_RECOGNITION_AVAILABLE:
+            raise ImportError("speech_recognition نصب نیست")
+        super().__init__(sample_rate)
+        self.language = language
+        self._recognizer = sr.Recognizer()
+        self._buffer = bytearray()
+
+    def reset(self):
+        super().reset()
+        self._buffer = bytearray()
+
+    def _accept(self, chunk):
+        self._buffer += chunk
+        return None
+
+    def _finish(self):
+        audio = sr.AudioData(bytes(self._buffer), self.sample_rate, 2)
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            print(f"خطا در تشخیص صدا: {e}")
+            return ""
+
+
+def create_asr_backend(name="auto", model_path=None, sample_rate=16000, language="fa-IR"):
+    """
+    ساخت موتور تشخیص گفتار
+
+    Args:
+        name: "vosk" (آفلاین)، "google" (آنلاین) یا "auto" (Vosk اگر نصب و مدل موجود باشد)
+        model_path: پوشه مدل Vosk (پیش‌فرض DEFAULT_VOSK_MODEL)
+    """
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"موتور تشخیص گفتار نامعتبر: {name}")
+    model_path = model_path or DEFAULT_VOSK_MODEL
+    if name == "vosk":
+        return VoskBackend(model_path, sample_rate)
+    if name == "google":
+        return GoogleBackend(language, sample_rate)
+
+    try:
+        return VoskBackend(model_path, sample_rate)
+    except Exception as e:
+        print(f"⚠️ تشخیص گفتار آفلاین در دسترس نیست ({e})؛ استفاده از Google")
+        return GoogleBackend(language, sample_rate)
+
+
+def read_wav(path, sample_rate=16000):
+    """
+    خواندن فایل WAV به صورت PCM شانزده بیتی تک کاناله با نرخ sample_rate
+
+    Returns:
+        bytes
+    """
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"فقط WAV شانزده بیتی پشتیبانی می‌شود: {path}")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate and len(samples):
+        # تغییر نرخ با درون‌یابی خطی (برای اندازه‌گیری کافی است)
+        duration = len(samples) / rate
+        target = np.arange(int(duration * sample_rate)) / sample_rate
+        samples = np.interp(target, np.arange(len(samples)) / rate, samples)
+    return np.asarray(samples).astype(np.int16).tobytes()
+
+
+def benchmark_wav(backend, path, chunk_ms=100):
+    """
+    اندازه‌گیری تشخیص یک فایل WAV با تکه‌های هم‌اندازه (مانند میکروفون)
+
+    Args:
+        backend: ASRBackend
+        path: مسیر فایل WAV
+        chunk_ms: طول هر تکه صدا (میلی‌ثانیه)
+
+    Returns:
+        دیکشنری شامل متن نهایی، طول صدا، زمان پردازش، real-time factor، زمان صدای
+        اولین فرضیه میانی و زمان صدایی که متن نهایی اولین بار در فرضیه‌ها دیده شد
+        (حداقل زمان ممکن برای اجرای زودهنگام دستور)
+    """
+    pcm = read_wav(path, backend.sample_rate)
+    chunk = int(backend.sample_rate * chunk_ms / 1000) * 2
+    hypotheses = []
+
+    backend.reset()
+    start = time.perf_counter()
+    for offset in range(0, len(pcm), chunk):
+        hypothesis = backend.accept(pcm[offset:offset + chunk])
+        if hypothesis is not None and hypothesis.text:
+            hypotheses.append(hypothesis)
+    final = backend.finish()
+    decode_seconds = time.perf_counter() - start
+
+    audio_seconds = len(pcm) / (2.0 * backend.sample_rate)
+    first_partial = hypotheses[0].audio_time if hypotheses else None
+    final_seen = next((h.audio_time for h in hypotheses if final.text and h.text == final.text), audio_seconds)
+    return {
+        "text": final.text,
+        "audio_seconds": audio_seconds,
+        "decode_seconds": decode_seconds,
+        "rtf": decode_seconds / audio_seconds if audio_seconds else 0.0,
+        "first_partial_s": first_partial,
+        "final_text_seen_s": final_seen if final.text else None,
+        "hypotheses": len(hypotheses),
+    }
+
+
+# اندازه‌گیری از خط فرمان
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="اندازه‌گیری موتور تشخیص گفتار روی فایل‌های WAV")
+    parser.add_argument("wav", nargs="+", help="فایل‌های WAV")
+    parser.add_argument("--backend", choices=ASR_BACKENDS, default="auto", help="موتور تشخیص گفتار")
+    parser.add_argument("--model", default=None, help="پوشه مدل Vosk")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="طول هر تکه صدا (میلی‌ثانیه)")
+    args = parser.parse_args()
+
+    asr = create_asr_backend(args.backend, args.model)
+    for wav_path in args.wav:
+        result = benchmark_wav(asr, wav_path, args.chunk_ms)
+        seen = result["final_text_seen_s"]
+        print(f"{wav_path}: {result['text']!r}")
+        print(f"  audio {result['audio_seconds']:.2f}s  decode {result['decode_seconds']:.2f}s  "
+              f"rtf {result['rtf']:.2f}  final text at {seen if seen is None else f'{seen:.2f}s'}")
+    print(asr.get_stats())
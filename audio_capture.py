@@ -0,0 +1,276 @@
+"""
+دریافت پیوسته صدای میکروفون در بافر حلقوی و جدا کردن گفته‌ها با تشخیص فعالیت صوتی مبتنی بر انرژی
+Continuous microphone capture into a ring buffer with energy-based voice activity detection
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# جریان صدای میکروفون
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+
+
+class AudioRingBuffer:
+    def __init__(self, seconds=10.0, sample_rate=16000):
+        """
+        بافر حلقوی نمونه‌های صدا برای یک نویسنده (callback میکروفون) و یک خواننده
+
+        نویسنده ابتدا داده را کپی و سپس شمارنده written را جلو می‌برد؛ خواننده فقط تا
+        written می‌خواند و موقعیت خودش را نگه می‌دارد، بنابراین مسیر داده قفل ندارد.
+        Event فقط برای بیدار کردن خواننده است.
+
+        Args:
+            seconds: طول تاریخچه نگهداری شده
+            sample_rate: نرخ نمونه‌برداری
+        """
+        self.sample_rate = sample_rate
+        self.capacity = int(seconds * sample_rate)
+        self._data = np.zeros(self.capacity, dtype=np.int16)
+        self.written = 0  # تعداد کل نمونه‌های نوشته شده
+        self._event = threading.Event()
+
+        # آمار
+        self.overruns = 0
+
+    @property
+    def oldest(self):
+        """موقعیت قدیمی‌ترین نمونه موجود"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, samples):
+        """افزودن نمونه‌ها (فقط از thread نویسنده)"""
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+        start = (self.written + n - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.written += n
+        self._event.set()
+
+    def read(self, position, count):
+        """
+        خواندن count نمونه از موقعیت position
+
+        Returns:
+            (نمونه‌ها، موقعیت واقعی شروع)؛ اگر داده خوانده نشده بازنویسی شده باشد از قدیمی‌ترین نمونه
+        """
+        if position < self.oldest:
+            self.overruns += 1
+            position = self.oldest
+        count = max(0, min(count, self.written - position))
+        start = position % self.capacity
+        first = min(count, self.capacity - start)
+        samples = np.concatenate((self._data[start:start + first], self._data[:count - first]))
+        return samples, position
+
+    def wait(self, position, timeout):
+        """انتظار تا وقتی داده‌ای بعد از position نوشته شود"""
+        if self.written > position:
+            return True
+        self._event.clear()
+        if self.written > position:
+            return True
+        return self._event.wait(timeout) and self.written > position
+
+
+class EnergyVAD:
+    def __init__(self, threshold=3.0, min_energy=200.0, noise_adapt=0.05):
+        """
+        تشخیص فعالیت صوتی با انرژی هر فریم نسبت به سطح نویز زمینه
+
+        سطح نویز در فریم‌های سکوت با میانگین متحرک نمایی به‌روز می‌شود، بنابراین
+        نیازی به تنظیم جداگانه نویز محیط (adjust_for_ambient_noise) نیست.
+
+        Args:
+            threshold: نسبت انرژی فریم به نویز برای گفتار
+            min_energy: حداقل انرژی (RMS) گفتار
+            noise_adapt: ضریب به‌روزرسانی سطح نویز
+        """
+        self.threshold = threshold
+        self.min_energy = min_energy
+        self.noise_adapt = noise_adapt
+        self.noise = None
+
+    def is_speech(self, frame):
+        samples = frame.astype(np.float32)
+        energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        if self.noise is None:
+            self.noise = energy
+        if energy > max(self.min_energy, self.noise * self.threshold):
+            return True
+        self.noise += self.noise_adapt * (energy - self.noise)
+        return False
+
+
+class UtteranceSegmenter:
+    def __init__(self, ring, vad=None, frame_ms=30, start_ms=90, end_ms=600, pre_roll_ms=300, max_ms=10000):
+        """
+        جدا کردن گفته‌ها از جریان پیوسته صدا
+
+        گفتار وقتی شروع می‌شود که start_ms فریم پشت سر هم گفتار باشد؛ گفته از pre_roll_ms
+        قبل از اولین فریم گفتار (از تاریخچه بافر) شروع و با end_ms سکوت تمام می‌شود.
+
+        Args:
+            ring: AudioRingBuffer
+            vad: EnergyVAD
+            frame_ms: طول هر فریم تحلیل
+            start_ms: طول گفتار لازم برای شروع گفته
+            end_ms: طول سکوت پایان گفته
+            pre_roll_ms: صدای قبل از شروع گفتار که به گفته اضافه می‌شود
+            max_ms: حداکثر طول گفته
+        """
+        self.ring = ring
+        self.vad = vad or EnergyVAD()
+        rate = ring.sample_rate
+        self.frame = int(rate * frame_ms / 1000)
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.pre_roll = int(rate * pre_roll_ms / 1000)
+        self.max_samples = int(rate * max_ms / 1000)
+        self.position = ring.written
+        self._in_speech = False
+
+        # آمار
+        self.utterances = 0
+        self.speech_seconds = 0.0
+
+    def _next_frame(self, timeout):
+        """فریم بعدی یا None اگر تا timeout داده کافی نرسید"""
+        deadline = time.monotonic() + timeout
+        while self.ring.written - self.position < self.frame:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.ring.wait(self.position + self.frame - 1, remaining)
+        frame, self.position = self.ring.read(self.position, self.frame)
+        self.position += len(frame)
+        return frame
+
+    def utterance(self, timeout=1.0):
+        """
+        گفته بعدی به صورت تکه‌های PCM شانزده بیتی (اولین تکه شامل pre-roll)
+
+        اگر تا timeout گفتاری شروع نشود، چیزی تولید نمی‌شود. اگر مصرف کننده زودتر متوقف
+        شود (مثلاً اجرای زودهنگام دستور)، باقیمانده همان گفته کنار گذاشته می‌شود.
+        """
+        deadline = time.monotonic() + timeout
+        if self._in_speech:
+            # باقیمانده گفته قبلی که مصرف نشده است
+            self._skip_speech()
+
+        run = 0
+        while True:
+            frame = self._next_frame(max(0.0, deadline - time.monotonic()))
+            if frame is None:
+                return
+            run = run + 1 if self.vad.is_speech(frame) else 0
+            if run >= self.start_frames:
+                break
+
+        start = max(self.position - run * self.frame - self.pre_roll, self.ring.oldest)
+        head, _ = self.ring.read(start, self.position - start)
+        self._in_speech = True
+        length = len(head)
+        yield head.tobytes()
+
+        silence = 0
+        while silence < self.end_frames and length < self.max_samples:
+            frame = self._next_frame(1.0)
+            if frame is None:
+                break
+            silence = 0 if self.vad.is_speech(frame) else silence + 1
+            length += len(frame)
+            yield frame.tobytes()
+
+        self._in_speech = False
+        self.utterances += 1
+        self.speech_seconds += length / self.ring.sample_rate
+
+    def _skip_speech(self):
+        silence = 0
+        while silence < self.end_frames:
+            frame = self._next_frame(1.0)
+            if frame is None:
+                break
+            silence = 0 if self.vad.is_speech(frame) else silence + 1
+        self._in_speech = False
+
+
+class AudioCapture:
+    def __init__(self, sample_rate=16000, buffer_seconds=10.0, device=None, **segmenter_options):
+        """
+        یک جریان دائمی میکروفون که در بافر حلقوی نوشته می‌شود
+
+        میکروفون یک بار باز می‌شود و تا stop باز می‌ماند؛ گفتاری که هنگام پردازش دستور
+        قبلی شروع شود از دست نمی‌رود.
+
+        Args:
+            sample_rate: نرخ نمونه‌برداری (همان نرخ موتور تشخیص گفتار)
+            buffer_seconds: طول بافر حلقوی
+            device: شماره دستگاه ورودی pyaudio (پیش‌فرض دستگاه پیش‌فرض سیستم)
+            segmenter_options: تنظیمات UtteranceSegmenter
+        """
+        self.sample_rate = sample_rate
+        self.device = device
+        self.ring = AudioRingBuffer(buffer_seconds, sample_rate)
+        self.segmenter = UtteranceSegmenter(self.ring, **segmenter_options)
+        self._audio = None
+        self._stream = None
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    def start(self):
+        """باز کردن جریان میکروفون"""
+        if self._stream is not None:
+            return
+        if not PYAUDIO_AVAILABLE:
+            raise ImportError("pyaudio نصب نیست")
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+                                        input_device_index=self.device, frames_per_buffer=self.segmenter.frame,
+                                        stream_callback=self._callback)
+        self._stream.start_stream()
+        # گفته‌ها از لحظه شروع جریان
+        self.segmenter.position = self.ring.written
+
+    def stop(self):
+        """بستن جریان میکروفون"""
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return None, pyaudio.paContinue
+
+    def feed(self, pcm):
+        """نوشتن مستقیم صدای PCM شانزده بیتی (مثلاً از فایل WAV به جای میکروفون)"""
+        self.ring.write(np.frombuffer(pcm, dtype=np.int16))
+
+    def utterance(self, timeout=1.0):
+        """گفته بعدی (UtteranceSegmenter.utterance را ببینید)"""
+        return self.segmenter.utterance(timeout)
+
+    def get_stats(self):
+        return {
+            "utterances": self.segmenter.utterances,
+            "speech_seconds": self.segmenter.speech_seconds,
+            "overruns": self.ring.overruns,
+            "noise_level": self.segmenter.vad.noise,
+        }
@@ -0,0 +1,100 @@
+"""
+تطبیق همزمان همه عبارت‌های دستورات در یک گذر روی متن با خودکاره Aho-Corasick
+Aho-Corasick multi-pattern command matcher preferring the longest match
+"""
+
+from collections import deque
+
+
+class CommandMatcher:
+    def __init__(self, phrases=()):
+        """
+        خودکاره Aho-Corasick روی حروف عبارت‌های دستورات
+
+        هزینه تطبیق به طول متن بستگی دارد نه تعداد دستورات. در هر گره طولانی‌ترین عبارتی
+        که به آن ختم می‌شود (از جمله از طریق پیوندهای شکست) از پیش محاسبه شده است.
+
+        Args:
+            phrases: عبارت‌ها (مثلاً کلیدهای دیکشنری دستورات)
+        """
+        self.phrases = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # طولانی‌ترین عبارتی که به هر گره ختم می‌شود
+        for phrase in phrases:
+            self._insert(phrase)
+        self._build()
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _insert(self, phrase):
+        if not phrase:
+            return
+        node = 0
+        for char in phrase:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            node = next_node
+        self._best[node] = phrase
+        self.phrases.append(phrase)
+
+    def _build(self):
+        # پیوندهای شکست به ترتیب سطح (BFS)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                if node == 0:
+                    continue
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or len(inherited) > len(self._best[child])):
+                    self._best[child] = inherited
+
+    def find_all(self, text):
+        """
+        همه عبارت‌های موجود در متن (در هر موقعیت فقط طولانی‌ترین عبارت ختم شده به آن)
+
+        Returns:
+            لیست (شروع، پایان، عبارت)
+        """
+        matches = []
+        node = 0
+        goto, fail, best = self._goto, self._fail, self._best
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            phrase = best[node]
+            if phrase is not None:
+                matches.append((end - len(phrase), end, phrase))
+        return matches
+
+    def match(self, text):
+        """
+        مشخص‌ترین (طولانی‌ترین) عبارت موجود در متن؛ در تساوی، عبارتی که زودتر تمام شده
+
+        Returns:
+            عبارت یا None
+        """
+        found = None
+        node = 0
+        goto, fail, best = self._goto, self._fail, self._best
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            phrase = best[node]
+            if phrase is not None and (found is None or len(phrase) > len(found)):
+                found = phrase
+        return found
@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Dict, List, Any
 import hashlib
 import base64
+from latency_stats import LatencyHistogram
 
 class CommercialFeatures:
     def __init__(self):
@@ -146,6 +147,7 @@ class Analytics:
         """سیستم آنالیتیکس"""
         self.events = []
         self.performance_metrics = {}
+        self.latency_histograms = {} # توزیع زمان هر عملیات با حافظه ثابت
         
     def log_event(self, event_type: str, data: Dict = None):
         """ثبت رویداد"""
@@ -172,9 +174,20 @@ class Analytics:
         if success:
             metrics["success_count"] += 1
         metrics["avg_time"] = metrics["total_time"] / metrics["count"]
+        
+        if operation not in self.latency_histograms:
+            self.latency_histograms[operation] = LatencyHistogram()
+        self.latency_histograms[operation].record(duration)
+    
+    def get_latency_percentiles(self, operation: str) -> Dict:
+        """صدک‌های p50/p95/p99 زمان یک عملیات (میلی‌ثانیه)"""
+        histogram = self.latency_histograms.get(operation)
+        return histogram.summary() if histogram else {}
     
     def get_analytics_report(self) -> Dict:
         """گزارش آنالیتیکس"""
+        for operation, metrics in self.performance_metrics.items():
+            metrics["latency"] = self.get_latency_percentiles(operation)
         return {
             "total_events": len(self.events),
             "performance_metrics": self.performance_metrics,
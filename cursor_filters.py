@@ -0,0 +1,265 @@
+"""
+فیلترهای هموارسازی مکان‌نما (قدیمی، One Euro و کالمن سرعت ثابت) با اندازه‌گیری تأخیر افزوده
+Pluggable cursor filters with online measurement of the lag they add
+"""
+
+import math
+
+
+class CursorFilter:
+    def __init__(self, max_gap=0.5, lag_smoothing=0.05, min_speed=100.0):
+        """
+        پایه فیلترهای مکان‌نما
+
+        تأخیر افزوده به صورت پیوسته تخمین زده می‌شود: فاصله خروجی تا ورودی در جهت
+        حرکت تقسیم بر سرعت ورودی، یعنی مقدار جابجایی زمانی‌ای که فیلتر در حرکت یکنواخت
+        ایجاد می‌کند. لرزش عمود بر جهت حرکت در این تخمین اثری ندارد.
+
+        Args:
+            max_gap: اگر فاصله دو نمونه بیشتر از این (ثانیه) باشد، فیلتر از نقطه جدید شروع می‌شود
+            lag_smoothing: ضریب میانگین متحرک نمایی تخمین تأخیر
+            min_speed: حداقل سرعت ورودی (پیکسل بر ثانیه) برای به‌روزرسانی تخمین تأخیر
+        """
+        self.max_gap = max_gap
+        self.lag_smoothing = lag_smoothing
+        self.min_speed = min_speed
+        self.last_time = None
+        self._last_raw = None
+        self._vx = self._vy = 0.0
+        self._lag_num = 0.0
+        self._lag_den = 0.0
+
+    def reset(self):
+        """شروع دوباره از نمونه بعدی"""
+        self.last_time = None
+        self._last_raw = None
+        self._reset_state()
+
+    def _reset_state(self):
+        raise NotImplementedError
+
+    def _start(self, x, y):
+        """شروع از نقطه (x, y)؛ خروجی اولین نمونه را برمی‌گرداند"""
+        raise NotImplementedError
+
+    def _step(self, x, y, dt):
+        raise NotImplementedError
+
+    def filter(self, x, y, timestamp):
+        """
+        هموارسازی یک نمونه
+
+        Args:
+            x, y: مکان خام (پیکسل صفحه)
+            timestamp: زمان نمونه (ثانیه)
+
+        Returns:
+            (x, y) هموار شده
+        """
+        x, y = float(x), float(y)
+        dt = timestamp - self.last_time if self.last_time is not None else None
+        if dt is None or dt > self.max_gap or dt <= 0:
+            if dt is not None and dt <= 0 and self._last_raw is not None:
+                # نمونه تکراری با همان زمان: خروجی قبلی
+                return self._output()
+            out = self._start(x, y)
+        else:
+            out = self._step(x, y, dt)
+            self._update_lag(x, y, out, dt)
+        self.last_time = timestamp
+        self._last_raw = (x, y)
+        return out
+
+    def _output(self):
+        raise NotImplementedError
+
+    def _update_lag(self, x, y, out, dt):
+        # سرعت ورودی کمی هموار می‌شود تا لرزش نقطه ثابت به عنوان حرکت حساب نشود
+        self._vx += 0.3 * ((x - self._last_raw[0]) / dt - self._vx)
+        self._vy += 0.3 * ((y - self._last_raw[1]) / dt - self._vy)
+        vx, vy = self._vx, self._vy
+        speed_sq = vx * vx + vy * vy
+        if speed_sq < self.min_speed * self.min_speed:
+            return
+        # جابجایی خروجی نسبت به ورودی در جهت حرکت (مثبت یعنی عقب‌تر از ورودی)
+        along = (x - out[0]) * vx + (y - out[1]) * vy
+        a = self.lag_smoothing
+        self._lag_num += a * (along - self._lag_num)
+        self._lag_den += a * (speed_sq - self._lag_den)
+
+    @property
+    def added_latency(self):
+        """تخمین تأخیر افزوده فیلتر (ثانیه)"""
+        return self._lag_num / self._lag_den if self._lag_den > 0 else 0.0
+
+    def get_stats(self):
+        return {"filter": self.name, "added_latency_ms": self.added_latency * 1000}
+
+
+class LegacyFilter(CursorFilter):
+    name = "legacy"
+
+    def __init__(self, smoothening=5, **kwargs):
+        """
+        هموارسازی قبلی برنامه: هر فریم یک پنجم فاصله تا هدف (مستقل از زمان)
+
+        Args:
+            smoothening: مخرج گام هموارسازی
+        """
+        super().__init__(**kwargs)
+        self.smoothening = smoothening
+        # مانند قبل، حرکت از گوشه صفحه شروع می‌شود
+        self.px, self.py = 0.0, 0.0
+
+    def _reset_state(self):
+        pass
+
+    def _start(self, x, y):
+        # رفتار قبلی: حتی پس از مکث، از مکان قبلی به سمت هدف حرکت می‌کند
+        return self._step(x, y, None)
+
+    def _step(self, x, y, dt):
+        self.px += (x - self.px) / self.smoothening
+        self.py += (y - self.py) / self.smoothening
+        return self.px, self.py
+
+    def _output(self):
+        return self.px, self.py
+
+
+class _LowPass:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = None
+
+    def apply(self, x, alpha):
+        self.value = x if self.value is None else self.value + alpha * (x - self.value)
+        return self.value
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter(CursorFilter):
+    name = "one_euro"
+
+    def __init__(self, min_cutoff=0.5, beta=0.02, d_cutoff=1.0, **kwargs):
+        """
+        فیلتر One Euro (Casiez و همکاران، 2012): فرکانس قطع با سرعت حرکت زیاد می‌شود؛
+        در حرکت آهسته لرزش حذف و در حرکت سریع تأخیر کم می‌شود
+
+        Args:
+            min_cutoff: فرکانس قطع در حالت سکون (هرتز)؛ کمتر = لرزش کمتر
+            beta: ضریب افزایش فرکانس قطع با سرعت (بر پیکسل)؛ بیشتر = تأخیر کمتر در حرکت سریع
+            d_cutoff: فرکانس قطع تخمین سرعت (هرتز)
+        """
+        super().__init__(**kwargs)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._reset_state()
+
+    def _reset_state(self):
+        self._x, self._y = _LowPass(), _LowPass()
+        self._dx, self._dy = _LowPass(), _LowPass()
+        self._raw = None
+
+    def _start(self, x, y):
+        self._reset_state()
+        self._x.apply(x, 1.0)
+        self._y.apply(y, 1.0)
+        self._dx.apply(0.0, 1.0)
+        self._dy.apply(0.0, 1.0)
+        self._raw = (x, y)
+        return x, y
+
+    def _step(self, x, y, dt):
+        a_d = _alpha(self.d_cutoff, dt)
+        dx = self._dx.apply((x - self._raw[0]) / dt, a_d)
+        dy = self._dy.apply((y - self._raw[1]) / dt, a_d)
+        # فرکانس قطع مشترک برای هر دو محور بر اساس سرعت کل (مسیر بدون اعوجاج)
+        cutoff = self.min_cutoff + self.beta * math.hypot(dx, dy)
+        a = _alpha(cutoff, dt)
+        self._raw = (x, y)
+        return self._x.apply(x, a), self._y.apply(y, a)
+
+    def _output(self):
+        return self._x.value, self._y.value
+
+
+class KalmanFilter(CursorFilter):
+    name = "kalman"
+
+    def __init__(self, process_noise=5e4, measurement_noise=50.0, **kwargs):
+        """
+        فیلتر کالمن با مدل سرعت ثابت (حالت: مکان و سرعت هر محور، محورها مستقل)
+
+        Args:
+            process_noise: چگالی طیفی شتاب تصادفی ((پیکسل/ثانیه²)² ثانیه)؛ بیشتر = پاسخ سریع‌تر
+            measurement_noise: واریانس خطای اندازه‌گیری مکان (پیکسل²)؛ بیشتر = هموارتر
+        """
+        super().__init__(**kwargs)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self._reset_state()
+
+    def _reset_state(self):
+        # برای هر محور: [مکان، سرعت، P00، P01، P11]
+        self._axes = None
+
+    def _start(self, x, y):
+        r = self.measurement_noise
+        self._axes = [[x, 0.0, r, 0.0, 1e6], [y, 0.0, r, 0.0, 1e6]]
+        return x, y
+
+    def _step(self, x, y, dt):
+        q = self.process_noise
+        r = self.measurement_noise
+        dt2 = dt * dt
+        q00, q01, q11 = q * dt2 * dt / 3, q * dt2 / 2, q * dt
+        out = []
+        for axis, z in zip(self._axes, (x, y)):
+            p, v, p00, p01, p11 = axis
+            # پیش‌بینی
+            p += v * dt
+            p00 += dt * (2 * p01 + dt * p11) + q00
+            p01 += dt * p11 + q01
+            p11 += q11
+            # تصحیح با اندازه‌گیری مکان
+            s = p00 + r
+            k0, k1 = p00 / s, p01 / s
+            innovation = z - p
+            p += k0 * innovation
+            v += k1 * innovation
+            p11 -= k1 * p01
+            p01 -= k0 * p01
+            p00 -= k0 * p00
+            axis[:] = p, v, p00, p01, p11
+            out.append(p)
+        return out[0], out[1]
+
+    def _output(self):
+        return self._axes[0][0], self._axes[1][0]
+
+
+CURSOR_FILTERS = {
+    "legacy": LegacyFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def create_cursor_filter(name="one_euro", **params):
+    """
+    ساخت فیلتر مکان‌نما
+
+    Args:
+        name: "legacy"، "one_euro" یا "kalman"
+        params: پارامترهای فیلتر (مثلاً min_cutoff و beta برای one_euro)
+    """
+    if name not in CURSOR_FILTERS:
+        raise ValueError(f"فیلتر مکان‌نمای نامعتبر: {name}")
+    return CURSOR_FILTERS[name](**params)
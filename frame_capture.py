@@ -0,0 +1,153 @@
+"""
+مرحله دریافت تصویر در thread جداگانه با بافر تک‌خانه‌ای
+Threaded capture stage with a single-slot "latest frame wins" buffer
+"""
+
+import threading
+import time
+
+
+class CapturedFrame:
+    """فریم دریافت شده به همراه شماره ترتیبی و زمان دریافت"""
+    __slots__ = ("seq", "timestamp", "image")
+
+    def __init__(self, seq, timestamp, image):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+
+
+class LatestFrameSlot:
+    """بافر تک‌خانه‌ای: هر فریم جدید جایگزین فریم خوانده نشده قبلی می‌شود"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._closed = False
+        self.overwritten = 0
+
+    def put(self, frame):
+        """قرار دادن فریم جدید در بافر"""
+        with self._cond:
+            if self._frame is not None:
+                self.overwritten += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """برداشتن تازه‌ترین فریم؛ در صورت خالی بودن تا پایان مهلت صبر می‌کند"""
+        with self._cond:
+            if self._frame is None and not self._closed:
+                self._cond.wait(timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        """بیدار کردن مصرف‌کننده‌های منتظر هنگام توقف"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """آماده‌سازی مجدد بافر برای شروع دوباره"""
+        with self._cond:
+            self._closed = False
+            self._frame = None
+
+
+class FrameGrabber:
+    def __init__(self, cap):
+        """
+        خواندن پیوسته از دوربین در thread جداگانه
+
+        Args:
+            cap: شیء دارای متد read() مانند cv2.VideoCapture یا FrameSource.
+                 منابع غیر زنده (is_live=False) بدون thread و بدون حذف فریم خوانده می‌شوند
+        """
+        self.cap = cap
+        self.is_live = getattr(cap, "is_live", True)
+        self.slot = LatestFrameSlot()
+        self._thread = None
+        self._running = False
+        self._seq = 0
+        self.exhausted = False
+
+        # آمار مصرف‌کننده
+        self.last_seq = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+
+    def start(self):
+        """شروع thread دریافت تصویر"""
+        if self._running:
+            return
+        self._running = True
+        if not self.is_live:
+            return
+        self.slot.reopen()
+        self._thread = threading.Thread(target=self._capture_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """توقف thread دریافت تصویر"""
+        self._running = False
+        self.slot.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _capture_loop(self):
+        """حلقه دریافت: فقط می‌خواند و در بافر می‌گذارد"""
+        while self._running:
+            success, image = self.cap.read()
+            if not success:
+                self.read_failures += 1
+                if getattr(self.cap, "exhausted", False):
+                    # منبع زنده تمام شده (مثلاً SyntheticSource با num_frames)؛ read پس از آخرین فریم None می‌دهد
+                    self.exhausted = True
+                    self.slot.close()
+                    return
+                time.sleep(0.005)
+                continue
+            self._seq += 1
+            self.slot.put(CapturedFrame(self._seq, time.time(), image))
+
+    def read(self, timeout=1.0):
+        """
+        دریافت تازه‌ترین فریم و شمارش فریم‌های از دست رفته
+
+        Returns:
+            CapturedFrame یا None در صورت پایان مهلت یا پایان منبع
+        """
+        if self.is_live:
+            frame = self.slot.take(timeout)
+        else:
+            frame = self._read_direct()
+        if frame is None:
+            return None
+        if self.last_seq:
+            self.frames_dropped += frame.seq - self.last_seq - 1
+        self.last_seq = frame.seq
+        self.frames_consumed += 1
+        return frame
+
+    def _read_direct(self):
+        """خواندن همگام از منبع ضبط شده با حداکثر سرعت"""
+        success, image = self.cap.read()
+        if not success:
+            self.read_failures += 1
+            self.exhausted = getattr(self.cap, "exhausted", False)
+            return None
+        self._seq += 1
+        return CapturedFrame(self._seq, time.time(), image)
+
+    def get_stats(self):
+        """آمار دریافت تصویر"""
+        return {
+            "captured": self._seq,
+            "consumed": self.frames_consumed,
+            "dropped": self.frames_dropped,
+            "read_failures": self.read_failures,
+        }
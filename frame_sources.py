@@ -0,0 +1,223 @@
+"""
+منابع تصویر قابل تعویض: دوربین زنده، فایل ویدیو، پوشه تصاویر و تولید مصنوعی
+Pluggable frame sources: live camera, video file, image sequence and synthetic generator
+"""
+
+import os
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+class FrameSource:
+    """رابط پایه منبع تصویر (سازگار با cv2.VideoCapture)"""
+
+    # منابع زنده با سرعت خودشان فریم تولید می‌کنند و فریم‌های کهنه دور ریخته می‌شوند؛
+    # منابع ضبط شده با حداکثر سرعت و بدون از دست رفتن فریم خوانده می‌شوند
+    is_live = False
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.exhausted = False
+
+    @property
+    def size(self):
+        """ابعاد فریم‌های خروجی (عرض، ارتفاع)"""
+        return self.width, self.height
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        """خواندن فریم بعدی به شکل (success, image) مانند cv2.VideoCapture"""
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    is_live = True
+
+    def __init__(self, camera_ids=(1, 2), fallback_id=0, width=1280, height=720):
+        """
+        دوربین زنده
+
+        Args:
+            camera_ids: شناسه دوربین‌هایی که به ترتیب امتحان می‌شوند
+            fallback_id: دوربین پیش‌فرض در صورت باز نشدن بقیه
+            width, height: رزولوشن درخواستی
+        """
+        # تلاش برای باز کردن دوربین‌های مختلف
+        for camera_id in camera_ids:
+            self.cap = cv2.VideoCapture(camera_id)
+            if self.cap.isOpened():
+                print(f"دوربین {camera_id} با موفقیت باز شد")
+                break
+        else:
+            print("هیچ دوربینی پیدا نشد!")
+            self.cap = cv2.VideoCapture(fallback_id)  # fallback به دوربین پیش‌فرض
+
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+        # ابعاد واقعی ممکن است با ابعاد درخواستی متفاوت باشد
+        actual_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or width
+        actual_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or height
+        super().__init__(actual_w, actual_h)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, loop=False):
+        """
+        پخش مجدد جلسه ضبط شده از فایل ویدیو
+
+        Args:
+            path: مسیر فایل ویدیو
+            loop: پخش تکراری پس از رسیدن به انتهای فایل
+        """
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"فایل ویدیو باز نشد: {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        super().__init__(int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                         int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        success, image = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, image = self.cap.read()
+        if not success:
+            self.exhausted = True
+        return success, image
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(FrameSource):
+    def __init__(self, directory, loop=False):
+        """
+        پخش مجدد پوشه‌ای از فریم‌های PNG/JPEG به ترتیب نام فایل
+
+        Args:
+            directory: مسیر پوشه تصاویر
+            loop: پخش تکراری پس از آخرین تصویر
+        """
+        self.directory = directory
+        self.loop = loop
+        self.files = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise IOError(f"هیچ تصویری در پوشه پیدا نشد: {directory}")
+        self.index = 0
+
+        first = cv2.imread(self.files[0])
+        if first is None:
+            raise IOError(f"خطا در خواندن تصویر: {self.files[0]}")
+        super().__init__(first.shape[1], first.shape[0])
+
+    def read(self):
+        if self.index >= len(self.files):
+            if not self.loop:
+                self.exhausted = True
+                return False, None
+            self.index = 0
+
+        image = cv2.imread(self.files[self.index])
+        self.index += 1
+        return image is not None, image
+
+
+class SyntheticSource(FrameSource):
+    def __init__(self, width=1280, height=720, num_frames=None, fps=None):
+        """
+        تولید فریم‌های مصنوعی در حافظه برای اندازه‌گیری گذردهی
+
+        Args:
+            width, height: ابعاد فریم
+            num_frames: تعداد کل فریم‌ها (None یعنی نامحدود)
+            fps: در صورت تعیین، سرعت دوربین شبیه‌سازی می‌شود
+        """
+        super().__init__(width, height)
+        self.num_frames = num_frames
+        self.fps = fps
+        self.is_live = fps is not None
+        self.frame_index = 0
+        self._next_time = time.time()
+
+        # پس‌زمینه ثابت یک بار ساخته می‌شود
+        self.background = np.full((height, width, 3), 40, np.uint8)
+
+    def read(self):
+        if self.num_frames is not None and self.frame_index >= self.num_frames:
+            self.exhausted = True
+            return False, None
+
+        if self.fps:
+            self._next_time += 1.0 / self.fps
+            delay = self._next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        # یک دایره به رنگ پوست که روی مسیر دایره‌ای حرکت می‌کند
+        image = self.background.copy()
+        angle = self.frame_index * 0.05
+        cx = int(self.width / 2 + np.cos(angle) * self.width / 4)
+        cy = int(self.height / 2 + np.sin(angle) * self.height / 4)
+        cv2.circle(image, (cx, cy), min(self.width, self.height) // 8, (120, 160, 220), cv2.FILLED)
+
+        self.frame_index += 1
+        return True, image
+
+
+def open_frame_source(spec=None, width=1280, height=720):
+    """
+    ساخت منبع تصویر از روی مشخصات
+
+    Args:
+        spec: None یا "camera" برای دوربین پیش‌فرض، شماره دوربین،
+              "synthetic" یا "synthetic:N"، مسیر پوشه تصاویر یا مسیر فایل ویدیو
+              (یا یک FrameSource آماده)
+        width, height: رزولوشن درخواستی برای دوربین و منبع مصنوعی
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+
+    if spec is None or spec == "camera":
+        return CameraSource(width=width, height=height)
+
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(camera_ids=[int(spec)], fallback_id=int(spec), width=width, height=height)
+
+    if spec.startswith("synthetic"):
+        _, _, count = spec.partition(":")
+        return SyntheticSource(width, height, num_frames=int(count) if count else None)
+
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec)
+
+    if os.path.isfile(spec):
+        return VideoFileSource(spec)
+
+    raise ValueError(f"منبع تصویر نامعتبر: {spec}")
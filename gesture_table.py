@@ -0,0 +1,183 @@
+"""
+جدول اعلانی ژست‌ها که به یک جدول جستجو روی کد 5 بیتی وضعیت انگشتان کامپایل می‌شود
+Declarative gesture table compiled to a lookup on the 5-bit finger-state code
+"""
+
+from collections import Counter
+
+# حالت‌هایی که با کف دست باز (دست چپ) به IDLE برمی‌گردند
+ACTIVE_MODES = ("MOUSE_CONTROL", "SYSTEM_CONTROL", "KEYBOARD_MODE")
+
+# متن وضعیت رابط کاربری برای هر حالت
+MODE_LABELS = {
+    "IDLE": "IDLE",
+    "MOUSE_CONTROL": "Mouse Control",
+    "SYSTEM_CONTROL": "System Control",
+    "KEYBOARD_MODE": "Keyboard Mode",
+}
+
+
+def pattern_codes(pattern):
+    """
+    کدهای 5 بیتی منطبق با یک الگو
+
+    Args:
+        pattern: رشته 5 حرفی به ترتیب شست، اشاره، میانی، حلقه، کوچک؛
+                 "1" باز، "0" بسته و "?" هر دو (مثلاً "?10??" یعنی اشاره باز و میانی بسته)
+
+    Returns:
+        مجموعه کدها (شست = بیت 0، مانند finger_code در hand_features)
+    """
+    if len(pattern) != 5 or set(pattern) - set("01?"):
+        raise ValueError(f"الگوی انگشتان نامعتبر: {pattern}")
+    codes = [0]
+    for bit, char in enumerate(pattern):
+        if char == "1":
+            codes = [code | 1 << bit for code in codes]
+        elif char == "?":
+            codes = codes + [code | 1 << bit for code in codes]
+    return set(codes)
+
+
+class Gesture:
+    def __init__(self, name, hand, fingers, action, args=(), exclude=(), states=None,
+                 distance=None, settle=0.0, alone=False):
+        """
+        تعریف یک ژست
+
+        Args:
+            name: نام ژست (برای آمار)
+            hand: "left" یا "right"
+            fingers: الگو یا لیست الگوهای وضعیت انگشتان (pattern_codes را ببینید)
+            action: نام متد کنترلر که با (image, hand_landmarks, features, *args) صدا زده می‌شود
+            args: آرگومان‌های اضافه action
+            exclude: الگوهایی که از fingers کم می‌شوند
+            states: حالت‌هایی که ژست در آن‌ها فعال است (None = همه حالت‌ها)
+            distance: شرط فاصله (نام ویژگی، نام آستانه کالیبره شده، ضریب)؛ ویژگی < آستانه × ضریب
+            settle: حداقل زمان از آخرین تغییر حالت (ثانیه)
+            alone: فقط وقتی دست دیگر دیده نمی‌شود
+        """
+        self.name = name
+        self.hand = hand
+        self.action = action
+        self.args = tuple(args)
+        self.states = tuple(states) if states is not None else None
+        self.distance = distance
+        self.settle = settle
+        self.alone = alone
+
+        patterns = (fingers,) if isinstance(fingers, str) else fingers
+        self.codes = set().union(*(pattern_codes(p) for p in patterns))
+        for pattern in ((exclude,) if isinstance(exclude, str) else exclude):
+            self.codes -= pattern_codes(pattern)
+
+    def __repr__(self):
+        return f"Gesture({self.name!r}, {self.hand!r})"
+
+
+def default_gestures(mouse_settle=0.5, dynamic=True):
+    """
+    ژست‌های برنامه به ترتیب اجرا
+
+    Args:
+        mouse_settle: تأخیر ژست‌های ماوس پس از تغییر حالت (جلوگیری از تداخل با ژست‌های پیشرفته)
+        dynamic: ژست‌های پویای دست راست (اسکرول، کشیدن سریع و دایره) - temporal_gestures را ببینید
+    """
+    gestures = []
+    if dynamic:
+        # تنها انگشت اشاره و میانی باز؛ در همه حالت‌ها و فقط با یک دست
+        gestures.append(Gesture("scroll", "right", "01100", "scroll_gesture", alone=True))
+        # کشیدن سریع افقی با دست باز: صفحه قبل/بعد
+        gestures.append(Gesture("swipe", "right", "?1111", "swipe_gesture", states=("IDLE", "MOUSE_CONTROL"),
+                                alone=True))
+        # رسم دایره با انگشت اشاره در حالت IDLE: آهنگ بعد/قبل
+        gestures.append(Gesture("circle", "right", "01000", "circle_gesture", states=("IDLE",), alone=True))
+
+    mouse = ("MOUSE_CONTROL",)
+    gestures += [
+        # دست راست در حالت ماوس
+        Gesture("mouse_move", "right", "?10??", "mouse_move", states=mouse, settle=mouse_settle),
+        Gesture("left_click", "right", "?11??", "mouse_click", args=("left",), states=mouse, settle=mouse_settle,
+                distance=("index_middle_dist", "CLICK_DISTANCE", 1.0)),
+        # نیشگون شست و اشاره: ضربه = کلیک راست، نیشگون و حرکت = کشیدن و رها کردن
+        Gesture("pinch", "right", "?????", "pinch_gesture", states=mouse, settle=mouse_settle),
+        Gesture("drag_start", "right", "00000", "drag", args=(True,), states=mouse, settle=mouse_settle),
+        Gesture("drag_end", "right", "?????", "drag", args=(False,), exclude=("00000", "?10??"),
+                states=mouse, settle=mouse_settle),
+
+        # دست چپ: تغییر حالت
+        Gesture("mode_idle", "left", "11111", "set_mode", args=("IDLE",), states=ACTIVE_MODES, settle=1.0),
+        Gesture("mode_mouse", "left", "01000", "set_mode", args=("MOUSE_CONTROL",), states=("IDLE",), settle=1.0),
+        Gesture("mode_system", "left", "01100", "set_mode", args=("SYSTEM_CONTROL",), states=("IDLE",), settle=1.0),
+        Gesture("mode_keyboard", "left", "01110", "set_mode", args=("KEYBOARD_MODE",), states=("IDLE",), settle=1.0),
+    ]
+    return gestures
+
+
+class GestureTable:
+    def __init__(self, gestures):
+        """
+        کامپایل ژست‌ها به جدول (دست، حالت) -> 32 خانه برای هر کد انگشتان
+
+        در هر فریم برای هر دست فقط یک جستجو انجام می‌شود و تنها ژست‌های همان خانه
+        (معمولاً یک یا دو ژست) بررسی می‌شوند؛ افزودن ژست جدید شاخه‌ای به حلقه اضافه نمی‌کند.
+
+        Args:
+            gestures: لیست Gesture به ترتیب اجرا
+        """
+        self.gestures = list(gestures)
+        states = {state for gesture in self.gestures for state in (gesture.states or ())}
+        self._lookup = {}
+        for hand in {gesture.hand for gesture in self.gestures}:
+            for state in states | {None}:
+                self._lookup[hand, state] = [
+                    tuple(g for g in self.gestures
+                          if g.hand == hand and code in g.codes
+                          and (g.states is None or state in g.states))
+                    for code in range(32)
+                ]
+
+        # آمار
+        self.fired = Counter()
+
+    def candidates(self, hand, state, finger_code):
+        """ژست‌های ممکن برای یک دست، حالت و کد انگشتان (بدون شرط‌های فاصله و زمان)"""
+        table = self._lookup.get((hand, state)) or self._lookup.get((hand, None))
+        return table[finger_code] if table else ()
+
+    def dispatch(self, controller, image, hand, hand_landmarks, features, alone=True):
+        """
+        اجرای ژست‌های منطبق یک دست در یک گذر
+
+        شرط‌های زمان در لحظه اجرا بررسی می‌شوند، بنابراین ژستی که حالت را تغییر می‌دهد
+        (مثلاً اسکرول) ژست‌های بعدی همان فریم را متوقف می‌کند.
+
+        Args:
+            controller: کنترلر دارای state، frame_time، last_state_change_time، calibrated_thresholds و متدهای action
+            image: تصویر برای رسم (یا None)
+            hand: "left" یا "right"
+            hand_landmarks: نقاط دست
+            features: ویژگی‌های دست (خروجی hand_features)
+            alone: آیا دست دیگر دیده نمی‌شود
+
+        Returns:
+            تعداد ژست‌های اجرا شده
+        """
+        fired = 0
+        thresholds = controller.calibrated_thresholds
+        for gesture in self.candidates(hand, controller.state, features["finger_code"]):
+            if gesture.alone and not alone:
+                continue
+            if gesture.distance is not None:
+                feature, threshold, scale = gesture.distance
+                if not features[feature] < thresholds[threshold] * scale:
+                    continue
+            if gesture.settle and not controller.frame_time - controller.last_state_change_time > gesture.settle:
+                continue
+            if gesture.states is not None and controller.state not in gesture.states:
+                # حالت توسط ژست قبلی همین فریم تغییر کرده است
+                continue
+            getattr(controller, gesture.action)(image, hand_landmarks, features, *gesture.args)
+            self.fired[gesture.name] += 1
+            fired += 1
+        return fired
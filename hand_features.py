@@ -0,0 +1,132 @@
+"""
+محاسبه برداری وضعیت انگشتان، فواصل بین نوک انگشتان و ویژگی‌های هندسی دست
+Vectorized finger-state kernel, per-frame cache and frame-to-frame hand geometry tracking
+"""
+
+import numpy as np
+
+from hand_landmarks import FINGER_TIPS
+
+FINGER_TIP_INDEX = np.array(FINGER_TIPS)
+
+# نقطه مرجع هر انگشت: شست با نقطه 3 در محور x و بقیه با مفصل میانی در محور y مقایسه می‌شوند
+FINGER_REF_INDEX = FINGER_TIP_INDEX - np.array([1, 2, 2, 2, 2])
+
+# وزن بیت‌ها برای ساخت کد 5 بیتی وضعیت انگشتان (شست = بیت 0)
+FINGER_CODE_WEIGHTS = np.array([1, 2, 4, 8, 16])
+
+WRIST, MIDDLE_MCP = 0, 9
+INDEX_TIP = FINGER_TIPS[1]
+
+
+def compute_hand_features(points, hand_type):
+    """
+    محاسبه همه ویژگی‌های انگشتان یک دست در یک گذر NumPy
+
+    Args:
+        points: آرایه (21, 3) نقاط دست در فضای پیکسل
+        hand_type: "right" یا "left" (برای جهت شست)
+
+    Returns:
+        دیکشنری شامل finger_states، finger_code، tip_distances (5x5)،
+        hand_scale، thumb_index_dist و index_middle_dist
+    """
+    tips = points[FINGER_TIP_INDEX, :2]
+    refs = points[FINGER_REF_INDEX, :2]
+
+    # انگشت باز: نوک بالاتر از مفصل (y کمتر)؛ شست بر اساس جهت دست در محور x
+    extended = tips[:, 1] < refs[:, 1]
+    if hand_type.lower() == 'right':
+        extended[0] = tips[0, 0] > refs[0, 0]
+    else:
+        extended[0] = tips[0, 0] < refs[0, 0]
+
+    # ماتریس فاصله همه نوک انگشتان نسبت به هم
+    diff = tips[:, None, :] - tips[None, :, :]
+    tip_distances = np.sqrt((diff * diff).sum(axis=2))
+
+    # اندازه دست: فاصله مچ تا مفصل پایه انگشت میانی
+    palm = points[MIDDLE_MCP, :2] - points[WRIST, :2]
+
+    return {
+        "finger_states": extended.astype(int).tolist(),
+        "finger_code": int(extended @ FINGER_CODE_WEIGHTS),
+        "tip_distances": tip_distances,
+        "hand_scale": float(np.sqrt(palm @ palm)),
+        "thumb_index_dist": float(tip_distances[0, 1]),
+        "index_middle_dist": float(tip_distances[1, 2]),
+    }
+
+
+class HandFeatureCache:
+    def __init__(self):
+        """کش ویژگی‌های انگشتان برای هر فریم و هر دست"""
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def new_frame(self):
+        """پاک کردن کش در ابتدای هر فریم"""
+        self._cache.clear()
+
+    def get(self, points, hand_type):
+        """ویژگی‌های دست؛ فراخوانی‌های تکراری در همان فریم هزینه‌ای ندارند"""
+        key = (id(points), hand_type.lower())
+        features = self._cache.get(key)
+        if features is None:
+            self.misses += 1
+            features = compute_hand_features(points, hand_type)
+            self._cache[key] = features
+        else:
+            self.hits += 1
+        return features
+
+
+class HandGeometry:
+    """ویژگی‌های هندسی یک دست در یک فریم"""
+    __slots__ = ("timestamp", "centroid", "bbox", "palm_size", "index_tip", "velocity")
+
+    def __init__(self, points, timestamp, previous=None):
+        xy = points[:, :2]
+        x0, y0 = xy.min(axis=0).tolist()
+        x1, y1 = xy.max(axis=0).tolist()
+        palm = xy[MIDDLE_MCP] - xy[WRIST]
+
+        self.timestamp = timestamp
+        self.centroid = tuple(xy.mean(axis=0).tolist())
+        self.bbox = (x0, y0, x1, y1)
+        self.palm_size = float(np.sqrt(palm @ palm))
+        self.index_tip = tuple(xy[INDEX_TIP].tolist())
+
+        # سرعت مرکز دست (پیکسل بر ثانیه) نسبت به فریم قبلی
+        self.velocity = (0.0, 0.0)
+        if previous is not None and timestamp > previous.timestamp:
+            dt = timestamp - previous.timestamp
+            self.velocity = ((self.centroid[0] - previous.centroid[0]) / dt,
+                             (self.centroid[1] - previous.centroid[1]) / dt)
+
+
+class HandFeatureTracker:
+    def __init__(self):
+        """
+        نگهداری ویژگی‌های هندسی هر دست از فریمی به فریم بعد
+
+        ویژگی‌های هر فریم فقط یک بار محاسبه می‌شوند و در فریم بعد به عنوان
+        مقدار قبلی استفاده می‌شوند، بنابراین مقایسه‌ها فقط خواندن مقادیر ذخیره شده است.
+        """
+        self.current = {'left': None, 'right': None}
+        self.previous = {'left': None, 'right': None}
+
+    def update(self, left_points, right_points, timestamp):
+        """به‌روزرسانی با نقاط دست‌های فریم جاری (None برای دست دیده نشده)"""
+        for side, points in (('left', left_points), ('right', right_points)):
+            self.previous[side] = self.current[side]
+            if points is None:
+                self.current[side] = None
+            else:
+                self.current[side] = HandGeometry(points, timestamp, self.previous[side])
+
+    def reset(self):
+        """پاک کردن تاریخچه"""
+        self.current = {'left': None, 'right': None}
+        self.previous = {'left': None, 'right': None}
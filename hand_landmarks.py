@@ -0,0 +1,79 @@
+"""
+نمایش نقاط دست به صورت آرایه NumPy در فضای پیکسل
+NumPy-backed hand landmark representation in pixel space
+"""
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# شماره نقاط مهم MediaPipe
+THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP = 4, 8, 12, 16, 20
+FINGER_TIPS = (THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP)
+
+
+class HandLandmarkArrays:
+    def __init__(self, width, height):
+        """
+        بافرهای از پیش تخصیص یافته (21, 3) float32 برای هر دست
+
+        برای هر دست دو بافر به صورت نوبتی پر می‌شود، بنابراین آرایه فریم قبلی
+        تا پر شدن فریم بعدی همان دست معتبر باقی می‌ماند و نیازی به کپی نیست.
+
+        Args:
+            width, height: ابعاد فریم برای تبدیل مختصات نرمال شده به پیکسل
+        """
+        self.scale = np.empty(3, np.float32)
+        self.offset = np.zeros(3, np.float32)
+        self.set_frame_size(width, height)
+        self.buffers = {
+            "Left": np.zeros((2, NUM_LANDMARKS, 3), np.float32),
+            "Right": np.zeros((2, NUM_LANDMARKS, 3), np.float32),
+        }
+        self.index = {"Left": 0, "Right": 0}
+
+    def set_frame_size(self, width, height):
+        """تغییر ابعاد فریم (z با همان مقیاس x تبدیل می‌شود)"""
+        self.width = width
+        self.height = height
+        self.set_roi(None)
+
+    def set_roi(self, roi):
+        """
+        تعیین ناحیه‌ای که مدل روی آن اجرا شده است
+
+        Args:
+            roi: (x0, y0, x1, y1) در مختصات پیکسل فریم کامل یا None برای کل تصویر
+        """
+        if roi is None:
+            self.scale[:] = (self.width, self.height, self.width)
+            self.offset[:] = 0
+        else:
+            x0, y0, x1, y1 = roi
+            self.scale[:] = (x1 - x0, y1 - y0, x1 - x0)
+            self.offset[:] = (x0, y0, 0)
+
+    def _next_buffer(self, label):
+        label = "Left" if label == "Left" else "Right"
+        self.index[label] ^= 1
+        return self.buffers[label][self.index[label]]
+
+    def from_landmarks(self, hand_landmarks, label):
+        """
+        تبدیل خروجی MediaPipe به آرایه پیکسلی فریم کامل (یک بار در هر فریم)
+
+        Args:
+            hand_landmarks: نقاط یک دست از results.multi_hand_landmarks
+            label: "Left" یا "Right"
+        """
+        out = self._next_buffer(label)
+        out[:] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+        out *= self.scale
+        out += self.offset
+        return out
+
+    def from_normalized(self, points, label):
+        """تبدیل آرایه (21, 3) نرمال شده (مثلاً از فایل ضبط) به آرایه پیکسلی"""
+        out = self._next_buffer(label)
+        np.multiply(points, self.scale, out=out)
+        return out
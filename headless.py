@@ -0,0 +1,71 @@
+"""
+اجرای موتور ژست بدون رابط کاربری، پیش‌نمایش و رسم (مناسب کیوسک)
+Headless gesture engine entry point: capture -> inference -> gestures -> actions
+"""
+
+import sys
+import os
+import argparse
+
+# اضافه کردن مسیر فعلی به sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from resolution_governor import DEFAULT_QUALITY
+from virtual_keyboard import KEYBOARD_LAYOUTS
+from cursor_filters import CURSOR_FILTERS
+from output_backends import OUTPUT_BACKENDS, create_output_backend
+
+STATES = ["CALIBRATING", "IDLE", "MOUSE_CONTROL", "SYSTEM_CONTROL", "KEYBOARD_MODE"]
+
+
+def main():
+    """تابع اصلی"""
+    parser = argparse.ArgumentParser(description="Hand Controller Pro v3.0 - Headless Engine")
+    parser.add_argument("--engine", default="advanced", choices=["advanced", "fixed"],
+                        help="کنترلر مورد استفاده (advanced: AdvancedHandController، fixed: FixedHandController)")
+    parser.add_argument("--source", default=None,
+                        help="منبع تصویر: شماره دوربین، فایل ویدیو، پوشه تصاویر یا synthetic[:N]")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY, choices=["480p", "720p", "1080p"],
+                        help="کیفیت دریافت تصویر")
+    parser.add_argument("--state", default="CALIBRATING", choices=STATES,
+                        help="حالت شروع (بدون پیش‌نمایش، کالیبراسیون را می‌توان رد کرد)")
+    parser.add_argument("--record", default=None,
+                        help="ضبط نقاط دست در فایل برای پخش مجدد با landmark_recording.py")
+    parser.add_argument("--no-roi", action="store_true",
+                        help="اجرای مدل همیشه روی کل تصویر (بدون برش اطراف دست)")
+    parser.add_argument("--keyboard", default="default", choices=KEYBOARD_LAYOUTS,
+                        help="چیدمان کیبورد مجازی (default، qwerty کامل یا persian)")
+    parser.add_argument("--filter", default="one_euro", choices=list(CURSOR_FILTERS),
+                        help="فیلتر هموارسازی مکان‌نما (legacy: هموارسازی قبلی)")
+    parser.add_argument("--predict", action="store_true",
+                        help="پیش‌بینی حرکت نوک انگشت برای جبران تأخیر دوربین و پردازش")
+    parser.add_argument("--output", default="system", choices=OUTPUT_BACKENDS,
+                        help="خروجی دستورات (system: ماوس، کیبورد و صدای واقعی، recording: فقط ثبت در حافظه)")
+    args = parser.parse_args()
+
+    if args.engine == "fixed":
+        from run_fixed import FixedHandController as Controller
+    else:
+        from advanced_hand_controller import AdvancedHandController as Controller
+
+    output = create_output_backend(args.output)
+    controller = Controller(frame_source=args.source, capture_quality=args.quality, headless=True, output=output,
+                            cursor_filter=args.filter, predict=args.predict)
+    controller.state = args.state
+    controller.roi_tracker.enabled = not args.no_roi
+    if args.keyboard != "default":
+        controller.setup_virtual_keyboard(args.keyboard)
+    if args.record:
+        controller.start_landmark_recording(args.record)
+
+    print("موتور ژست بدون رابط کاربری اجرا شد (Ctrl+C برای توقف)")
+    controller.run_headless()
+    if args.engine == "advanced":
+        # FixedHandController جدول زمان مراحل را خودش در پایان حلقه چاپ می‌کند
+        print(controller.profiler.report())
+    if args.output == "recording":
+        print(f"دستورات ثبت شده: {output.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
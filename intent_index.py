@@ -0,0 +1,242 @@
+"""
+شاخص نیت دستورات: یکسان‌سازی متن فارسی و تطبیق معنایی با بردارهای از پیش محاسبه شده عبارت‌ها
+Intent index: Persian normalization and cosine matching against precomputed phrase embeddings
+"""
+
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+# بردار معنایی جمله‌ها (چندزبانه، شامل فارسی)
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# عبارت‌های هم‌معنی (گفتار محاوره‌ای و خطاهای رایج تشخیص گفتار) برای هر دستور
+INTENT_SYNONYMS = {
+    "کروم را باز کن": ["کروم رو باز کن", "مرورگر کروم را باز کن", "گوگل کروم را اجرا کن"],
+    "فایرفاکس را باز کن": ["فایرفاکس رو باز کن", "مرورگر فایرفاکس را باز کن"],
+    "یوتیوب را باز کن": ["یوتیوب رو باز کن", "برو به یوتیوب"],
+    "گوگل را باز کن": ["گوگل رو باز کن", "برو به گوگل"],
+    "صدا را کم کن": ["صدا رو کم کن", "صدا را پایین بیار", "صدا رو آروم کن"],
+    "صدا را زیاد کن": ["صدا رو زیاد کن", "صدا را بالا ببر", "صدا رو بلند کن"],
+    "صدا را قطع کن": ["صدا رو قطع کن", "بی صدا کن"],
+    "صدا را روشن کن": ["صدا رو وصل کن", "صدا را وصل کن"],
+    "اسکرین شات بگیر": ["از صفحه عکس بگیر", "اسکرین شات بنداز"],
+    "فایل اکسپلورر را باز کن": ["فایل اکسپلورر رو باز کن", "پوشه‌ها را نشان بده"],
+    "دسکتاپ را نشان بده": ["دسکتاپ رو نشون بده", "برو به دسکتاپ"],
+}
+
+# دستورات غیرقابل بازگشت فقط با عبارت دقیق اجرا می‌شوند و در شاخص معنایی نیستند
+FUZZY_EXCLUDED = ("کامپیوتر را خاموش کن", "کامپیوتر را ریست کن", "فایل را حذف کن")
+
+_ARABIC_LETTERS = str.maketrans({
+    "ي": "ی", "ى": "ی", "ك": "ک", "ة": "ه", "ۀ": "ه", "أ": "ا", "إ": "ا", "ٱ": "ا",
+    "۰": "0", "۱": "1", "۲": "2", "۳": "3", "۴": "4", "۵": "5", "۶": "6", "۷": "7", "۸": "8", "۹": "9",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4", "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+# اعراب، تطویل و نویسه‌های کنترلی جهت متن
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670\u0640\u200e\u200f]")
+# نیم‌فاصله و فاصله‌های یونیکد به فاصله معمولی
+_SPACES = re.compile("[\\s\u200c\u200d]+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_persian(text):
+    """
+    یکسان‌سازی متن فارسی برای مقایسه
+
+    حروف عربی به فارسی، ارقام به لاتین، حذف اعراب و علائم، و نیم‌فاصله و هر دنباله
+    فاصله به یک فاصله (مثلاً "پنجره‌ها"، "پنجره ها" و "پنجرهها" نزدیک به هم می‌شوند).
+    """
+    text = text.translate(_ARABIC_LETTERS).lower()
+    text = _DIACRITICS.sub("", text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class CharNgramEncoder:
+    threshold = 0.7
+    margin = 0.1
+
+    def __init__(self, n=3, dim=4096):
+        """
+        بردار n-gram حروف با hashing (بدون وابستگی)؛ به تفاوت فاصله‌گذاری و خطاهای
+        کوچک املایی مقاوم است اما هم‌معنی‌ها را فقط از طریق INTENT_SYNONYMS می‌شناسد
+
+        Args:
+            n: طول n-gram
+            dim: ابعاد بردار
+        """
+        self.n = n
+        self.dim = dim
+        self.name = f"char{n}-{dim}"
+
+    def encode(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            # n-gram ها بدون فاصله تا "پنجره ها" و "پنجرهها" یکسان شوند؛ مرز کلمات با یک n-gram جدا
+            padded = f" {text} "
+            compact = text.replace(" ", "")
+            for source in (padded, compact):
+                for i in range(len(source) - self.n + 1):
+                    matrix[row, zlib.crc32(source[i:i + self.n].encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+
+class SentenceEncoder:
+    threshold = 0.75
+    margin = 0.05
+
+    def __init__(self, model_name=DEFAULT_EMBEDDING_MODEL):
+        """
+        بردار معنایی با sentence-transformers (هم‌معنی‌ها را بدون فهرست هم تشخیص می‌دهد)
+
+        Args:
+            model_name: نام مدل چندزبانه
+        """
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers نصب نیست")
+        self.model = SentenceTransformer(model_name)
+        self.name = model_name.replace("/", "_")
+
+    def encode(self, texts):
+        return np.asarray(self.model.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+
+
+def is_negated(text, phrase):
+    """
+    آیا فعل عبارت در متن منفی شده است (مثلاً "خاموش نکن" برای "خاموش کن" یا "نبر" برای "ببر")
+
+    Args:
+        text: متن یکسان‌سازی شده
+        phrase: عبارت یکسان‌سازی شده
+    """
+    words = set(phrase.split())
+    for token in text.split():
+        if token == "نه":
+            return True
+        if token.startswith("ن") and token not in words and (token[1:] in words or "ب" + token[1:] in words):
+            return True
+    return False
+
+
+def create_encoder(name="auto"):
+    """
+    ساخت رمزگذار متن
+
+    Args:
+        name: "sentence" (sentence-transformers)، "char" (n-gram حروف) یا "auto"
+    """
+    if name == "char":
+        return CharNgramEncoder()
+    if name == "sentence":
+        return SentenceEncoder()
+    try:
+        return SentenceEncoder()
+    except Exception as e:
+        print(f"⚠️ تطبیق معنایی در دسترس نیست ({e})؛ استفاده از n-gram حروف")
+        return CharNgramEncoder()
+
+
+class IntentIndex:
+    def __init__(self, phrases, encoder=None, threshold=None, margin=None, cache_dir="model_cache"):
+        """
+        ماتریس بردار همه عبارت‌ها که یک بار ساخته و روی دیسک ذخیره می‌شود
+
+        هر گفته با یک ضرب ماتریس در بردار با همه عبارت‌ها مقایسه می‌شود. نزدیک‌ترین دستور
+        فقط وقتی پذیرفته می‌شود که شباهت آن از آستانه و به اندازه margin از نزدیک‌ترین
+        دستور دیگر بیشتر باشد و فعل آن در متن منفی نشده باشد.
+
+        Args:
+            phrases: دیکشنری عبارت -> کلید دستور (یا لیست کلیدها)
+            encoder: رمزگذار متن (پیش‌فرض create_encoder())
+            threshold: حداقل شباهت کسینوسی (پیش‌فرض آستانه رمزگذار)
+            margin: حداقل فاصله شباهت با نزدیک‌ترین دستور دیگر (پیش‌فرض margin رمزگذار)
+            cache_dir: پوشه ذخیره ماتریس (None برای عدم ذخیره)
+        """
+        if not isinstance(phrases, dict):
+            phrases = {phrase: phrase for phrase in phrases}
+        self.encoder = encoder or create_encoder()
+        self.threshold = threshold if threshold is not None else self.encoder.threshold
+        self.margin = margin if margin is not None else self.encoder.margin
+        self.phrases = [normalize_persian(phrase) for phrase in phrases]
+        self.keys = list(phrases.values())
+        self.cache_path = None
+        if cache_dir:
+            digest = hashlib.md5("\n".join([self.encoder.name] + self.phrases).encode("utf-8")).hexdigest()
+            self.cache_path = os.path.join(cache_dir, f"intent_index_{digest}.npy")
+        self.matrix = self._load_or_encode()
+
+        # آمار
+        self.matches = 0
+        self.rejected = 0
+        self.last_score = 0.0
+
+    @classmethod
+    def from_commands(cls, commands, synonyms=INTENT_SYNONYMS, exclude=FUZZY_EXCLUDED, **kwargs):
+        """شاخص کلیدهای دیکشنری دستورات به همراه هم‌معنی‌های آن‌ها (به جز دستورات exclude)"""
+        phrases = {key: key for key in commands if key not in exclude}
+        for key, alternatives in synonyms.items():
+            if key in phrases:
+                for alternative in alternatives:
+                    phrases.setdefault(alternative, key)
+        return cls(phrases, **kwargs)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _load_or_encode(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            try:
+                matrix = np.load(self.cache_path)
+                if matrix.shape[0] == len(self.phrases):
+                    return matrix
+            except Exception as e:
+                print(f"❌ خطا در خواندن شاخص دستورات: {e}")
+        matrix = self.encoder.encode(self.phrases) if self.phrases else np.zeros((0, 1), dtype=np.float32)
+        if self.cache_path:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                np.save(self.cache_path, matrix)
+            except OSError as e:
+                print(f"❌ خطا در ذخیره شاخص دستورات: {e}")
+        return matrix
+
+    def scores(self, text):
+        """شباهت کسینوسی متن با همه عبارت‌ها"""
+        vector = self.encoder.encode([normalize_persian(text)])[0]
+        return self.matrix @ vector
+
+    def match(self, text):
+        """
+        نزدیک‌ترین دستور به متن
+
+        Returns:
+            (کلید، شباهت)؛ کلید None اگر شباهت کمتر از آستانه، نزدیک به دستور دیگر یا منفی باشد
+        """
+        if not len(self.keys) or not text:
+            return None, 0.0
+        scores = self.scores(text)
+        best = int(np.argmax(scores))
+        self.last_score = float(scores[best])
+        others = [score for key, score in zip(self.keys, scores) if key != self.keys[best]]
+        runner_up = max(others) if others else 0.0
+        if (self.last_score < self.threshold or self.last_score - runner_up < self.margin
+                or is_negated(normalize_persian(text), self.phrases[best])):
+            self.rejected += 1
+            return None, self.last_score
+        self.matches += 1
+        return self.keys[best], self.last_score
+
+    def get_stats(self):
+        return {"encoder": self.encoder.name, "phrases": len(self.keys), "matches": self.matches,
+                "rejected": self.rejected, "last_score": self.last_score}
@@ -0,0 +1,236 @@
+"""
+ضبط و پخش مجدد نقاط دست برای تست و بنچمارک منطق ژست‌ها بدون دوربین و مدل
+Landmark record/replay format for inference-free benchmarking of the gesture logic
+
+ساختار فایل: یک هدر ثابت و پس از آن رکوردهای هم‌اندازه (یک رکورد برای هر فریم)
+که هنگام پخش به صورت memory-mapped خوانده می‌شوند.
+"""
+
+import os
+import struct
+import time
+import numpy as np
+
+from output_backends import RecordingBackend
+
+MAGIC = b"HCLMREC1"
+VERSION = 1
+MAX_HANDS = 2
+NUM_LANDMARKS = 21
+
+# هدر: magic، نسخه، حداکثر تعداد دست، تعداد نقاط هر دست، اندازه رکورد
+HEADER_FORMAT = "<8sIIII8x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+HANDEDNESS_LABELS = ("Left", "Right")
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("num_hands", "u1"),
+    ("handedness", "u1", (MAX_HANDS,)),  # 0 = Left، 1 = Right
+    ("_pad", "u1", (5,)),
+    ("landmarks", "<f4", (MAX_HANDS, NUM_LANDMARKS, 3)),  # مختصات نرمال شده MediaPipe
+])
+
+
+def landmarks_from_results(results, roi=None, frame_size=None):
+    """
+    استخراج دست‌ها از خروجی MediaPipe
+
+    Args:
+        results: خروجی hands.process
+        roi: اگر مدل روی ناحیه برش اجرا شده، (x0, y0, x1, y1) آن ناحیه
+        frame_size: ابعاد فریم کامل (عرض، ارتفاع) در صورت استفاده از roi
+
+    Returns:
+        لیست (برچسب دست، آرایه (21, 3) float32 نرمال شده نسبت به فریم کامل)
+    """
+    hands = []
+    if results.multi_hand_landmarks:
+        for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+            label = results.multi_handedness[i].classification[0].label
+            points = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], np.float32)
+            if roi is not None:
+                x0, y0, x1, y1 = roi
+                width, height = frame_size
+                points *= ((x1 - x0) / width, (y1 - y0) / height, (x1 - x0) / width)
+                points += (x0 / width, y0 / height, 0)
+            hands.append((label, points))
+    return hands
+
+
+class LandmarkRecorder:
+    def __init__(self, path):
+        """
+        ضبط جلسه به فرمت باینری
+
+        Args:
+            path: مسیر فایل خروجی
+        """
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, MAX_HANDS, NUM_LANDMARKS, RECORD_DTYPE.itemsize))
+        self.frames_written = 0
+
+        # رکورد قابل استفاده مجدد برای جلوگیری از تخصیص حافظه در هر فریم
+        self._record = np.zeros(1, RECORD_DTYPE)
+
+    def write(self, timestamp, hands):
+        """
+        ذخیره یک فریم
+
+        Args:
+            timestamp: زمان دریافت فریم
+            hands: لیست (برچسب دست، آرایه (21, 3)) - خروجی landmarks_from_results
+        """
+        record = self._record[0]
+        record["timestamp"] = timestamp
+        record["num_hands"] = min(len(hands), MAX_HANDS)
+        for i, (label, points) in enumerate(hands[:MAX_HANDS]):
+            record["handedness"][i] = 0 if label == "Left" else 1
+            record["landmarks"][i] = points
+        self.file.write(self._record.tobytes())
+        self.frames_written += 1
+
+    def close(self):
+        """بستن فایل"""
+        if not self.file.closed:
+            self.file.close()
+
+
+class LandmarkRecording:
+    def __init__(self, path):
+        """
+        خواندن جلسه ضبط شده به صورت memory-mapped
+
+        Args:
+            path: مسیر فایل ضبط شده
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, max_hands, num_landmarks, record_size = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+        if magic != MAGIC:
+            raise ValueError(f"فایل ضبط نامعتبر است: {path}")
+        if version != VERSION or max_hands != MAX_HANDS or num_landmarks != NUM_LANDMARKS \
+                or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"نسخه فایل ضبط پشتیبانی نمی‌شود: {path}")
+
+        # رکورد ناقص انتهای فایل (مثلاً پس از قطع برنامه) نادیده گرفته می‌شود
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, RECORD_DTYPE)
+
+        self.timestamps = self.records["timestamp"]
+        self.num_hands = self.records["num_hands"]
+        self.handedness = self.records["handedness"]
+        self.landmarks = self.records["landmarks"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def hands(self, index):
+        """
+        دست‌های یک فریم
+
+        Returns:
+            (left, right) - آرایه (21, 3) نرمال شده یا None
+        """
+        left, right = None, None
+        for i in range(int(self.num_hands[index])):
+            if self.handedness[index, i] == 0:
+                left = self.landmarks[index, i]
+            else:
+                right = self.landmarks[index, i]
+        return left, right
+
+    def duration(self):
+        """مدت زمان جلسه به ثانیه"""
+        if len(self) < 2:
+            return 0.0
+        return float(self.timestamps[-1] - self.timestamps[0])
+
+
+def replay_session(controller, recording, start_state=None, canvas=None):
+    """
+    اجرای مستقیم جلسه ضبط شده روی منطق حالت‌ها و ژست‌های کنترلر
+
+    زمان هر فریم از فایل ضبط خوانده می‌شود، بنابراین cooldown ها و تایمرها
+    مستقل از سرعت پخش رفتار یکسانی دارند.
+
+    Args:
+        controller: کنترلر دارای متد process_hands و hand_arrays
+        recording: LandmarkRecording
+        start_state: حالت شروع (مثلاً "MOUSE_CONTROL")؛ پیش‌فرض حالت فعلی کنترلر
+        canvas: تصویر پس‌زمینه برای رسم (پیش‌فرض یک تصویر سیاه ثابت؛ برای کنترلر headless بدون رسم)
+
+    Returns:
+        آمار پخش (تعداد فریم، زمان، فریم بر ثانیه و در صورت ثبت دستورات، تعداد و نرخ آن‌ها)
+    """
+    if canvas is None and not getattr(controller, "headless", False):
+        canvas = np.zeros((controller.hCam, controller.wCam, 3), np.uint8)
+
+    if len(recording):
+        first_timestamp = float(recording.timestamps[0])
+        controller.frame_time = first_timestamp
+        controller.calibration_timer = first_timestamp
+        controller.last_state_change_time = 0
+        controller.click_cooldown = 0
+    if start_state:
+        controller.state = start_state
+
+    # اگر کنترلر profiler دارد، زمان منطق ژست‌ها هر فریم جداگانه ثبت می‌شود
+    profiler = getattr(controller, "profiler", None)
+
+    # دستورات ثبت شده با زمان فریم (نه زمان پخش) علامت‌گذاری می‌شوند
+    output = getattr(controller, "output", None)
+    if isinstance(output, RecordingBackend):
+        output.clock = lambda: controller.frame_time
+
+    start = time.perf_counter()
+    hand_arrays = controller.hand_arrays
+    for i in range(len(recording)):
+        if profiler is not None:
+            profiler.begin_frame()
+        controller.frame_time = float(recording.timestamps[i])
+        left, right = recording.hands(i)
+        controller.process_hands(
+            canvas,
+            hand_arrays.from_normalized(left, "Left") if left is not None else None,
+            hand_arrays.from_normalized(right, "Right") if right is not None else None,
+        )
+        if profiler is not None:
+            profiler.lap("gesture_logic")
+            profiler.end_frame()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "frames": len(recording),
+        "seconds": elapsed,
+        "fps": len(recording) / elapsed if elapsed > 0 else 0.0,
+        "latency": profiler.summary() if profiler is not None else {},
+        "actions": output.get_stats() if isinstance(output, RecordingBackend) else {},
+    }
+
+
+# پخش و بنچمارک از خط فرمان
+if __name__ == "__main__":
+    import argparse
+    from run_fixed import FixedHandController
+
+    parser = argparse.ArgumentParser(description="پخش جلسه ضبط شده نقاط دست")
+    parser.add_argument("recording", help="مسیر فایل ضبط شده")
+    parser.add_argument("--state", default="MOUSE_CONTROL", help="حالت شروع")
+    args = parser.parse_args()
+
+    recording = LandmarkRecording(args.recording)
+    controller = FixedHandController(frame_source="synthetic:1", headless=True, output=RecordingBackend())
+    controller.profiler.reset()
+    stats = replay_session(controller, recording, start_state=args.state)
+    print(f"{stats['frames']} فریم در {stats['seconds']:.3f} ثانیه ({stats['fps']:.0f} فریم بر ثانیه)")
+    print(controller.profiler.report())
+    actions = stats["actions"]
+    print(f"{actions['total']} دستور: {actions['counts']}")
+    if "rate" in actions:
+        print(f"نرخ دستورات: {actions['rate']:.1f} در ثانیه از زمان جلسه")
@@ -0,0 +1,212 @@
+"""
+اندازه‌گیری زمان مراحل حلقه اصلی با هیستوگرام‌های حافظه ثابت (p50/p95/p99)
+Per-stage latency instrumentation backed by fixed-memory log-bucket histograms
+"""
+
+import math
+import time
+
+# مراحل حلقه اصلی به ترتیب اجرا
+PIPELINE_STAGES = (
+    "capture",           # فاصله لحظه دریافت فریم تا شروع پردازش آن
+    "color_conversion",  # برگرداندن تصویر و تبدیل BGR به RGB
+    "inference",         # اجرای مدل و تبدیل نقاط دست
+    "gesture_logic",     # منطق حالت‌ها و ژست‌ها (بدون زمان actuation و رسم)
+    "actuation",         # فراخوانی ماوس، کیبورد و صدا
+    "overlay",           # رسم متن‌ها، کیبورد و نقاط دست روی تصویر
+    "display",           # به‌روزرسانی آمار و نمایش تصویر
+)
+
+
+class LatencyHistogram:
+    def __init__(self, min_seconds=1e-6, max_seconds=10.0, buckets_per_decade=20):
+        """
+        هیستوگرام با بازه‌های لگاریتمی؛ حافظه مستقل از تعداد نمونه‌ها است
+
+        با 20 بازه در هر دهه، خطای نسبی صدک‌ها حدود 6 درصد است.
+
+        Args:
+            min_seconds, max_seconds: محدوده زمان‌های قابل تفکیک
+            buckets_per_decade: تعداد بازه در هر ضریب 10
+        """
+        self.min_seconds = min_seconds
+        self.buckets_per_decade = buckets_per_decade
+        decades = math.log10(max_seconds / min_seconds)
+        self.num_buckets = int(math.ceil(decades * buckets_per_decade)) + 1
+        self._log_min = math.log10(min_seconds)
+        self.reset()
+
+    def reset(self):
+        """پاک کردن همه نمونه‌ها"""
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        """ثبت یک نمونه"""
+        if seconds > self.min_seconds:
+            index = int((math.log10(seconds) - self._log_min) * self.buckets_per_decade) + 1
+            if index >= self.num_buckets:
+                index = self.num_buckets - 1
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """اضافه کردن نمونه‌های هیستوگرام دیگر با همان تنظیمات"""
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _bucket_value(self, index):
+        # میانگین هندسی مرزهای بازه
+        if index == 0:
+            return self.min_seconds
+        exponent = self._log_min + (index - 0.5) / self.buckets_per_decade
+        return 10 ** exponent
+
+    def percentile(self, p):
+        """
+        صدک p (بین 0 و 100) به ثانیه
+
+        Returns:
+            مقدار تقریبی صدک یا 0 اگر نمونه‌ای ثبت نشده باشد
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(math.ceil(self.count * p / 100.0)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        """خلاصه آماری به میلی‌ثانیه"""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class _StageTimer:
+    """context manager قابل استفاده مجدد برای زمان‌گیری یک مرحله تو در تو"""
+    __slots__ = ("profiler", "stage", "start")
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class PipelineProfiler:
+    def __init__(self, stages=PIPELINE_STAGES):
+        """
+        زمان‌گیری مراحل هر تکرار حلقه اصلی
+
+        مراحل پشت سر هم با lap ثبت می‌شوند. مراحلی که در میان بقیه پراکنده هستند
+        (مثل actuation و overlay) با measure اندازه‌گیری می‌شوند و زمان آن‌ها از
+        مرحله دربرگیرنده کم می‌شود، بنابراین جمع مراحل برابر زمان کل فریم است.
+        """
+        self.stages = tuple(stages)
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages + ("total",)}
+        self.timers = {stage: _StageTimer(self, stage) for stage in self.stages}
+        self.last = {}  # زمان مراحل آخرین فریم کامل شده (ثانیه)
+        self.frames = 0
+
+        self._current = {}
+        self._nested = {}
+        self._nested_since_lap = 0.0
+        self._frame_start = self._lap_start = time.perf_counter()
+
+    def begin_frame(self):
+        """شروع زمان‌گیری یک فریم"""
+        self._current.clear()
+        self._nested.clear()
+        self._nested_since_lap = 0.0
+        self._frame_start = self._lap_start = time.perf_counter()
+
+    def lap(self, stage):
+        """پایان مرحله جاری (زمان از lap قبلی منهای مراحل تو در تو)"""
+        now = time.perf_counter()
+        self._current[stage] = self._current.get(stage, 0.0) + now - self._lap_start - self._nested_since_lap
+        self._lap_start = now
+        self._nested_since_lap = 0.0
+
+    def measure(self, stage):
+        """
+        زمان‌گیری یک مرحله تو در تو
+
+        Example:
+            with profiler.measure("actuation"):
+                pyautogui.click()
+        """
+        return self.timers[stage]
+
+    def add(self, stage, seconds):
+        """اضافه کردن زمان یک مرحله تو در تو به فریم جاری"""
+        self._nested[stage] = self._nested.get(stage, 0.0) + seconds
+        self._nested_since_lap += seconds
+
+    def record(self, stage, seconds):
+        """ثبت مستقیم زمان یک مرحله که خارج از این حلقه اندازه‌گیری شده است"""
+        self._current[stage] = self._current.get(stage, 0.0) + seconds
+
+    def end_frame(self):
+        """ثبت زمان مراحل فریم جاری در هیستوگرام‌ها"""
+        total = time.perf_counter() - self._frame_start
+        for timings in (self._current, self._nested):
+            for stage, seconds in timings.items():
+                self.histograms[stage].record(seconds)
+        self.last = dict(self._current)
+        self.last.update(self._nested)
+        self.last["total"] = total
+        self.histograms["total"].record(total)
+        self.frames += 1
+
+    def reset(self):
+        """پاک کردن همه هیستوگرام‌ها"""
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.frames = 0
+
+    def summary(self):
+        """خلاصه p50/p95/p99 هر مرحله به میلی‌ثانیه"""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()
+                if histogram.count}
+
+    def report(self):
+        """جدول متنی خلاصه زمان مراحل"""
+        lines = [f"{'stage':<18}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<18}{stats['count']:>8}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+                         f"{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}")
+        return "\n".join(lines)
@@ -4,7 +4,6 @@ Local AI Voice Control System with Open Source Models
 """
 
 import speech_recognition as sr
-import pyttsx3
 import threading
 import time
 import json
@@ -17,6 +16,12 @@ import requests
 from typing import Dict, List, Callable
 import re
 
+from asr_backends import create_asr_backend
+from audio_capture import AudioCapture
+from command_matcher import CommandMatcher
+from intent_index import IntentIndex
+from tts_worker import TTSWorker, PRIORITY_NORMAL, PRIORITY_HIGH
+
 # مدل‌های محلی AI
 try:
     from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
@@ -28,18 +33,27 @@ except ImportError:
     print("مدل‌های AI محلی در دسترس نیستند. نصب کنید: pip install transformers torch")
 
 class LocalAIController:
-    def __init__(self):
+    def __init__(self, asr="auto", asr_model=None):
         """
         کنترلر صوتی محلی با مدل‌های Open Source
+        
+        Args:
+            asr: موتور تشخیص گفتار ("auto"، "vosk"، "google" یا یک ASRBackend) - asr_backends را ببینید
+            asr_model: پوشه مدل Vosk
         """
-        # راه‌اندازی تشخیص صدا
+        # راه‌اندازی تشخیص صدا (پیش‌فرض Vosk آفلاین و جریانی اگر مدل موجود باشد)
+        self.asr = create_asr_backend(asr, asr_model) if isinstance(asr, str) else asr
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = sr.Microphone(sample_rate=self.asr.sample_rate)
+        # اجرای دستور وقتی فرضیه میانی این مدت (ثانیه) ثابت مانده و دستور شناخته شده است
+        self.early_dispatch = 0.3
+        self.early_dispatches = 0
+        # جریان دائمی میکروفون برای حلقه کنترل صوتی (در start_voice_control باز می‌شود)
+        self.audio_capture = None
         
-        # راه‌اندازی تبدیل متن به گفتار
-        self.tts_engine = pyttsx3.init()
-        self.tts_engine.setProperty('rate', 150)
-        self.tts_engine.setProperty('volume', 0.8)
+        # راه‌اندازی تبدیل متن به گفتار (یک thread مالک موتور با صف جمله‌ها)
+        self.tts = TTSWorker(rate=150, volume=0.8)
+        self.tts.start()
         
         # مدل‌های AI محلی
         self.nlp_model = None
@@ -63,8 +77,8 @@ class LocalAIController:
             "صدا را روشن کن": self.unmute_volume,
             
             # دستورات مرورگر
-            "کروم را باز کن": lambda cmd: self.open_application("chrome"),
-            "فایرفاکس را باز کن": lambda cmd: self.open_application("firefox"),
+            "کروم را باز کن": lambda cmd: self.open_application("کروم"),
+            "فایرفاکس را باز کن": lambda cmd: self.open_application("فایرفاکس"),
             "یوتیوب را باز کن": self.open_youtube,
             "گوگل را باز کن": self.open_google,
             "جستجو کن": self.search_web,
@@ -92,6 +106,10 @@ class LocalAIController:
             "پوشه بساز": self.create_folder,
             "فایل را باز کن": self.open_file,
         }
+        # همه عبارت‌ها در یک گذر روی متن؛ طولانی‌ترین (مشخص‌ترین) عبارت انتخاب می‌شود
+        self.command_matcher = CommandMatcher(self.commands)
+        # تطبیق معنایی وقتی هیچ عبارتی عیناً در متن نیست (بردارها یک بار ساخته و ذخیره می‌شوند)
+        self.intent_index = IntentIndex.from_commands(self.commands)
         
         # حالت‌های مختلف
         self.current_mode = "normal"
@@ -137,35 +155,124 @@ class LocalAIController:
             self.nlp_model = None
             self.qa_model = None
     
-    def speak(self, text: str):
-        """تبدیل متن به گفتار"""
-        def speak_thread():
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+    def speak(self, text: str, priority: int = PRIORITY_NORMAL, interrupt: bool = False):
+        """
+        تبدیل متن به گفتار (بدون انتظار؛ جمله در صف TTSWorker قرار می‌گیرد)
         
-        thread = threading.Thread(target=speak_thread)
-        thread.daemon = True
-        thread.start()
+        Args:
+            text: متن
+            priority: اولویت جمله در صف
+            interrupt: قطع جمله در حال گفتن و جمله‌های در انتظار کم‌اهمیت‌تر
+        """
+        self.tts.say(text, priority=priority, interrupt=interrupt)
     
-    def listen(self) -> str:
+    def listen(self, timeout: float = 5, phrase_time_limit: float = 10) -> str:
         """شنیدن و تشخیص دستور صوتی"""
         try:
             with self.microphone as source:
                 print("گوش می‌دهم...")
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-            
-            # تشخیص با Google Speech Recognition
-            text = self.recognizer.recognize_google(audio, language='fa-IR')
-            print(f"تشخیص داده شد: {text}")
-            return text.lower()
+                if self.asr.streaming:
+                    chunks = iter(lambda: source.stream.read(source.CHUNK), None)
+                    text = self.recognize_stream(chunks, timeout, phrase_time_limit)
+                else:
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                    text = self.asr.transcribe(audio.get_raw_data(convert_rate=self.asr.sample_rate, convert_width=2))
             
         except sr.WaitTimeoutError:
             return ""
-        except sr.UnknownValueError:
-            return ""
-        except sr.RequestError as e:
-            print(f"خطا در تشخیص صدا: {e}")
-            return ""
+        
+        if text:
+            print(f"تشخیص داده شد: {text}")
+        return text.lower()
+    
+    def listen_continuous(self, timeout: float = 1.0) -> str:
+        """
+        تشخیص گفته بعدی از جریان دائمی میکروفون (بدون باز کردن دوباره دستگاه)
+        
+        Args:
+            timeout: حداکثر انتظار برای شروع گفتار (ثانیه)؛ پس از آن "" برگردانده می‌شود
+        """
+        chunks = self.audio_capture.utterance(timeout)
+        try:
+            if self.asr.streaming:
+                text = self.recognize_stream(chunks)
+            else:
+                pcm = b"".join(chunks)
+                text = self.asr.transcribe(pcm) if pcm else ""
+        finally:
+            # اگر دستور زودتر اجرا شد، باقیمانده گفته کنار گذاشته می‌شود
+            chunks.close()
+        
+        if text:
+            print(f"تشخیص داده شد: {text}")
+        return text.lower()
+    
+    def recognize_stream(self, chunks, timeout: float = None, phrase_time_limit: float = 10) -> str:
+        """
+        تشخیص جریانی: صدا تکه به تکه به موتور داده می‌شود و فرضیه‌های میانی بررسی می‌شوند
+        
+        اگر فرضیه میانی به مدت early_dispatch ثابت بماند و شامل یک دستور شناخته شده باشد،
+        بدون انتظار برای سکوت پایان جمله برگردانده می‌شود.
+        
+        Args:
+            chunks: تکه‌های PCM شانزده بیتی
+            timeout: حداکثر انتظار برای شروع گفتار (None اگر تکه‌ها از قبل گفته جدا شده باشند)
+            phrase_time_limit: حداکثر طول گفته پس از شروع گفتار
+        """
+        started = False
+        start = time.perf_counter()
+        speech_start = None
+        partial, stable_since = "", start
+        
+        for chunk in chunks:
+            if not started:
+                self.asr.reset()
+                started = True
+            hypothesis = self.asr.accept(chunk)
+            now = time.perf_counter()
+            
+            if hypothesis is not None and hypothesis.text:
+                if speech_start is None:
+                    speech_start = now
+                if hypothesis.final:
+                    # موتور پایان جمله را تشخیص داده است
+                    return self.asr.finish().text
+                if hypothesis.text != partial:
+                    partial, stable_since = hypothesis.text, now
+                elif now - stable_since >= self.early_dispatch and self.find_command(partial, fuzzy=False) is not None:
+                    self.asr.finish()
+                    self.early_dispatches += 1
+                    return partial
+            
+            if speech_start is None and timeout is not None and now - start > timeout:
+                self.asr.finish()
+                return ""
+            if speech_start is not None and now - speech_start > phrase_time_limit:
+                return self.asr.finish().text
+        
+        return self.asr.finish().text if started else ""
+    
+    def find_command(self, command: str, fuzzy: bool = True):
+        """
+        پیدا کردن مشخص‌ترین دستور در متن (مثلاً "کروم را باز کن" به جای "باز کن")
+        
+        Args:
+            command: متن تشخیص داده شده
+            fuzzy: اگر عبارتی عیناً پیدا نشد، نزدیک‌ترین دستور از نظر معنایی (بالاتر از آستانه)
+        
+        Returns:
+            (کلید، تابع) یا None
+        """
+        if len(self.command_matcher) != len(self.commands):
+            # دستوری اضافه یا حذف شده است
+            self.command_matcher = CommandMatcher(self.commands)
+            self.intent_index = IntentIndex.from_commands(self.commands)
+        key = self.command_matcher.match(command)
+        if key is None and fuzzy:
+            key, _ = self.intent_index.match(command)
+        if key is None:
+            return None
+        return key, self.commands[key]
     
     def process_command(self, command: str) -> bool:
         """پردازش دستور صوتی"""
@@ -176,17 +283,18 @@ class LocalAIController:
         self.conversation_history.append(f"کاربر: {command}")
         
         # جستجوی دستور در دیکشنری
-        for key, func in self.commands.items():
-            if key in command:
-                try:
-                    result = func(command)
-                    self.conversation_history.append(f"سیستم: {result}")
-                    self.speak(result if result else "انجام شد")
-                    return True
-                except Exception as e:
-                    print(f"خطا در اجرای دستور: {e}")
-                    self.speak("خطا در اجرای دستور")
-                    return False
+        match = self.find_command(command)
+        if match is not None:
+            key, func = match
+            try:
+                result = func(command)
+                self.conversation_history.append(f"سیستم: {result}")
+                self.speak(result if result else "انجام شد")
+                return True
+            except Exception as e:
+                print(f"خطا در اجرای دستور: {e}")
+                self.speak("خطا در اجرای دستور")
+                return False
         
         # اگر دستور پیدا نشد، از AI محلی استفاده کن
         return self.handle_ai_command(command)
@@ -497,17 +605,29 @@ class LocalAIController:
         self.speak("کنترل صوتی محلی فعال شد. دستور خود را بگویید")
         self.is_listening = True
         
-        # اجرای حلقه گوش دادن در thread جداگانه
+        if self.audio_capture is None:
+            self.audio_capture = AudioCapture(self.asr.sample_rate)
+        
+        # اجرای حلقه گوش دادن در thread جداگانه؛ میکروفون در تمام مدت باز است و
+        # گفتاری که هنگام اجرای دستور قبلی شروع شود در بافر می‌ماند
         def listen_loop():
-            while self.is_listening:
-                try:
-                    command = self.listen()
-                    if command:
-                        self.process_command(command)
-                    time.sleep(0.5)  # کاهش تاخیر
-                except Exception as e:
-                    print(f"خطا در گوش دادن: {e}")
-                    time.sleep(1)
+            try:
+                self.audio_capture.start()
+            except Exception as e:
+                print(f"خطا در باز کردن میکروفون: {e}")
+                self.is_listening = False
+                return
+            try:
+                while self.is_listening:
+                    try:
+                        command = self.listen_continuous()
+                        if command:
+                            self.process_command(command)
+                    except Exception as e:
+                        print(f"خطا در گوش دادن: {e}")
+                        time.sleep(1)
+            finally:
+                self.audio_capture.stop()
         
         listen_thread = threading.Thread(target=listen_loop)
         listen_thread.daemon = True
@@ -516,7 +636,7 @@ class LocalAIController:
     def stop_voice_control(self):
         """توقف کنترل صوتی"""
         self.is_listening = False
-        self.speak("کنترل صوتی متوقف شد")
+        self.speak("کنترل صوتی متوقف شد", priority=PRIORITY_HIGH, interrupt=True)
     
     def get_conversation_history(self) -> List[str]:
         """دریافت تاریخچه مکالمه"""
@@ -524,5 +644,13 @@ class LocalAIController:
 
 # تست سیستم
 if __name__ == "__main__":
-    controller = LocalAIController()
+    import argparse
+    from asr_backends import ASR_BACKENDS
+    
+    parser = argparse.ArgumentParser(description="کنترل صوتی محلی")
+    parser.add_argument("--asr", choices=ASR_BACKENDS, default="auto", help="موتور تشخیص گفتار")
+    parser.add_argument("--asr-model", default=None, help="پوشه مدل Vosk")
+    args = parser.parse_args()
+    
+    controller = LocalAIController(asr=args.asr, asr_model=args.asr_model)
     controller.start_voice_control()
@@ -17,12 +17,17 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 try:
     from advanced_hand_controller import AdvancedHandController
     from local_ai_controller import LocalAIController
+    from commercial_features import UserPreferences
 except ImportError as e:
     print(f"خطا در import کردن ماژول‌ها: {e}")
     print("لطفاً ابتدا requirements.txt را نصب کنید:")
     print("pip install -r requirements.txt")
     sys.exit(1)
 
+# نگاشت گزینه‌های حساسیت در تنظیمات به مقدار ذخیره شده در user_preferences.json
+SENSITIVITY_VALUES = {"کم": "low", "متوسط": "medium", "زیاد": "high"}
+SENSITIVITY_LABELS = {value: label for label, value in SENSITIVITY_VALUES.items()}
+
 class MainApplication:
     def __init__(self):
         """برنامه اصلی"""
@@ -35,6 +40,7 @@ class MainApplication:
         self.hand_controller = None
         self.ai_controller = None
         self.is_running = False
+        self.preferences = UserPreferences()
         
         # ایجاد رابط کاربری
         self.create_launcher_ui()
@@ -154,7 +160,8 @@ class MainApplication:
         """شروع کنترل دست"""
         try:
             self.update_status("در حال راه‌اندازی کنترل دست...")
-            self.hand_controller = AdvancedHandController()
+            self.hand_controller = AdvancedHandController(
+                capture_quality=self.preferences.get_preference("camera_quality", "720p"))
             
             # مخفی کردن launcher و نمایش کنترلر دست
             self.root.withdraw()
@@ -195,7 +202,8 @@ class MainApplication:
             self.update_status("در حال راه‌اندازی حالت ترکیبی...")
             
             # راه‌اندازی هر دو سیستم
-            self.hand_controller = AdvancedHandController()
+            self.hand_controller = AdvancedHandController(
+                capture_quality=self.preferences.get_preference("camera_quality", "720p"))
             self.ai_controller = LocalAIController()
             
             # اجرا در thread های جداگانه
@@ -244,7 +252,7 @@ class MainApplication:
         camera_frame.pack(pady=10, padx=20, fill="x")
         
         tk.Label(camera_frame, text="کیفیت تصویر:", fg="white", bg="#2b2b2b").pack(anchor="w", padx=10)
-        quality_var = tk.StringVar(value="720p")
+        quality_var = tk.StringVar(value=self.preferences.get_preference("camera_quality", "720p"))
         quality_combo = tk.OptionMenu(camera_frame, quality_var, "480p", "720p", "1080p")
         quality_combo.pack(anchor="w", padx=10, pady=5)
         
@@ -259,7 +267,8 @@ class MainApplication:
         detection_frame.pack(pady=10, padx=20, fill="x")
         
         tk.Label(detection_frame, text="حساسیت تشخیص:", fg="white", bg="#2b2b2b").pack(anchor="w", padx=10)
-        sensitivity_var = tk.StringVar(value="متوسط")
+        sensitivity_var = tk.StringVar(value=SENSITIVITY_LABELS.get(
+            self.preferences.get_preference("gesture_sensitivity", "medium"), "متوسط"))
         sensitivity_combo = tk.OptionMenu(detection_frame, sensitivity_var, "کم", "متوسط", "زیاد")
         sensitivity_combo.pack(anchor="w", padx=10, pady=5)
         
@@ -276,7 +285,9 @@ class MainApplication:
         
     def save_settings(self, quality, sensitivity):
         """ذخیره تنظیمات"""
-        messagebox.showinfo("موفق", "تنظیمات ذخیره شد")
+        self.preferences.set_preference("camera_quality", quality)
+        self.preferences.set_preference("gesture_sensitivity", SENSITIVITY_VALUES.get(sensitivity, "medium"))
+        messagebox.showinfo("موفق", "تنظیمات ذخیره شد\nکیفیت تصویر از اجرای بعدی کنترل دست اعمال می‌شود")
         
     def update_status(self, message):
         """به‌روزرسانی وضعیت"""
@@ -0,0 +1,210 @@
+"""
+پیش‌بینی مکان نوک انگشت در لحظه اجرای دستور برای جبران تأخیر دریافت و پردازش تصویر
+Fingertip motion prediction to compensate pipeline latency, with offline evaluation
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+# مراحل حلقه اصلی بین دریافت تصویر و ارسال دستور به thread خروجی
+LATENCY_STAGES = ("capture", "color_conversion", "inference", "gesture_logic")
+
+
+class FingertipPredictor:
+    def __init__(self, history=6, max_lead=0.12, min_speed=60.0, max_displacement=60.0,
+                 acceleration_gain=0.5, latency_smoothing=0.1):
+        """
+        برون‌یابی مکان نوک انگشت با سرعت و شتاب چند نمونه آخر
+
+        یک چندجمله‌ای درجه دو (مکان، سرعت، شتاب) با کمترین مربعات روی نمونه‌های اخیر
+        برازش می‌شود و نقطه خام آخر به اندازه تغییر این منحنی تا زمان هدف جابجا می‌شود.
+        برای جلوگیری از جهش بیش از حد: زمان برون‌یابی و جابجایی محدود است، در حرکت
+        آهسته (لرزش) پیش‌بینی انجام نمی‌شود و سهم شتاب کمتر از سرعت است و هرگز جهت
+        حرکت را برعکس نمی‌کند.
+
+        Args:
+            history: تعداد نمونه‌های استفاده شده برای برازش
+            max_lead: حداکثر زمان برون‌یابی (ثانیه)
+            min_speed: حداقل سرعت (پیکسل بر ثانیه) برای پیش‌بینی
+            max_displacement: حداکثر جابجایی پیش‌بینی نسبت به آخرین نقطه (پیکسل)
+            acceleration_gain: ضریب جمله شتاب (0 = فقط سرعت)
+            latency_smoothing: ضریب میانگین متحرک نمایی تأخیر اندازه‌گیری شده
+        """
+        self.max_lead = max_lead
+        self.min_speed = min_speed
+        self.max_displacement = max_displacement
+        self.acceleration_gain = acceleration_gain
+        self.latency_smoothing = latency_smoothing
+        self.lead = 0.0  # تأخیر تخمینی از دریافت تصویر تا اجرای دستور (ثانیه)
+        self._samples = deque(maxlen=history)
+
+        # آمار
+        self.predictions = 0
+        self.clamped = 0
+
+    def reset(self):
+        """پاک کردن تاریخچه (مثلاً پس از گم شدن دست)"""
+        self._samples.clear()
+
+    def observe_latency(self, seconds):
+        """ثبت تأخیر اندازه‌گیری شده از لحظه دریافت تصویر تا اجرای دستور"""
+        if self.lead:
+            self.lead += self.latency_smoothing * (seconds - self.lead)
+        else:
+            self.lead = seconds
+
+    def update(self, x, y, timestamp, max_gap=0.25):
+        """
+        افزودن نمونه جدید
+
+        Args:
+            x, y: مکان نوک انگشت (پیکسل)
+            timestamp: زمان دریافت تصویر (ثانیه)
+            max_gap: اگر فاصله با نمونه قبلی بیشتر باشد، تاریخچه پاک می‌شود
+        """
+        if self._samples:
+            last_time = self._samples[-1][2]
+            if timestamp <= last_time:
+                return
+            if timestamp - last_time > max_gap:
+                self._samples.clear()
+        self._samples.append((float(x), float(y), float(timestamp)))
+
+    def motion(self):
+        """
+        سرعت و شتاب تخمینی در زمان آخرین نمونه
+
+        Returns:
+            (vx, vy, ax, ay) یا None اگر نمونه کافی نباشد
+        """
+        n = len(self._samples)
+        if n < 3:
+            return None
+        samples = np.asarray(self._samples)
+        dt = samples[:, 2] - samples[-1, 2]
+        design = np.column_stack((np.ones(n), dt, 0.5 * dt * dt))
+        coefficients = np.linalg.lstsq(design, samples[:, :2], rcond=None)[0]
+        (vx, vy), (ax, ay) = coefficients[1], coefficients[2]
+        return float(vx), float(vy), float(ax), float(ay)
+
+    def predict(self, lead=None):
+        """
+        مکان پیش‌بینی شده نوک انگشت پس از lead ثانیه از آخرین نمونه
+
+        Args:
+            lead: زمان برون‌یابی (پیش‌فرض تأخیر اندازه‌گیری شده)
+
+        Returns:
+            (x, y) یا None اگر نمونه‌ای ثبت نشده باشد
+        """
+        if not self._samples:
+            return None
+        x, y, _ = self._samples[-1]
+        lead = min(self.lead if lead is None else lead, self.max_lead)
+        motion = self.motion() if lead > 0 else None
+        if motion is None:
+            return x, y
+
+        vx, vy, ax, ay = motion
+        speed = math.hypot(vx, vy)
+        if speed < self.min_speed:
+            return x, y
+
+        dx, dy = vx * lead, vy * lead
+        # جمله شتاب فقط در جهت حرکت و حداکثر به اندازه جمله سرعت (بدون برگشت مسیر)
+        along = (ax * vx + ay * vy) / speed * 0.5 * lead * lead * self.acceleration_gain
+        along = max(-speed * lead * 0.5, min(along, speed * lead))
+        dx += along * vx / speed
+        dy += along * vy / speed
+
+        distance = math.hypot(dx, dy)
+        if distance > self.max_displacement:
+            scale = self.max_displacement / distance
+            dx, dy = dx * scale, dy * scale
+            self.clamped += 1
+        self.predictions += 1
+        return x + dx, y + dy
+
+    def get_stats(self):
+        return {"lead_ms": self.lead * 1000, "predictions": self.predictions, "clamped": self.clamped}
+
+
+def _fingertip_track(recording, frame_size, hand="Right", landmark=8):
+    """زمان و مکان پیکسلی یک نقطه دست در فریم‌هایی که آن دست دیده شده است"""
+    times, points = [], []
+    width, height = frame_size
+    for i in range(len(recording)):
+        left, right = recording.hands(i)
+        landmarks = right if hand == "Right" else left
+        if landmarks is not None:
+            times.append(float(recording.timestamps[i]))
+            points.append((landmarks[landmark, 0] * width, landmarks[landmark, 1] * height))
+    return np.asarray(times), np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def evaluate_prediction(recording, lead, predictor=None, frame_size=(1280, 720), hand="Right", landmark=8):
+    """
+    اندازه‌گیری خطای پیش‌بینی روی جلسه ضبط شده
+
+    برای هر فریم، مکان پیش‌بینی شده پس از lead ثانیه با مکان واقعی ضبط شده در همان
+    زمان (درون‌یابی خطی بین فریم‌ها) مقایسه می‌شود. خطای حالت بدون پیش‌بینی (استفاده
+    از آخرین مکان) هم برای مقایسه گزارش می‌شود.
+
+    Args:
+        recording: LandmarkRecording
+        lead: زمان پیش‌بینی (ثانیه)، مثلاً تأخیر p50 حلقه اصلی
+        predictor: FingertipPredictor (پیش‌فرض با تنظیمات پیش‌فرض)
+        frame_size: ابعاد تصویر برای تبدیل مختصات نرمال شده به پیکسل
+
+    Returns:
+        دیکشنری خطای میانگین، p95 و حداکثر (پیکسل) با و بدون پیش‌بینی
+    """
+    predictor = predictor or FingertipPredictor()
+    times, points = _fingertip_track(recording, frame_size, hand, landmark)
+
+    predicted_errors, baseline_errors = [], []
+    for i in range(len(times)):
+        if i and times[i] - times[i - 1] > 0.25:
+            predictor.reset()
+        predictor.update(points[i, 0], points[i, 1], times[i])
+        target = times[i] + lead
+        # فقط تا جایی که دست در زمان هدف هم دیده شده است
+        j = np.searchsorted(times, target)
+        if j == 0 or j >= len(times) or times[j] - times[j - 1] > 0.25:
+            continue
+        w = (target - times[j - 1]) / (times[j] - times[j - 1])
+        actual = points[j - 1] + w * (points[j] - points[j - 1])
+        px, py = predictor.predict(lead)
+        predicted_errors.append(math.hypot(px - actual[0], py - actual[1]))
+        baseline_errors.append(math.hypot(points[i, 0] - actual[0], points[i, 1] - actual[1]))
+
+    def summary(errors):
+        if not errors:
+            return {"mean_px": 0.0, "p95_px": 0.0, "max_px": 0.0}
+        errors = np.asarray(errors)
+        return {"mean_px": float(errors.mean()), "p95_px": float(np.percentile(errors, 95)),
+                "max_px": float(errors.max())}
+
+    return {"samples": len(predicted_errors), "lead_ms": lead * 1000,
+            "predicted": summary(predicted_errors), "baseline": summary(baseline_errors)}
+
+
+# ارزیابی از خط فرمان
+if __name__ == "__main__":
+    import argparse
+    from landmark_recording import LandmarkRecording
+
+    parser = argparse.ArgumentParser(description="ارزیابی پیش‌بینی حرکت نوک انگشت روی جلسه ضبط شده")
+    parser.add_argument("recording", help="مسیر فایل ضبط شده")
+    parser.add_argument("--lead", type=float, default=0.05, help="زمان پیش‌بینی (ثانیه)")
+    parser.add_argument("--width", type=int, default=1280, help="عرض تصویر ضبط شده")
+    parser.add_argument("--height", type=int, default=720, help="ارتفاع تصویر ضبط شده")
+    args = parser.parse_args()
+
+    result = evaluate_prediction(LandmarkRecording(args.recording), args.lead, frame_size=(args.width, args.height))
+    print(f"{result['samples']} نمونه، پیش‌بینی {result['lead_ms']:.0f} ms")
+    for name in ("baseline", "predicted"):
+        stats = result[name]
+        print(f"{name:<10} mean {stats['mean_px']:.1f}  p95 {stats['p95_px']:.1f}  max {stats['max_px']:.1f} px")
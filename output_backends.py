@@ -0,0 +1,290 @@
+"""
+لایه خروجی دستورات (ماوس، کیبورد و صدای سیستم) با پیاده‌سازی‌های قابل تعویض
+Pluggable output backends: pyautogui, pycaw and an in-memory action recorder
+"""
+
+import time
+from collections import Counter
+
+# ماوس و کیبورد
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    # روی لینوکس بدون display، import خود pyautogui خطا می‌دهد
+    PYAUTOGUI_AVAILABLE = False
+
+# صدای سیستم (فقط ویندوز)
+try:
+    from ctypes import cast, POINTER
+    from comtypes import CLSCTX_ALL
+    from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+    PYCAW_AVAILABLE = True
+except ImportError:
+    PYCAW_AVAILABLE = False
+
+OUTPUT_BACKENDS = ("system", "recording")
+
+
+class OutputBackend:
+    """
+    رابط خروجی دستورات
+
+    کنترلرها همه دستورات را از این رابط اجرا می‌کنند؛ پیاده‌سازی‌ها ممکن است فقط
+    بخشی از آن (مثلاً فقط صدا) را پشتیبانی کنند.
+    """
+
+    # ماوس
+    def move_to(self, x, y):
+        raise NotImplementedError
+
+    def click(self):
+        raise NotImplementedError
+
+    def right_click(self):
+        raise NotImplementedError
+
+    def mouse_down(self, button="left"):
+        raise NotImplementedError
+
+    def mouse_up(self, button="left"):
+        raise NotImplementedError
+
+    def scroll(self, clicks):
+        raise NotImplementedError
+
+    def screen_size(self):
+        """ابعاد صفحه نمایش (عرض، ارتفاع)"""
+        raise NotImplementedError
+
+    # کیبورد
+    def press(self, key):
+        """فشردن یک کلید ("enter"، "space"، "a")؛ کیبورد فارسی کلید هم‌مکان لاتین را می‌فرستد"""
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        raise NotImplementedError
+
+    # صدا
+    def volume_range(self):
+        """
+        محدوده صدای سیستم (حداقل، حداکثر) به دسی‌بل
+
+        Returns:
+            (min, max) یا None اگر کنترل صدا در دسترس نباشد
+        """
+        return None
+
+    def set_volume(self, level):
+        """تنظیم صدای سیستم (دسی‌بل، در محدوده volume_range)"""
+        raise NotImplementedError
+
+
+class PyAutoGUIBackend(OutputBackend):
+    def __init__(self):
+        """ماوس و کیبورد واقعی از طریق pyautogui"""
+        if not PYAUTOGUI_AVAILABLE:
+            raise ImportError("pyautogui در دسترس نیست")
+
+    def move_to(self, x, y):
+        pyautogui.moveTo(x, y)
+
+    def click(self):
+        pyautogui.click()
+
+    def right_click(self):
+        pyautogui.rightClick()
+
+    def mouse_down(self, button="left"):
+        pyautogui.mouseDown(button=button)
+
+    def mouse_up(self, button="left"):
+        pyautogui.mouseUp(button=button)
+
+    def scroll(self, clicks):
+        pyautogui.scroll(clicks)
+
+    def screen_size(self):
+        return pyautogui.size()
+
+    def press(self, key):
+        pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        pyautogui.hotkey(*keys)
+
+
+class PycawBackend(OutputBackend):
+    def __init__(self):
+        """کنترل صدای سیستم ویندوز از طریق pycaw"""
+        if not PYCAW_AVAILABLE:
+            raise ImportError("pycaw در دسترس نیست")
+        devices = AudioUtilities.GetSpeakers()
+        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.volume = cast(interface, POINTER(IAudioEndpointVolume))
+        volRange = self.volume.GetVolumeRange()
+        self._range = (volRange[0], volRange[1])
+
+    def volume_range(self):
+        return self._range
+
+    def set_volume(self, level):
+        self.volume.SetMasterVolumeLevel(level, None)
+
+
+class SystemBackend(OutputBackend):
+    def __init__(self, input_backend, volume_backend=None):
+        """
+        ترکیب یک خروجی ماوس/کیبورد و یک خروجی صدا
+
+        Args:
+            input_backend: خروجی ماوس و کیبورد (مثلاً PyAutoGUIBackend)
+            volume_backend: خروجی صدا (مثلاً PycawBackend) یا None
+        """
+        self.input = input_backend
+        self.audio = volume_backend
+
+    def move_to(self, x, y):
+        self.input.move_to(x, y)
+
+    def click(self):
+        self.input.click()
+
+    def right_click(self):
+        self.input.right_click()
+
+    def mouse_down(self, button="left"):
+        self.input.mouse_down(button)
+
+    def mouse_up(self, button="left"):
+        self.input.mouse_up(button)
+
+    def scroll(self, clicks):
+        self.input.scroll(clicks)
+
+    def screen_size(self):
+        return self.input.screen_size()
+
+    def press(self, key):
+        self.input.press(key)
+
+    def hotkey(self, *keys):
+        self.input.hotkey(*keys)
+
+    def volume_range(self):
+        return self.audio.volume_range() if self.audio is not None else None
+
+    def set_volume(self, level):
+        if self.audio is None:
+            # volume_range() در این حالت None است
+            raise RuntimeError("کنترل صدای سیستم در دسترس نیست (دستگاه صوتی یا pycaw پیدا نشد)")
+        self.audio.set_volume(level)
+
+
+class RecordedAction:
+    """یک دستور ثبت شده"""
+    __slots__ = ("timestamp", "name", "args")
+
+    def __init__(self, timestamp, name, args):
+        self.timestamp = timestamp
+        self.name = name
+        self.args = args
+
+    def __repr__(self):
+        return f"RecordedAction({self.timestamp:.3f}, {self.name!r}, {self.args!r})"
+
+
+class RecordingBackend(OutputBackend):
+    def __init__(self, screen_size=(1920, 1080), volume_range=(-65.25, 0.0), clock=time.perf_counter,
+                 forward=None):
+        """
+        ثبت دستورات در حافظه به همراه زمان (بدون نیاز به display و کارت صدا)
+
+        برای بررسی درستی دستورات جلسات پخش شده و اندازه‌گیری نرخ دستورات.
+
+        Args:
+            screen_size: ابعاد صفحه فرضی
+            volume_range: محدوده صدای فرضی (دسی‌بل) یا None برای غیرفعال بودن کنترل صدا
+            clock: تابع زمان؛ هنگام پخش مجدد می‌توان زمان فریم کنترلر را داد
+            forward: خروجی دیگری که دستورات پس از ثبت به آن هم فرستاده می‌شوند
+        """
+        self._screen_size = tuple(screen_size)
+        self._volume_range = tuple(volume_range) if volume_range else None
+        self.clock = clock
+        self.forward = forward
+        self.actions = []
+
+    def _record(self, name, *args):
+        self.actions.append(RecordedAction(self.clock(), name, args))
+        if self.forward is not None:
+            getattr(self.forward, name)(*args)
+
+    def move_to(self, x, y):
+        self._record("move_to", x, y)
+
+    def click(self):
+        self._record("click")
+
+    def right_click(self):
+        self._record("right_click")
+
+    def mouse_down(self, button="left"):
+        self._record("mouse_down", button)
+
+    def mouse_up(self, button="left"):
+        self._record("mouse_up", button)
+
+    def scroll(self, clicks):
+        self._record("scroll", clicks)
+
+    def screen_size(self):
+        return self._screen_size
+
+    def press(self, key):
+        self._record("press", key)
+
+    def hotkey(self, *keys):
+        self._record("hotkey", *keys)
+
+    def volume_range(self):
+        return self._volume_range
+
+    def set_volume(self, level):
+        self._record("set_volume", level)
+
+    def clear(self):
+        """پاک کردن دستورات ثبت شده"""
+        self.actions.clear()
+
+    def names(self, exclude=("move_to", "set_volume")):
+        """دنباله نام دستورات (بدون دستورات پیوسته مانند حرکت ماوس) برای مقایسه با دنباله مورد انتظار"""
+        return [action.name for action in self.actions if action.name not in exclude]
+
+    def get_stats(self):
+        """تعداد هر دستور و نرخ دستورات در ثانیه (بر اساس clock)"""
+        stats = {"total": len(self.actions), "counts": dict(Counter(action.name for action in self.actions))}
+        if len(self.actions) > 1:
+            span = self.actions[-1].timestamp - self.actions[0].timestamp
+            stats["seconds"] = span
+            stats["rate"] = (len(self.actions) - 1) / span if span > 0 else 0.0
+        return stats
+
+
+def create_output_backend(name="system"):
+    """
+    ساخت خروجی دستورات
+
+    Args:
+        name: "system" (pyautogui و در صورت امکان pycaw) یا "recording" (ثبت در حافظه)
+    """
+    if name == "recording":
+        return RecordingBackend()
+    if name != "system":
+        raise ValueError(f"خروجی نامعتبر: {name}")
+
+    try:
+        volume = PycawBackend()
+    except Exception as e:
+        print(f"❌ کنترل صدای سیستم در دسترس نیست: {e}")
+        volume = None
+    return SystemBackend(PyAutoGUIBackend(), volume)
@@ -0,0 +1,130 @@
+"""
+ترکیب متن‌ها و پس‌زمینه‌های نیمه شفاف HUD روی تصویر بدون کپی کل فریم
+Allocation-free overlay compositor for translucent HUD labels
+"""
+
+import cv2
+import numpy as np
+
+
+class OverlayCompositor:
+    def __init__(self, font=cv2.FONT_HERSHEY_SIMPLEX, max_cached_sizes=256):
+        """
+        جمع‌آوری برچسب‌های یک فریم و رسم همه آن‌ها در پایان فریم
+
+        فقط کادر برچسب‌ها با تصویر ترکیب می‌شود (نه کل فریم) و برچسب‌های هم‌شفافیت
+        در یک مرحله ترکیب می‌شوند. بافر کمکی یک بار تخصیص می‌یابد و فقط در صورت
+        نیاز بزرگتر می‌شود.
+
+        Args:
+            font: فونت OpenCV برای متن‌ها
+            max_cached_sizes: حداکثر تعداد اندازه متن‌های ذخیره شده
+        """
+        self.font = font
+        self.max_cached_sizes = max_cached_sizes
+        self._labels = []
+        self._text_sizes = {}
+        self._buffer = np.empty(0, np.uint8)
+
+        # آمار
+        self.blend_passes = 0
+        self.blended_pixels = 0
+
+    def _text_size(self, text, font_scale, thickness):
+        key = (text, font_scale, thickness)
+        size = self._text_sizes.get(key)
+        if size is None:
+            if len(self._text_sizes) >= self.max_cached_sizes:
+                self._text_sizes.clear()
+            size = cv2.getTextSize(text, self.font, font_scale, thickness)
+            self._text_sizes[key] = size
+        return size
+
+    def _scratch(self, height, width):
+        """بافر کمکی پیوسته (height, width, 3) بدون تخصیص حافظه جدید"""
+        needed = height * width * 3
+        if self._buffer.size < needed:
+            self._buffer = np.empty(needed, np.uint8)
+        return self._buffer[:needed].reshape(height, width, 3)
+
+    def add_label(self, text, position, font_scale=1, color=(255, 255, 255), thickness=2, bg_color=(0, 0, 0, 128)):
+        """
+        افزودن متن با پس‌زمینه نیمه شفاف به فریم جاری
+
+        Args:
+            text: متن
+            position: نقطه شروع خط پایه متن (x, y)
+            bg_color: رنگ پس‌زمینه (B, G, R) یا (B, G, R, A)؛ بدون A شفافیت 0.5 است
+        """
+        (text_width, text_height), baseline = self._text_size(text, font_scale, thickness)
+        # مختصات کادر شامل نقطه پایین-راست است (مانند cv2.rectangle)
+        rect = (position[0] - 5, position[1] - text_height - 10,
+                position[0] + text_width + 5, position[1] + baseline)
+        alpha = bg_color[3] / 255.0 if len(bg_color) > 3 else 0.5
+        self._labels.append((rect, tuple(bg_color[:3]), alpha, text, tuple(position), font_scale, color, thickness))
+
+    def clear(self):
+        """دور ریختن برچسب‌های فریم جاری"""
+        self._labels.clear()
+
+    def flush(self, image):
+        """
+        رسم همه برچسب‌های فریم جاری روی تصویر (درجا)
+
+        Args:
+            image: تصویر BGR یا None (در حالت headless فقط صف خالی می‌شود)
+
+        Returns:
+            همان تصویر
+        """
+        if not self._labels:
+            return image
+
+        if image is not None:
+            groups = {}
+            for rect, bg_color, alpha, *_ in self._labels:
+                groups.setdefault(alpha, []).append((rect, bg_color))
+            for alpha, rects in groups.items():
+                self._blend(image, rects, alpha)
+
+            for _, _, _, text, position, font_scale, color, thickness in self._labels:
+                cv2.putText(image, text, position, self.font, font_scale, color, thickness, cv2.LINE_AA)
+
+        self._labels.clear()
+        return image
+
+    def _blend(self, image, rects, alpha):
+        """ترکیب کادرهای هم‌شفافیت با تصویر"""
+        height, width = image.shape[:2]
+
+        clipped = []
+        area = 0
+        for (x0, y0, x1, y1), bg_color in rects:
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1 + 1, width), min(y1 + 1, height)
+            if x1 > x0 and y1 > y0:
+                clipped.append(((x0, y0, x1, y1), bg_color))
+                area += (x1 - x0) * (y1 - y0)
+        if not clipped:
+            return
+
+        ux0 = min(rect[0] for rect, _ in clipped)
+        uy0 = min(rect[1] for rect, _ in clipped)
+        ux1 = max(rect[2] for rect, _ in clipped)
+        uy1 = max(rect[3] for rect, _ in clipped)
+
+        # برچسب‌های نزدیک به هم در یک مرحله؛ برچسب‌های پراکنده هر کدام جداگانه
+        if (ux1 - ux0) * (uy1 - uy0) <= 2 * area:
+            regions = [((ux0, uy0, ux1, uy1), clipped)]
+        else:
+            regions = [(rect, [(rect, bg_color)]) for rect, bg_color in clipped]
+
+        for (x0, y0, x1, y1), members in regions:
+            target = image[y0:y1, x0:x1]
+            scratch = self._scratch(y1 - y0, x1 - x0)
+            np.copyto(scratch, target)
+            for (rx0, ry0, rx1, ry1), bg_color in members:
+                cv2.rectangle(scratch, (rx0 - x0, ry0 - y0), (rx1 - x0 - 1, ry1 - y0 - 1), bg_color, cv2.FILLED)
+            cv2.addWeighted(scratch, alpha, target, 1 - alpha, 0, dst=target)
+            self.blend_passes += 1
+            self.blended_pixels += (x1 - x0) * (y1 - y0)
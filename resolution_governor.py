@@ -0,0 +1,188 @@
+"""
+تنظیم خودکار رزولوشن ورودی مدل و نرخ پردازش فریم بر اساس زمان مراحل پردازش
+Adaptive inference resolution and frame-rate governor
+"""
+
+import cv2
+
+# اندازه دریافت تصویر برای گزینه "کیفیت تصویر" در تنظیمات
+CAPTURE_QUALITIES = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+DEFAULT_QUALITY = "720p"
+
+# پله‌های کیفیت از بهترین به ارزان‌ترین: (مقیاس ورودی مدل نسبت به تصویر دریافتی، حداکثر فریم پردازش شده در ثانیه)
+# ابتدا رزولوشن مدل کم می‌شود و بعد از آن نرخ پردازش
+DEFAULT_LEVELS = (
+    (1.0, None),
+    (0.75, None),
+    (0.5, None),
+    (0.5, 20),
+    (0.375, 15),
+    (0.375, 10),
+)
+
+
+def capture_size_for_quality(quality):
+    """ابعاد دریافت تصویر (عرض، ارتفاع) برای گزینه کیفیت؛ مقدار نامعتبر = 720p"""
+    return CAPTURE_QUALITIES.get(quality, CAPTURE_QUALITIES[DEFAULT_QUALITY])
+
+
+class ResolutionGovernor:
+    def __init__(self, budgets=None, levels=DEFAULT_LEVELS, headroom=0.6,
+                 hold_frames=30, smoothing=0.1):
+        """
+        کاهش و افزایش خودکار هزینه پردازش بر اساس بودجه زمانی هر مرحله
+
+        اندازه دریافت تصویر ثابت می‌ماند و فقط تصویر ورودی مدل کوچک می‌شود؛ چون خروجی
+        مدل نرمال شده است، مختصات پیکسلی نقاط دست همیشه در فضای تصویر دریافتی هستند.
+
+        زمان پردازش هر فریم (بدون نمایش تصویر) در پله‌های بدون محدودیت نرخ با بودجه
+        "processing" مقایسه می‌شود. محدود کردن نرخ زمان یک فریم را کم نمی‌کند، پس در پله‌های
+        محدود شده بار پردازش (زمان پردازش × فریم پردازش شده در ثانیه) با بودجه "load" مقایسه
+        می‌شود.
+
+        Args:
+            budgets: بودجه هر معیار، مثلاً {"inference": 0.02, "processing": 0.033, "load": 0.75}
+                     (زمان‌ها به ثانیه، load نسبت زمان صرف شده برای پردازش)
+            levels: پله‌های (مقیاس ورودی مدل، حداکثر فریم بر ثانیه یا None)
+            headroom: اگر زمان همه مراحل کمتر از این نسبت بودجه باشد، یک پله کیفیت بالا می‌رود
+            hold_frames: حداقل تعداد فریم بین دو تغییر پله (جلوگیری از نوسان)
+            smoothing: ضریب میانگین متحرک نمایی زمان مراحل
+        """
+        self.budgets = budgets or {"inference": 0.020, "processing": 0.033, "load": 0.75}
+        self.levels = levels
+        self.headroom = headroom
+        self.hold_frames = hold_frames
+        self.smoothing = smoothing
+
+        self.enabled = True
+        self.level = 0
+        self.averages = {}
+        self.frames_since_change = 0
+        self.last_processed_time = None
+        self.processed_interval = None  # میانگین فاصله فریم‌های پردازش شده (ثانیه)
+
+        # آمار
+        self.step_downs = 0
+        self.step_ups = 0
+        self.skipped_frames = 0
+
+    @property
+    def inference_scale(self):
+        """مقیاس فعلی ورودی مدل نسبت به تصویر دریافتی"""
+        return self.levels[self.level][0] if self.enabled else 1.0
+
+    @property
+    def max_fps(self):
+        """حداکثر فریم پردازش شده در ثانیه (None یعنی بدون محدودیت)"""
+        return self.levels[self.level][1] if self.enabled else None
+
+    def should_process(self, timestamp):
+        """
+        آیا فریم دریافت شده در این زمان باید پردازش شود
+
+        Args:
+            timestamp: زمان دریافت فریم
+        """
+        max_fps = self.max_fps
+        if max_fps and self.last_processed_time is not None \
+                and timestamp - self.last_processed_time < 1.0 / max_fps:
+            self.skipped_frames += 1
+            return False
+        if self.last_processed_time is not None:
+            interval = timestamp - self.last_processed_time
+            self.processed_interval = interval if self.processed_interval is None else \
+                self.processed_interval + self.smoothing * (interval - self.processed_interval)
+        self.last_processed_time = timestamp
+        return True
+
+    @property
+    def load(self):
+        """نسبت زمان صرف شده برای پردازش (زمان پردازش × فریم پردازش شده در ثانیه)"""
+        processing = self.averages.get("processing")
+        if processing is None or not self.processed_interval:
+            return None
+        return processing / self.processed_interval
+
+    def resize_for_inference(self, image):
+        """کوچک کردن تصویر (یا ناحیه برش) به اندازه ورودی فعلی مدل"""
+        scale = self.inference_scale
+        if scale >= 1.0:
+            return image
+        height, width = image.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def update(self, timings):
+        """
+        ثبت زمان مراحل یک فریم و در صورت نیاز تغییر پله
+
+        Args:
+            timings: دیکشنری نام مرحله -> زمان به ثانیه ("processing" زمان کل فریم بدون نمایش)
+
+        Returns:
+            True اگر پله تغییر کرد
+        """
+        for stage, seconds in timings.items():
+            average = self.averages.get(stage)
+            self.averages[stage] = seconds if average is None else \
+                average + self.smoothing * (seconds - average)
+
+        self.frames_since_change += 1
+        if not self.enabled or self.frames_since_change < self.hold_frames:
+            return False
+
+        watched = self._watched(self.level, self.load)
+        if not watched:
+            return False
+
+        if any(value > budget for value, budget in watched):
+            if self.level < len(self.levels) - 1:
+                self.level += 1
+                self.step_downs += 1
+                self._level_changed()
+                return True
+        elif all(value < budget * self.headroom for value, budget in watched) and self.level > 0:
+            # پله بالاتر نباید با همین زمان‌ها از بودجه خودش بیشتر شود (جلوگیری از نوسان)
+            processing = self.averages.get("processing")
+            max_fps = self.levels[self.level - 1][1]
+            predicted_load = processing * max_fps if processing is not None and max_fps else None
+            if all(value <= budget for value, budget in self._watched(self.level - 1, predicted_load)):
+                self.level -= 1
+                self.step_ups += 1
+                self._level_changed()
+                return True
+        return False
+
+    def _watched(self, level, load):
+        """(مقدار، بودجه) معیارهای یک پله: inference همیشه، processing یا load بسته به محدودیت نرخ"""
+        watched = []
+        if "inference" in self.budgets and "inference" in self.averages:
+            watched.append((self.averages["inference"], self.budgets["inference"]))
+        if self.levels[level][1] is None:
+            if "processing" in self.budgets and "processing" in self.averages:
+                watched.append((self.averages["processing"], self.budgets["processing"]))
+        elif "load" in self.budgets and load is not None:
+            watched.append((load, self.budgets["load"]))
+        return watched
+
+    def _level_changed(self):
+        # میانگین‌ها مربوط به پله قبلی هستند و از نو اندازه‌گیری می‌شوند
+        self.frames_since_change = 0
+        self.averages.clear()
+
+    def get_stats(self):
+        """وضعیت فعلی برای نمایش"""
+        return {
+            "level": self.level,
+            "inference_scale": self.inference_scale,
+            "max_fps": self.max_fps,
+            "step_downs": self.step_downs,
+            "step_ups": self.step_ups,
+            "skipped_frames": self.skipped_frames,
+            "load": self.load,
+            "averages_ms": {stage: value * 1000 for stage, value in self.averages.items()},
+        }
@@ -0,0 +1,114 @@
+"""
+اجرای مدل روی ناحیه اطراف دست‌های فریم قبلی به جای کل تصویر
+ROI-cropped inference driven by the previous frame's hand bounding boxes
+"""
+
+
+class RoiTracker:
+    def __init__(self, frame_width, frame_height, margin=0.35, full_frame_interval=30,
+                 min_size=192, max_area_ratio=0.6):
+        """
+        انتخاب ناحیه برش برای اجرای مدل
+
+        Args:
+            frame_width, frame_height: ابعاد فریم کامل
+            margin: حاشیه اطراف کادر دست‌ها به نسبت اندازه کادر
+            full_frame_interval: هر چند فریم یک بار کل تصویر بررسی شود (برای پیدا کردن دست جدید)
+            min_size: حداقل عرض و ارتفاع ناحیه برش
+            max_area_ratio: اگر ناحیه از این نسبت کل تصویر بزرگتر باشد، کل تصویر استفاده می‌شود
+        """
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.margin = margin
+        self.full_frame_interval = full_frame_interval
+        self.min_size = min_size
+        self.max_area_ratio = max_area_ratio
+
+        self.enabled = True
+        self.roi = None
+        self.frames_since_full = 0
+
+        # آمار
+        self.cropped_frames = 0
+        self.full_frames = 0
+        self.misses = 0
+
+    def set_frame_size(self, width, height):
+        """تغییر ابعاد فریم کامل"""
+        self.frame_width = width
+        self.frame_height = height
+        self.roi = None
+
+    def next_roi(self):
+        """
+        ناحیه مورد استفاده برای فریم بعد
+
+        Returns:
+            (x0, y0, x1, y1) در مختصات پیکسل یا None برای کل تصویر
+        """
+        if not self.enabled or self.roi is None or self.frames_since_full >= self.full_frame_interval:
+            self.frames_since_full = 0
+            self.full_frames += 1
+            return None
+        self.frames_since_full += 1
+        self.cropped_frames += 1
+        return self.roi
+
+    def report_miss(self):
+        """دستی در ناحیه برش پیدا نشد؛ فریم بعد کل تصویر بررسی می‌شود"""
+        self.misses += 1
+        self.roi = None
+
+    def update(self, hands):
+        """
+        به‌روزرسانی ناحیه بر اساس دست‌های پیدا شده در فریم جاری
+
+        Args:
+            hands: لیست آرایه‌های (21, 3) نقاط دست در مختصات پیکسل فریم کامل
+        """
+        if not hands:
+            self.roi = None
+            return
+
+        x0 = min(float(points[:, 0].min()) for points in hands)
+        y0 = min(float(points[:, 1].min()) for points in hands)
+        x1 = max(float(points[:, 0].max()) for points in hands)
+        y1 = max(float(points[:, 1].max()) for points in hands)
+
+        # تا وقتی دست‌ها داخل ناحیه فعلی هستند، ناحیه تغییر نمی‌کند تا ورودی مدل پایدار بماند
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            pad_x = (rx1 - rx0) * 0.05
+            pad_y = (ry1 - ry0) * 0.05
+            if x0 - pad_x >= rx0 and y0 - pad_y >= ry0 and x1 + pad_x <= rx1 and y1 + pad_y <= ry1:
+                return
+
+        self.roi = self._expand(x0, y0, x1, y1)
+
+    def _expand(self, x0, y0, x1, y1):
+        """اضافه کردن حاشیه و محدود کردن به ابعاد فریم"""
+        w = max(x1 - x0, 1.0)
+        h = max(y1 - y0, 1.0)
+        # ناحیه مربعی اطراف دست، چون اندازه دست در دو محور نزدیک به هم است
+        side = max(w, h) * (1 + 2 * self.margin)
+        half_w = max(side, self.min_size) / 2
+        half_h = max(side, self.min_size) / 2
+        cx = (x0 + x1) / 2
+        cy = (y0 + y1) / 2
+
+        rx0 = int(max(0, cx - half_w))
+        ry0 = int(max(0, cy - half_h))
+        rx1 = int(min(self.frame_width, cx + half_w))
+        ry1 = int(min(self.frame_height, cy + half_h))
+
+        if (rx1 - rx0) * (ry1 - ry0) > self.max_area_ratio * self.frame_width * self.frame_height:
+            return None
+        return rx0, ry0, rx1, ry1
+
+    def get_stats(self):
+        """آمار استفاده از ناحیه برش"""
+        return {
+            "cropped_frames": self.cropped_frames,
+            "full_frames": self.full_frames,
+            "misses": self.misses,
+        }
@@ -5,51 +5,93 @@ Fixed Runner for Hand Controller Pro v3.0
 
 import sys
 import os
+import argparse
 import cv2
 import mediapipe as mp
 import time
 import numpy as np
-import pyautogui
 import math
 import threading
 import json
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-import customtkinter as ctk
-from PIL import Image, ImageTk
+
+# رابط کاربری برای حالت headless لازم نیست
+try:
+    import customtkinter as ctk
+    from PIL import Image, ImageTk
+    GUI_AVAILABLE = True
+except ImportError:
+    GUI_AVAILABLE = False
 
 # اضافه کردن مسیر فعلی به sys.path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from frame_capture import FrameGrabber
+from frame_sources import open_frame_source
+from landmark_recording import LandmarkRecorder, landmarks_from_results
+from hand_landmarks import HandLandmarkArrays
+from roi_tracker import RoiTracker
+from latency_stats import PipelineProfiler
+from actuation import ActuationWorker
+from output_backends import create_output_backend
+from screen_geometry import ScreenGeometry, ScreenMapper
+from motion_prediction import FingertipPredictor, LATENCY_STAGES
+from cursor_filters import create_cursor_filter, CURSOR_FILTERS
+from overlay import OverlayCompositor
+from virtual_keyboard import KeyboardLayer, KeyGrid, build_keyboard, KEYBOARD_LAYOUTS
+from resolution_governor import ResolutionGovernor, capture_size_for_quality, DEFAULT_QUALITY
+from hand_features import HandFeatureCache, HandFeatureTracker
+from temporal_gestures import TemporalGestureRecognizer
+from gesture_table import GestureTable, default_gestures, MODE_LABELS
+
 try:
     from local_ai_controller import LocalAIController
     AI_AVAILABLE = True
-except ImportError:
+except Exception:
+    # pyautogui (وابستگی کنترل صوتی) روی لینوکس بدون display هنگام import خطا می‌دهد
     AI_AVAILABLE = False
     print("کنترلر AI در دسترس نیست.........................")
 
 class FixedHandController:
-    def __init__(self):
-        """کنترلر دست اصلاح شده"""
+    def __init__(self, frame_source=None, capture_quality=DEFAULT_QUALITY, headless=False, output=None, cursor_filter="one_euro",
+                 predict=False):
+        """
+        کنترلر دست اصلاح شده
+        
+        Args:
+            frame_source: منبع تصویر (پیش‌فرض دوربین) - open_frame_source را ببینید
+            capture_quality: کیفیت دریافت تصویر ("480p"، "720p" یا "1080p")
+            headless: اجرای موتور ژست بدون پنجره، پیش‌نمایش و رسم روی تصویر
+            output: خروجی دستورات ماوس، کیبورد و صدا (پیش‌فرض pyautogui و pycaw) - output_backends را ببینید
+            cursor_filter: فیلتر هموارسازی مکان‌نما ("one_euro"، "kalman"، "legacy" یا یک CursorFilter)
+            predict: پیش‌بینی مکان نوک انگشت در لحظه اجرای حرکت ماوس (جبران تأخیر دوربین و پردازش)
+        """
         print("🚀 در حال راه‌اندازی Hand Controller Pro v3.0...")
         
         # راه‌اندازی اولیه
-        self.setup_camera()
+        self.headless = headless
+        self.output = output if output is not None else create_output_backend()
+        self.setup_camera(frame_source, capture_quality)
         self.setup_mediapipe()
         self.setup_audio()
-        self.setup_ai_controller()
+        # موتور headless فقط تصویر -> مدل -> ژست -> دستور است؛ بدون کنترل صوتی
+        self.ai_controller = None
+        if not headless:
+            self.setup_ai_controller()
         
         # متغیرهای کنترل
         self.state = "CALIBRATING"
         self.last_state_change_time = 0
         self.calibration_step = 0
         self.calibration_timer = time.time()
+        self.frame_time = time.time() # زمان دریافت فریم جاری (ساعت منطق ژست‌ها)
         
         # متغیرهای ماوس
-        self.smoothening = 5
-        self.plocX, self.plocY = 0, 0
+        # هموارسازی مکان‌نما (legacy همان هموارسازی قبلی با smoothening = 5 است)
+        self.cursor_filter = create_cursor_filter(cursor_filter) if isinstance(cursor_filter, str) else cursor_filter
+        self.predictor = FingertipPredictor() if predict else None
         self.is_dragging = False
+        self.pinch_dragging = False # کشیدن با نیشگون شست و اشاره
+        self.cursor_frame_time = None
         self.click_cooldown = 0
         self.CLICK_DELAY = 0.25
         
@@ -62,7 +104,8 @@ class FixedHandController:
         
         # متغیرهای رابط کاربری
         self.root = None
-        self.setup_gui()
+        if not headless:
+            self.setup_gui()
         
         # متغیرهای تجاری
         self.session_data = {
@@ -77,28 +120,34 @@ class FixedHandController:
         
         # قابلیت‌های پیشرفته
         self.gesture_history = []
-        self.performance_metrics = {}
-        self.previous_hand_landmarks = {'left': None, 'right': None} # برای ردیابی ژست‌های پیچیده‌تر
+        self.performance_metrics = {} # خلاصه p50/p95/p99 زمان مراحل حلقه اصلی (میلی‌ثانیه)
+        self.profiler = PipelineProfiler()
+        self.actuator = ActuationWorker() # اجرای ماوس و کیبورد خارج از حلقه پردازش تصویر
+        self.overlay = OverlayCompositor()
+        self.hand_tracker = HandFeatureTracker() # مرکز، کادر، اندازه کف دست و سرعت هر دست (فریم جاری و قبلی)
+        self.temporal = TemporalGestureRecognizer() # تاریخچه حلقوی هر دست برای ژست‌های پویا
+        self.gestures = GestureTable(default_gestures()) # ژست‌های تک دستی (اسکرول، ماوس و تغییر حالت)
+        self.landmark_recorder = None
         
         print("✅ راه‌اندازی کامل شد!")
         
-    def setup_camera(self):
-        """راه‌اندازی دوربین"""
-        self.wCam, self.hCam = 1280, 720
-        # تلاش برای باز کردن دوربین‌های مختلف
-        for camera_id in [ 1, 2]:
-            self.cap = cv2.VideoCapture(camera_id)
-            if self.cap.isOpened():
-                print(f"✅ دوربین {camera_id} با موفقیت باز شد")
-                break
-        else:
-            print("❌ هیچ دوربینی پیدا نشد!")
-            self.cap = cv2.VideoCapture(0)  # fallback به دوربین پیش‌فرض
-            
-        self.cap.set(3, self.wCam)
-        self.cap.set(4, self.hCam)
+    def setup_camera(self, frame_source=None, capture_quality=DEFAULT_QUALITY):
+        """راه‌اندازی دوربین یا منبع تصویر جایگزین (ویدیو، پوشه تصاویر، مصنوعی)"""
+        self.frame_source = open_frame_source(frame_source, *capture_size_for_quality(capture_quality))
+        self.wCam, self.hCam = self.frame_source.size
         self.frame_reduction = 100
         
+        # ابعاد مانیتورها یک بار خوانده و با تغییر آن‌ها به‌روز می‌شود؛ نگاشت تصویر به صفحه از پیش محاسبه شده است
+        self.screen_geometry = ScreenGeometry(self.output)
+        self.screen_mapper = ScreenMapper(self.screen_geometry, (self.wCam, self.hCam), self.frame_reduction)
+        
+        # دریافت تصویر در thread جداگانه (همیشه تازه‌ترین فریم پردازش می‌شود)
+        self.frame_grabber = FrameGrabber(self.frame_source)
+        
+        # کاهش خودکار رزولوشن مدل و نرخ پردازش در صورت کند بودن سیستم (فقط برای منبع زنده)
+        self.governor = ResolutionGovernor()
+        self.governor.enabled = self.frame_source.is_live
+        
     def setup_mediapipe(self):
         """راه‌اندازی MediaPipe"""
         self.mp_hands = mp.solutions.hands
@@ -109,20 +158,22 @@ class FixedHandController:
             min_tracking_confidence=0.5
         )
         self.mp_drawing = mp.solutions.drawing_utils
+        self.hand_arrays = HandLandmarkArrays(self.wCam, self.hCam)
+        self.hand_features = HandFeatureCache()
+        
+        # اجرای مدل روی ناحیه اطراف دست‌های فریم قبلی (کاهش هزینه روی CPU)
+        self.roi_tracker = RoiTracker(self.wCam, self.hCam)
         print("✅ MediaPipe با موفقیت راه‌اندازی شد")
         
     def setup_audio(self):
         """راه‌اندازی کنترل صدا"""
-        try:
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            self.volume = cast(interface, POINTER(IAudioEndpointVolume))
-            volRange = self.volume.GetVolumeRange()
+        volRange = self.output.volume_range()
+        if volRange is not None:
             self.minVol, self.maxVol = volRange[0], volRange[1]
             self.volume_control_enabled = True
             print("✅ کنترل صدا فعال شد")
-        except Exception as e:
-            print(f"❌ خطا در راه‌اندازی کنترل صدا: {e}")
+        else:
+            print("❌ کنترل صدا در دسترس نیست")
             self.volume_control_enabled = False
             
     def setup_ai_controller(self):
@@ -140,6 +191,8 @@ class FixedHandController:
         
     def setup_gui(self):
         """راه‌اندازی رابط کاربری"""
+        if not GUI_AVAILABLE:
+            raise ImportError("customtkinter نصب نیست؛ برای اجرای بدون رابط کاربری از headless.py استفاده کنید")
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
         
@@ -210,184 +263,131 @@ class FixedHandController:
         )
         self.stats_label.pack(pady=10)
         
-    def setup_virtual_keyboard(self):
-        """راه‌اندازی کیبورد مجازی پیشرفته"""
-        class AdvancedButton:
-            def __init__(self, pos, text, size=[80, 80], color=(100, 0, 100)):
-                self.pos = pos
-                self.size = size
-                self.text = text
-                self.color = color
-                self.is_pressed = False
-                
-        # کیبورد فارسی و انگلیسی
-        self.keys = [
-            ["Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P"],
-            ["A", "S", "D", "F", "G", "H", "J", "K", "L", ";"],
-            ["Z", "X", "C", "V", "B", "N", "M", ",", ".", "/"],
-            ["1", "2", "3", "4", "5", "6", "7", "8", "9", "0"]
-        ]
-        
-        self.buttonList = []
-        for i in range(len(self.keys)):
-            for j, key in enumerate(self.keys[i]):
-                self.buttonList.append(AdvancedButton([100 * j + 50, 100 * i + 150], key))
-        
-        # دکمه‌های ویژه
-        self.buttonList.append(AdvancedButton([50, 450], "Space", [400, 80], (0, 100, 100)))
-        self.buttonList.append(AdvancedButton([460, 450], "<-", [100, 80], (100, 100, 0)))
-        self.buttonList.append(AdvancedButton([570, 450], "Enter", [100, 80], (0, 100, 0)))
-        self.buttonList.append(AdvancedButton([680, 450], "Exit", [150, 80], (100, 0, 0)))
-        
-        self.final_text = ""
-        
-    def detect_advanced_gestures(self, image, left_hand_landmarks, right_hand_landmarks):
-        """تشخیص ژست‌های پیشرفته (مانند اسکرول، زوم) و اجرای دستورات مربوطه"""
-        if left_hand_landmarks and right_hand_landmarks:
-            # ژست با دو دست (مثلاً زوم)
-            # محاسبه مرکز هر دست
-            left_cx = int(sum([lm.x for lm in left_hand_landmarks.landmark]) / len(left_hand_landmarks.landmark) * self.wCam)
-            left_cy = int(sum([lm.y for lm in left_hand_landmarks.landmark]) / len(left_hand_landmarks.landmark) * self.hCam)
-            right_cx = int(sum([lm.x for lm in right_hand_landmarks.landmark]) / len(right_hand_landmarks.landmark) * self.wCam)
-            right_cy = int(sum([lm.y for lm in right_hand_landmarks.landmark]) / len(right_hand_landmarks.landmark) * self.hCam)
-
-            # محاسبه فاصله بین مراکز دو دست
-            current_hands_distance = math.hypot(right_cx - left_cx, right_cy - left_cy)
-
-            if self.previous_hand_landmarks['left'] and self.previous_hand_landmarks['right']:
-                prev_left_cx = int(sum([lm.x for lm in self.previous_hand_landmarks['left'].landmark]) / len(self.previous_hand_landmarks['left'].landmark) * self.wCam)
-                prev_left_cy = int(sum([lm.y for lm in self.previous_hand_landmarks['left'].landmark]) / len(self.previous_hand_landmarks['left'].landmark) * self.hCam)
-                prev_right_cx = int(sum([lm.x for lm in self.previous_hand_landmarks['right'].landmark]) / len(self.previous_hand_landmarks['right'].landmark) * self.wCam)
-                prev_right_cy = int(sum([lm.y for lm in self.previous_hand_landmarks['right'].landmark]) / len(self.previous_hand_landmarks['right'].landmark) * self.hCam)
-
-                prev_hands_distance = math.hypot(prev_right_cx - prev_left_cx, prev_right_cy - prev_left_cy)
-
-                distance_diff = current_hands_distance - prev_hands_distance
-                zoom_threshold = 15 # حداقل تغییر فاصله برای تشخیص زوم
-
-                if abs(distance_diff) > zoom_threshold:
-                    if distance_diff > 0: # دست‌ها از هم دور می‌شوند: زوم به بیرون
-                        pyautogui.hotkey('ctrl', '-')
-                        self.draw_text_with_bg(image, "Zoom Out", (self.wCam // 2 - 100, 50), color=(0, 255, 255))
-                        print("🔍 زوم به بیرون")
-                    else: # دست‌ها به هم نزدیک می‌شوند: زوم به داخل
-                        pyautogui.hotkey('ctrl', '+')
-                        self.draw_text_with_bg(image, "Zoom In", (self.wCam // 2 - 100, 50), color=(0, 255, 255))
-                        print("🔎 زوم به داخل")
-                    self.session_data["commands_executed"] += 1
-                    self.last_state_change_time = time.time() # جلوگیری از تغییر حالت ناخواسته
+    def setup_virtual_keyboard(self, layout="default"):
+        """
+        راه‌اندازی کیبورد مجازی پیشرفته
 
-
-        elif right_hand_landmarks:
-            current_right_hand_data = self.get_finger_states(right_hand_landmarks, "right")
-            current_right_fingers = current_right_hand_data["finger_states"]
-            current_thumb_index_dist = current_right_hand_data["thumb_index_dist"]
-
-            # ژست اسکرول با دست راست (انگشت اشاره و میانی به سمت بالا/پایین)
-            # تنها انگشت اشاره و میانی باز باشند و فاصله بین آنها ثابت و نزدیک باشد
-            if current_right_fingers[1] == 1 and current_right_fingers[2] == 1 and sum(current_right_fingers) == 2:
-                # بررسی حرکت عمودی انگشت اشاره
-                if self.previous_hand_landmarks['right']:
-                    prev_index_tip_y = self.previous_hand_landmarks['right'].landmark[8].y * self.hCam
-                    current_index_tip_y = right_hand_landmarks.landmark[8].y * self.hCam
-
-                    delta_y = current_index_tip_y - prev_index_tip_y
-                    scroll_threshold = 10 # حداقل حرکت برای تشخیص اسکرول
-
-                    if abs(delta_y) > scroll_threshold:
-                        if delta_y < 0: # حرکت به بالا
-                            pyautogui.scroll(100)
-                            self.draw_text_with_bg(image, "Scroll Up", (self.wCam - 200, 50), color=(0, 255, 0))
-                            print("⬆️ اسکرول به بالا")
-                        else: # حرکت به پایین
-                            pyautogui.scroll(-100)
-                            self.draw_text_with_bg(image, "Scroll Down", (self.wCam - 200, 50), color=(0, 255, 0))
-                            print("⬇️ اسکرول به پایین")
-                        self.session_data["commands_executed"] += 1
-                        self.last_state_change_time = time.time() # جلوگیری از تغییر حالت ناخواسته
-
-            # اضافه کردن ژست‌های دیگر تک دستی راست در اینجا
-
-        elif left_hand_landmarks:
-            # ژست‌های تک دستی با دست چپ (فعلاً فقط برای تغییر حالت استفاده می‌شود)
-            pass
+        Args:
+            layout: "default"، "qwerty" (کامل) یا "persian"
+        """
+        self.keyboard_layout = layout
+        self.buttonList = build_keyboard(layout, self.wCam, self.hCam)
+        # اندیس شبکه‌ای برای پیدا کردن کلید زیر انگشت بدون بررسی همه کلیدها
+        self.keyboard_index = KeyGrid(self.buttonList)
         
-    def get_finger_states(self, hand_landmarks, hand_type):
-        """تشخیص وضعیت انگشتان و محاسبه فواصل کلیدی بین انگشتان"""
-        finger_tips = [4, 8, 12, 16, 20]
-        states = []
+        # لایه کیبورد با تغییر چیدمان دکمه‌ها یا ابعاد تصویر دوباره رسم می‌شود
+        self.keyboard_layer = KeyboardLayer()
         
-        # انگشت شست
-        if hand_type.lower() == 'right':
-            states.append(1 if hand_landmarks.landmark[finger_tips[0]].x > hand_landmarks.landmark[finger_tips[0] - 1].x else 0)
-        else:
-            states.append(1 if hand_landmarks.landmark[finger_tips[0]].x < hand_landmarks.landmark[finger_tips[0] - 1].x else 0)
+        # متن تایپ شده با تغییر زبان کیبورد حفظ می‌شود
+        if not hasattr(self, "final_text"):
+            self.final_text = ""
         
-        # 4 انگشت دیگر
-        for i in range(1, 5):
-            states.append(1 if hand_landmarks.landmark[finger_tips[i]].y < hand_landmarks.landmark[finger_tips[i] - 2].y else 0)
-            
-        # محاسبه فواصل کلیدی
-        thumb_tip = (hand_landmarks.landmark[finger_tips[0]].x * self.wCam, hand_landmarks.landmark[finger_tips[0]].y * self.hCam)
-        index_tip = (hand_landmarks.landmark[finger_tips[1]].x * self.wCam, hand_landmarks.landmark[finger_tips[1]].y * self.hCam)
-        middle_tip = (hand_landmarks.landmark[finger_tips[2]].x * self.wCam, hand_landmarks.landmark[finger_tips[2]].y * self.hCam)
-        ring_tip = (hand_landmarks.landmark[finger_tips[3]].x * self.wCam, hand_landmarks.landmark[finger_tips[3]].y * self.hCam)
-        pinky_tip = (hand_landmarks.landmark[finger_tips[4]].x * self.wCam, hand_landmarks.landmark[finger_tips[4]].y * self.hCam)
-
-        thumb_index_dist = math.hypot(index_tip[0] - thumb_tip[0], index_tip[1] - thumb_tip[1])
-        index_middle_dist = math.hypot(middle_tip[0] - index_tip[0], middle_tip[1] - index_tip[1])
+    def detect_advanced_gestures(self, image, left_hand_landmarks, right_hand_landmarks):
+        """تشخیص ژست‌های پیشرفته با دو دست (مانند زوم) و اجرای دستورات مربوطه"""
+        if left_hand_landmarks is not None and right_hand_landmarks is not None:
+            # ژست با دو دست (زوم): یک گام به ازای هر تغییر فاصله دو دست به اندازه بخشی از کف دست
+            # (نه اختلاف تک فریم) تا لرزش باعث زوم‌های پشت سر هم نشود
+            direction = self.temporal.zoom()
+            if direction:
+                if direction > 0: # دست‌ها از هم دور می‌شوند: زوم به بیرون
+                    with self.profiler.measure("actuation"):
+                        self.actuator.submit(self.output.hotkey, 'ctrl', '-')
+                    self.draw_text_with_bg(image, "Zoom Out", (self.wCam // 2 - 100, 50), color=(0, 255, 255))
+                    print("🔍 زوم به بیرون")
+                else: # دست‌ها به هم نزدیک می‌شوند: زوم به داخل
+                    with self.profiler.measure("actuation"):
+                        self.actuator.submit(self.output.hotkey, 'ctrl', '+')
+                    self.draw_text_with_bg(image, "Zoom In", (self.wCam // 2 - 100, 50), color=(0, 255, 255))
+                    print("🔎 زوم به داخل")
+                self.session_data["commands_executed"] += 1
+                self.last_state_change_time = self.frame_time # جلوگیری از تغییر حالت ناخواسته
         
-        return {"finger_states": states, "thumb_index_dist": thumb_index_dist, "index_middle_dist": index_middle_dist}
+    def scroll_gesture(self, image, hand_landmarks, features):
+        """اسکرول متناسب با سرعت حرکت عمودی انگشت اشاره (فقط اشاره و میانی باز)"""
+        amount = self.temporal.scroll('right')
+        if not amount:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.scroll, amount)
+        if amount > 0: # حرکت به بالا
+            self.draw_text_with_bg(image, "Scroll Up", (self.wCam - 200, 50), color=(0, 255, 0))
+            print(f"⬆️ اسکرول به بالا ({amount})")
+        else: # حرکت به پایین
+            self.draw_text_with_bg(image, "Scroll Down", (self.wCam - 200, 50), color=(0, 255, 0))
+            print(f"⬇️ اسکرول به پایین ({-amount})")
+        self.session_data["commands_executed"] += 1
+        self.last_state_change_time = self.frame_time # جلوگیری از تغییر حالت ناخواسته
+
+    def swipe_gesture(self, image, hand_landmarks, features):
+        """کشیدن سریع افقی دست باز: صفحه بعد (راست) یا قبل (چپ)"""
+        direction = self.temporal.swipe('right')
+        if not direction:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.hotkey, 'alt', 'right' if direction > 0 else 'left')
+        self.draw_text_with_bg(image, "Forward" if direction > 0 else "Back", (self.wCam - 200, 50), color=(0, 255, 0))
+        print("➡️ صفحه بعد" if direction > 0 else "⬅️ صفحه قبل")
+        self.session_data["commands_executed"] += 1
+        self.last_state_change_time = self.frame_time # جلوگیری از تغییر حالت ناخواسته
+
+    def circle_gesture(self, image, hand_landmarks, features):
+        """رسم دایره با انگشت اشاره: آهنگ بعد (ساعتگرد) یا قبل (پادساعتگرد)"""
+        direction = self.temporal.circle('right')
+        if not direction:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.press, 'nexttrack' if direction > 0 else 'prevtrack')
+        self.draw_text_with_bg(image, "Next Track" if direction > 0 else "Previous Track", (self.wCam - 300, 50),
+                               color=(0, 255, 0))
+        print("⏭️ آهنگ بعد" if direction > 0 else "⏮️ آهنگ قبل")
+        self.session_data["commands_executed"] += 1
+
+    def get_finger_states(self, hand_landmarks, hand_type):
+        """تشخیص وضعیت انگشتان و محاسبه فواصل کلیدی بین انگشتان (یک بار برای هر دست در هر فریم)"""
+        return self.hand_features.get(hand_landmarks, hand_type)
         
     def draw_text_with_bg(self, image, text, position, font_scale=1, color=(255, 255, 255), thickness=2, bg_color=(0, 0, 0, 128)):
-        """رسم متن با پس‌زمینه"""
-        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
-        top_left = (position[0] - 5, position[1] - text_height - 10)
-        bottom_right = (position[0] + text_width + 5, position[1] + baseline)
-        
-        overlay = image.copy()
-        cv2.rectangle(overlay, top_left, bottom_right, bg_color[:3], cv2.FILLED)
-        alpha = bg_color[3] / 255.0 if len(bg_color) > 3 else 0.5
-        cv2.addWeighted(overlay, alpha, image, 1 - alpha, 0, image)
-        
-        cv2.putText(image, text, position, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness, cv2.LINE_AA)
+        """رسم متن با پس‌زمینه (همه برچسب‌های فریم در پایان process_hands یک جا ترکیب می‌شوند)"""
+        if image is None:
+            return
+        self.overlay.add_label(text, position, font_scale, color, thickness, bg_color)
         
     def run_calibration(self, image, hand_landmarks):
         """کالیبراسیون پیشرفته"""
         if self.calibration_step == 0:
             self.draw_text_with_bg(image, "Step 1: Show OPEN HAND for 3 sec", (50, 50), bg_color=(200,0,0,150))
-            if hand_landmarks:
-                if time.time() - self.calibration_timer > 3:
-                    tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-                    ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
+            if hand_landmarks is not None:
+                if self.frame_time - self.calibration_timer > 3:
+                    tx, ty = hand_landmarks[4, 0], hand_landmarks[4, 1]
+                    ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
                     self.calibrated_thresholds["VOL_MAX_DIST"] = max(150, math.hypot(ix - tx, iy - ty))
                     self.calibration_step = 1
-                    self.calibration_timer = time.time()
+                    self.calibration_timer = self.frame_time
                     print(f"✅ کالیبراسیون MAX distance: {self.calibrated_thresholds['VOL_MAX_DIST']:.2f}")
             else:
-                self.calibration_timer = time.time()
+                self.calibration_timer = self.frame_time
         
         elif self.calibration_step == 1:
             self.draw_text_with_bg(image, "Step 2: Bring Thumb & Index together for 3 sec", (50, 50), bg_color=(200,0,0,150))
-            if hand_landmarks:
-                if time.time() - self.calibration_timer > 3:
-                    tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-                    ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
+            if hand_landmarks is not None:
+                if self.frame_time - self.calibration_timer > 3:
+                    tx, ty = hand_landmarks[4, 0], hand_landmarks[4, 1]
+                    ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
                     self.calibrated_thresholds["VOL_MIN_DIST"] = math.hypot(ix - tx, iy - ty) + 10
                     
-                    ix_tip, iy_tip = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-                    mx_tip, my_tip = hand_landmarks.landmark[12].x * self.wCam, hand_landmarks.landmark[12].y * self.hCam
+                    ix_tip, iy_tip = hand_landmarks[8, 0], hand_landmarks[8, 1]
+                    mx_tip, my_tip = hand_landmarks[12, 0], hand_landmarks[12, 1]
                     self.calibrated_thresholds["CLICK_DISTANCE"] = math.hypot(ix_tip-mx_tip, iy_tip-my_tip) + 15
                     
                     self.calibration_step = 2
                     print(f"✅ کالیبراسیون MIN distance: {self.calibrated_thresholds['VOL_MIN_DIST']:.2f}")
                     print(f"✅ کالیبراسیون CLICK distance: {self.calibrated_thresholds['CLICK_DISTANCE']:.2f}")
             else:
-                self.calibration_timer = time.time()
+                self.calibration_timer = self.frame_time
                 
         elif self.calibration_step == 2:
             self.draw_text_with_bg(image, "Calibration Complete!", (50, 50), color=(0, 255, 0), bg_color=(0,100,0,150))
-            if time.time() - self.calibration_timer > 2:
+            if self.frame_time - self.calibration_timer > 2:
                 self.state = "IDLE"
                 self.update_status("Ready")
                 print("✅ کالیبراسیون کامل شد!")
@@ -395,63 +395,77 @@ class FixedHandController:
     def run_mouse_control(self, image, hand_landmarks):
         """کنترل ماوس پیشرفته"""
         self.draw_text_with_bg(image, "MOUSE CONTROL", (10, 40), color=(0, 255, 255))
-        cv2.rectangle(image, (self.frame_reduction, self.frame_reduction), 
-                     (self.wCam - self.frame_reduction, self.hCam - self.frame_reduction), (0, 255, 255), 2)
-
-        fingers = self.get_finger_states(hand_landmarks, "right")
+        if image is not None:
+            x0, y0, x1, y1 = self.screen_mapper.active_region
+            cv2.rectangle(image, (x0, y0), (x1, y1), (0, 255, 255), 2)
+
+    def mouse_move(self, image, hand_landmarks, features):
+        """حرکت ماوس با انگشت اشاره (میانی بسته)"""
+        if self.is_dragging:
+            with self.profiler.measure("actuation"):
+                self.actuator.submit(self.output.mouse_up, 'left')
+            self.is_dragging = False
+        self.move_cursor(hand_landmarks)
+
+    def move_cursor(self, hand_landmarks):
+        """بردن مکان‌نما به مکان نوک انگشت اشاره (حداکثر یک بار در هر فریم)"""
+        if self.cursor_frame_time == self.frame_time:
+            return
+        self.cursor_frame_time = self.frame_time
         
-        # حرکت ماوس
-        if fingers["finger_states"][1] == 1 and fingers["finger_states"][2] == 0:
-            if self.is_dragging:
-                pyautogui.mouseUp(button='left')
-                self.is_dragging = False
-            
-            ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-            
-            screen_w, screen_h = pyautogui.size()
-            x_mapped = np.interp(ix, (self.frame_reduction, self.wCam - self.frame_reduction), (0, screen_w))
-            y_mapped = np.interp(iy, (self.frame_reduction, self.hCam - self.frame_reduction), (0, screen_h))
-            
-            clocX = self.plocX + (x_mapped - self.plocX) / self.smoothening
-            clocY = self.plocY + (y_mapped - self.plocY) / self.smoothening
-            
-            pyautogui.moveTo(clocX, clocY)
-            self.plocX, self.plocY = clocX, clocY
-            self.session_data["gestures_detected"] += 1
-
-        # کلیک چپ
-        if fingers["finger_states"][1] == 1 and fingers["finger_states"][2] == 1:
-            ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-            mx, my = hand_landmarks.landmark[12].x * self.wCam, hand_landmarks.landmark[12].y * self.hCam
-            distance = math.hypot(mx - ix, my - iy)
-            
-            if distance < self.calibrated_thresholds["CLICK_DISTANCE"] and time.time() > self.click_cooldown:
-                pyautogui.click()
-                self.click_cooldown = time.time() + self.CLICK_DELAY
-                self.session_data["commands_executed"] += 1
-                print("🖱️ کلیک چپ انجام شد")
-
-        # کلیک راست
-        if fingers["finger_states"][0] == 1 and fingers["finger_states"][1] == 1:
-            tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-            ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-            distance = math.hypot(tx - ix, ty - iy)
+        ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
+        if self.predictor is not None:
+            self.predictor.update(ix, iy, self.frame_time)
+            ix, iy = self.predictor.predict()
+        
+        x_mapped, y_mapped = self.screen_mapper.to_screen(ix, iy)
+        
+        clocX, clocY = self.cursor_filter.filter(x_mapped, y_mapped, self.frame_time)
+        
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.move_to, clocX, clocY, coalesce=True)
+        self.session_data["gestures_detected"] += 1
 
-            if distance < self.calibrated_thresholds["CLICK_DISTANCE"] and time.time() > self.click_cooldown:
-                pyautogui.rightClick()
-                self.click_cooldown = time.time() + self.CLICK_DELAY + 0.2
-                self.session_data["commands_executed"] += 1
-                print("🖱️ کلیک راست انجام شد")
+    def mouse_click(self, image, hand_landmarks, features, button):
+        """کلیک چپ (نزدیک شدن اشاره و میانی) یا راست (نزدیک شدن شست و اشاره)"""
+        if self.frame_time <= self.click_cooldown:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.click if button == "left" else self.output.right_click)
+        self.click_cooldown = self.frame_time + self.CLICK_DELAY + (0 if button == "left" else 0.2)
+        self.session_data["commands_executed"] += 1
+        print("🖱️ کلیک چپ انجام شد" if button == "left" else "🖱️ کلیک راست انجام شد")
+
+    def pinch_gesture(self, image, hand_landmarks, features):
+        """نیشگون شست و اشاره: ضربه کوتاه کلیک راست و نیشگون همراه حرکت کشیدن و رها کردن است"""
+        event = self.temporal.pinch_event('right')
+        if event == "tap":
+            self.mouse_click(image, hand_landmarks, features, "right")
+        elif event == "drag_start":
+            with self.profiler.measure("actuation"):
+                self.actuator.submit(self.output.mouse_down, 'left')
+            self.pinch_dragging = True
+            print("✊ شروع کشیدن با نیشگون")
+        elif event == "drag" and self.pinch_dragging:
+            self.move_cursor(hand_landmarks)
+        elif event == "drop":
+            self.release_pinch_drag()
+
+    def release_pinch_drag(self):
+        """رها کردن دکمه ماوس در پایان کشیدن با نیشگون"""
+        if not self.pinch_dragging:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.mouse_up, 'left')
+        self.pinch_dragging = False
 
-        # Drag and Drop
-        if all(f == 0 for f in fingers["finger_states"]):
-            if not self.is_dragging:
-                pyautogui.mouseDown(button='left')
-                self.is_dragging = True
-        else:
-            if self.is_dragging and not (fingers["finger_states"][1] == 1 and fingers["finger_states"][2] == 0):
-                pyautogui.mouseUp(button='left')
-                self.is_dragging = False
+    def drag(self, image, hand_landmarks, features, pressed):
+        """Drag and Drop: مشت بسته دکمه چپ را نگه می‌دارد و باز شدن دست آن را رها می‌کند"""
+        if pressed == self.is_dragging:
+            return
+        with self.profiler.measure("actuation"):
+            self.actuator.submit(self.output.mouse_down if pressed else self.output.mouse_up, 'left')
+        self.is_dragging = pressed
                 
     def run_system_control(self, image, hand_landmarks):
         """کنترل سیستم پیشرفته"""
@@ -460,12 +474,13 @@ class FixedHandController:
             self.draw_text_with_bg(image, "Volume control disabled", (10, 80), color=(255, 0, 0))
             return
 
-        tx, ty = hand_landmarks.landmark[4].x * self.wCam, hand_landmarks.landmark[4].y * self.hCam
-        ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
+        tx, ty = hand_landmarks[4, 0], hand_landmarks[4, 1]
+        ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
         
-        cv2.circle(image, (int(tx), int(ty)), 10, (0, 255, 0), cv2.FILLED)
-        cv2.circle(image, (int(ix), int(iy)), 10, (0, 255, 0), cv2.FILLED)
-        cv2.line(image, (int(tx), int(ty)), (int(ix), int(iy)), (0, 255, 0), 3)
+        if image is not None:
+            cv2.circle(image, (int(tx), int(ty)), 10, (0, 255, 0), cv2.FILLED)
+            cv2.circle(image, (int(ix), int(iy)), 10, (0, 255, 0), cv2.FILLED)
+            cv2.line(image, (int(tx), int(ty)), (int(ix), int(iy)), (0, 255, 0), 3)
 
         length_vol = math.hypot(ix - tx, iy - ty)
         
@@ -473,77 +488,64 @@ class FixedHandController:
         vol_bar = np.interp(length_vol, [self.calibrated_thresholds["VOL_MIN_DIST"], self.calibrated_thresholds["VOL_MAX_DIST"]], [400, 150])
         vol_per = np.interp(length_vol, [self.calibrated_thresholds["VOL_MIN_DIST"], self.calibrated_thresholds["VOL_MAX_DIST"]], [0, 100])
         
-        self.volume.SetMasterVolumeLevel(vol, None)
+        with self.profiler.measure("actuation"):
+            self.output.set_volume(vol)
         
-        cv2.rectangle(image, (50, 150), (85, 400), (0, 255, 0), 3)
-        cv2.rectangle(image, (50, int(vol_bar)), (85, 400), (0, 255, 0), cv2.FILLED)
-        cv2.putText(image, f'{int(vol_per)} %', (40, 450), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 3)
+        if image is not None:
+            cv2.rectangle(image, (50, 150), (85, 400), (0, 255, 0), 3)
+            cv2.rectangle(image, (50, int(vol_bar)), (85, 400), (0, 255, 0), cv2.FILLED)
+            cv2.putText(image, f'{int(vol_per)} %', (40, 450), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 255, 0), 3)
         
     def run_keyboard_mode(self, image, hand_landmarks):
         """حالت کیبورد پیشرفته"""
         image = self.draw_keyboard(image, self.buttonList)
-        ix, iy = hand_landmarks.landmark[8].x * self.wCam, hand_landmarks.landmark[8].y * self.hCam
-        
-        for button in self.buttonList:
-            x, y = button.pos
-            w, h = button.size
-            if x < ix < x + w and y < iy < y + h:
-                cv2.rectangle(image, (x - 5, y - 5), (x + w + 5, y + h + 5), (175, 0, 175), cv2.FILLED)
-                cv2.putText(image, button.text, (x + 20, y + 60), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
+        ix, iy = hand_landmarks[8, 0], hand_landmarks[8, 1]
+        
+        button = self.keyboard_index.hit(ix, iy)
+        if button is not None:
+            if image is not None:
+                self.keyboard_layer.draw_key(image, button, (175, 0, 175))
+            
+            fingers = self.get_finger_states(hand_landmarks, "right")
+            if fingers["finger_states"][1] == 1 and fingers["finger_states"][2] == 1:
+                distance = fingers["index_middle_dist"]
                 
-                fingers = self.get_finger_states(hand_landmarks, "right")
-                if fingers["finger_states"][1] == 1 and fingers["finger_states"][2] == 1:
-                    mx, my = hand_landmarks.landmark[12].x * self.wCam, hand_landmarks.landmark[12].y * self.hCam
-                    distance = math.hypot(mx - ix, my - iy)
+                if distance < self.calibrated_thresholds["CLICK_DISTANCE"] * 1.2 and self.frame_time > self.click_cooldown:
+                    if button.key == "exit": 
+                        self.state = "IDLE"
+                    elif button.key.startswith("layout:"):
+                        self.setup_virtual_keyboard(button.key.split(":", 1)[1])
+                    else:
+                        with self.profiler.measure("actuation"):
+                            self.actuator.submit(self.output.press, button.key)
+                        self.final_text = button.apply(self.final_text)
                     
-                    if distance < self.calibrated_thresholds["CLICK_DISTANCE"] * 1.2 and time.time() > self.click_cooldown:
-                        if button.text == "Exit": 
-                            self.state = "IDLE"
-                        elif button.text == "<-": 
-                            pyautogui.press('backspace')
-                            self.final_text = self.final_text[:-1]
-                        elif button.text == "Space": 
-                            pyautogui.press('space')
-                            self.final_text += " "
-                        elif button.text == "Enter":
-                            pyautogui.press('enter')
-                            self.final_text += "\n"
-                        else: 
-                            pyautogui.press(button.text)
-                            self.final_text += button.text
-                        
-                        self.click_cooldown = time.time() + self.CLICK_DELAY + 0.3
-                        cv2.rectangle(image, (x - 5, y - 5), (x + w + 5, y + h + 5), (0, 255, 0), cv2.FILLED)
-                        self.session_data["commands_executed"] += 1
-                        print(f"⌨️ کلید {button.text} فشرده شد")
+                    self.click_cooldown = self.frame_time + self.CLICK_DELAY + 0.3
+                    if image is not None:
+                        self.keyboard_layer.draw_key(image, button, (0, 255, 0), label=False)
+                    self.session_data["commands_executed"] += 1
+                    print(f"⌨️ کلید {button.text} فشرده شد")
 
-        cv2.rectangle(image, (50, 550), (1200, 650), (50, 50, 50), cv2.FILLED)
-        cv2.putText(image, self.final_text, (60, 620), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
+        if image is not None:
+            cv2.rectangle(image, (50, 550), (1200, 650), (50, 50, 50), cv2.FILLED)
+            cv2.putText(image, self.final_text, (60, 620), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
         return image
         
     def draw_keyboard(self, image, buttonList):
-        """رسم کیبورد مجازی"""
-        img_new = np.zeros_like(image, np.uint8)
-        for button in buttonList:
-            x, y = button.pos
-            w, h = button.size
-            color = button.color if hasattr(button, 'color') else (100, 0, 100)
-            cv2.rectangle(img_new, (x, y), (x + w, y + h), color, cv2.FILLED)
-            cv2.putText(img_new, button.text, (x + 20, y + 60), cv2.FONT_HERSHEY_PLAIN, 4, (255, 255, 255), 4)
-        
-        out = image.copy()
-        alpha = 0.5
-        mask = img_new.astype(bool)
-        out[mask] = cv2.addWeighted(image, alpha, img_new, 1 - alpha, 0)[mask]
-        return out
+        """رسم کیبورد مجازی (لایه کیبورد یک بار رسم و در هر فریم فقط ترکیب می‌شود)"""
+        if image is None:
+            return image
+        with self.profiler.measure("overlay"):
+            return self.keyboard_layer.draw(image, buttonList)
         
     def start_control(self):
         """شروع کنترل"""
         self.state = "CALIBRATING"
         self.calibration_step = 0
         self.calibration_timer = time.time()
-        self.start_button.configure(state="disabled")
-        self.stop_button.configure(state="normal")
+        if self.root is not None:
+            self.start_button.configure(state="disabled")
+            self.stop_button.configure(state="normal")
         self.update_status("Calibrating...")
         
         # شروع حلقه اصلی در thread جداگانه
@@ -554,8 +556,9 @@ class FixedHandController:
     def stop_control(self):
         """توقف کنترل"""
         self.state = "STOPPED"
-        self.start_button.configure(state="normal")
-        self.stop_button.configure(state="disabled")
+        if self.root is not None:
+            self.start_button.configure(state="normal")
+            self.stop_button.configure(state="disabled")
         self.update_status("Stopped")
         
     def toggle_voice_control(self):
@@ -574,32 +577,76 @@ class FixedHandController:
             if self.ai_controller:
                 self.ai_controller.stop_voice_control()
             
+    def set_mode(self, image, hand_landmarks, features, state):
+        """تغییر حالت با ژست دست چپ"""
+        self.state = state
+        self.last_state_change_time = self.frame_time
+        if state == "IDLE":
+            self.final_text = ""
+        self.update_status(MODE_LABELS[state])
+        print({
+            "IDLE": "🔄 بازگشت به حالت IDLE",
+            "MOUSE_CONTROL": "🖱️ تغییر به حالت کنترل ماوس",
+            "SYSTEM_CONTROL": "🔊 تغییر به حالت کنترل سیستم",
+            "KEYBOARD_MODE": "⌨️ تغییر به حالت کیبورد",
+        }[state])
+        
     def update_status(self, status):
         """به‌روزرسانی وضعیت"""
+        if self.root is None:
+            return
         self.status_label.configure(text=f"Status: {status}")
         
     def update_stats(self):
         """به‌روزرسانی آمار"""
+        # محاسبه صدک‌ها هر 30 فریم یک بار کافی است
+        if self.profiler.frames % 30 == 0:
+            self.performance_metrics = self.profiler.summary()
+        if self.root is None:
+            return
+        frame_stats = self.performance_metrics.get("total", {})
         stats_text = f"""Statistics:
 Commands: {self.session_data['commands_executed']}
 Gestures: {self.session_data['gestures_detected']}
 Errors: {self.session_data['errors']}
+Dropped frames: {self.frame_grabber.frames_dropped}
+Inference: {self.governor.inference_scale:.0%} @ {self.governor.max_fps or 'max'} fps
+Frame p50/p95: {frame_stats.get('p50_ms', 0):.1f}/{frame_stats.get('p95_ms', 0):.1f} ms
+Actuation p95: {self.actuator.latency.percentile(95) * 1000:.1f} ms (queued {self.actuator.pending})
+Cursor filter: {self.cursor_filter.name} (+{self.cursor_filter.added_latency * 1000:.0f} ms)
 Uptime: {int(time.time() - self.session_data['start_time'])}s"""
         self.stats_label.configure(text=stats_text)
         
     def main_loop(self):
         """حلقه اصلی برنامه"""
         print("🎯 شروع حلقه اصلی...")
+        self.frame_grabber.start()
+        self.actuator.start()
+        self.screen_geometry.start()
         while self.state != "STOPPED":
             try:
-                success, image = self.cap.read()
-                if not success: 
+                frame = self.frame_grabber.read()
+                if frame is None: 
+                    if self.frame_grabber.exhausted:
+                        print("✅ پایان منبع تصویر")
+                        break
                     print("❌ خطا در خواندن تصویر از دوربین")
                     continue
                     
-                image = cv2.flip(image, 1)
+                if not self.governor.should_process(frame.timestamp):
+                    continue
+                    
+                # زمان‌گیری مراحل؛ capture فاصله دریافت فریم تا شروع پردازش آن است
+                self.profiler.begin_frame()
+                self.profiler.record("capture", max(0.0, time.time() - frame.timestamp))
+                self.frame_time = frame.timestamp
+                image = cv2.flip(frame.image, 1)
                 image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(image_rgb)
+                self.profiler.lap("color_conversion")
+                results, roi = self.detect_hands(image_rgb)
+                
+                if self.landmark_recorder:
+                    self.landmark_recorder.write(frame.timestamp, landmarks_from_results(results, roi, (self.wCam, self.hCam)))
                 
                 left_hand, right_hand = None, None
                 
@@ -611,75 +658,46 @@ Uptime: {int(time.time() - self.session_data['start_time'])}s"""
                         else:
                             right_hand = hand_landmarks
                     
+                    # تبدیل یک باره هر دست به آرایه پیکسلی؛ منطق ژست‌ها فقط با آرایه کار می‌کند
+                    # نقاط نسبت به ناحیه برش هستند، پس روی همان ناحیه رسم و به مختصات فریم کامل تبدیل می‌شوند
+                    view = image if roi is None else image[roi[1]:roi[3], roi[0]:roi[2]]
+                    self.hand_arrays.set_roi(roi)
+                    if not self.headless:
+                        with self.profiler.measure("overlay"):
+                            for hand in (left_hand, right_hand):
+                                if hand:
+                                    self.mp_drawing.draw_landmarks(view, hand, self.mp_hands.HAND_CONNECTIONS)
                     if left_hand:
-                        self.mp_drawing.draw_landmarks(image, left_hand, self.mp_hands.HAND_CONNECTIONS)
-                        self.previous_hand_landmarks['left'] = left_hand # ذخیره برای ردیابی ژست‌های پیشرفته
+                        left_hand = self.hand_arrays.from_landmarks(left_hand, "Left")
                     if right_hand:
-                        self.mp_drawing.draw_landmarks(image, right_hand, self.mp_hands.HAND_CONNECTIONS)
-                        self.previous_hand_landmarks['right'] = right_hand # ذخیره برای ردیابی ژست‌های پیشرفته
-                else:
-                    self.previous_hand_landmarks = {'left': None, 'right': None} # اگر دستی شناسایی نشد، ریست کن
-
-                # تشخیص ژست‌های پیشرفته قبل از کنترل حالت عادی
-                self.detect_advanced_gestures(image, left_hand, right_hand)
-
-                # اجرای حالت‌ها
-                if self.state == "CALIBRATING":
-                    active_hand = left_hand or right_hand
-                    self.run_calibration(image, active_hand)
+                        right_hand = self.hand_arrays.from_landmarks(right_hand, "Right")
                 
-                elif self.state == "IDLE":
-                    self.draw_text_with_bg(image, "IDLE", (10, 40), color=(255, 255, 0))
-                    self.draw_text_with_bg(image, "Use Left Hand to Select Mode:", (10, 80), 0.7)
-                    self.draw_text_with_bg(image, "1 Finger: Mouse | 2 Fingers: System | 3 Fingers: Keyboard", (10, 110), 0.7)
-                    self.draw_text_with_bg(image, "Open Palm (5 Fingers): Back to IDLE", (10, 140), 0.7)
+                self.roi_tracker.update([hand for hand in (left_hand, right_hand) if hand is not None])
+                self.profiler.lap("inference")
 
-                # کنترل حالت‌های ماوس، سیستم و کیبورد فقط اگر ژست پیشرفته فعال نباشد
-                elif right_hand and time.time() - self.last_state_change_time > 0.5: # تاخیر برای جلوگیری از تداخل با ژست‌های پیشرفته
-                    if self.state == "MOUSE_CONTROL":
-                        self.run_mouse_control(image, right_hand)
-                    elif self.state == "SYSTEM_CONTROL":
-                        self.run_system_control(image, right_hand)
-                    elif self.state == "KEYBOARD_MODE":
-                        image = self.run_keyboard_mode(image, right_hand)
-                elif self.state != "CALIBRATING" and self.state != "IDLE":
-                     self.draw_text_with_bg(image, f"Show Right Hand to use {self.state}", (self.wCam//2 - 200, self.hCam//2), color=(0,0,255))
-
-                # کنترل تغییر حالت با دست چپ
-                if left_hand and time.time() - self.last_state_change_time > 1.0:
-                    left_fingers_data = self.get_finger_states(left_hand, "Left")
-                    left_fingers = left_fingers_data["finger_states"]
-                    
-                    if sum(left_fingers) == 5 and self.state != "IDLE" and self.state != "CALIBRATING":
-                        self.state = "IDLE"
-                        self.final_text = ""
-                        self.last_state_change_time = time.time()
-                        self.update_status("IDLE")
-                        print("🔄 بازگشت به حالت IDLE")
-                    
-                    elif self.state == "IDLE":
-                        if sum(left_fingers) == 1 and left_fingers[1] == 1:
-                            self.state = "MOUSE_CONTROL"
-                            self.last_state_change_time = time.time()
-                            self.update_status("Mouse Control")
-                            print("🖱️ تغییر به حالت کنترل ماوس")
-                        elif sum(left_fingers) == 2 and left_fingers[1] == 1 and left_fingers[2] == 1:
-                            self.state = "SYSTEM_CONTROL"
-                            self.last_state_change_time = time.time()
-                            self.update_status("System Control")
-                            print("🔊 تغییر به حالت کنترل سیستم")
-                        elif sum(left_fingers) == 3 and left_fingers[1] == 1 and left_fingers[2] == 1 and left_fingers[3] == 1:
-                            self.state = "KEYBOARD_MODE"
-                            self.last_state_change_time = time.time()
-                            self.update_status("Keyboard Mode")
-                            print("⌨️ تغییر به حالت کیبورد")
+                # در حالت headless هیچ چیزی روی تصویر رسم نمی‌شود
+                image = self.process_hands(None if self.headless else image, left_hand, right_hand)
+                self.profiler.lap("gesture_logic")
 
                 # به‌روزرسانی آمار
                 self.update_stats()
                 
-                cv2.imshow("Advanced Hand Controller Pro v3.0 - Fixed", image)
+                key = -1
+                if not self.headless:
+                    cv2.imshow("Advanced Hand Controller Pro v3.0 - Fixed", image)
+                    key = cv2.waitKey(1) & 0xFF
+                self.profiler.lap("display")
+                self.profiler.end_frame()
+                # بودجه زمان پردازش بدون نمایش تصویر (imshow/waitKey)
+                processing = self.profiler.last["total"] - self.profiler.last.get("display", 0.0)
+                self.governor.update({"inference": self.profiler.last["inference"], "processing": processing})
+                if self.predictor is not None:
+                    # تأخیر از دریافت تصویر تا اجرای حرکت ماوس در thread خروجی
+                    last = self.profiler.last
+                    self.predictor.observe_latency(sum(last.get(stage, 0.0) for stage in LATENCY_STAGES)
+                                                   + self.actuator.latency.mean)
                 
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if key == ord('q'):
                     print("🛑 خروج از برنامه...")
                     break
                     
@@ -688,10 +706,127 @@ Uptime: {int(time.time() - self.session_data['start_time'])}s"""
                 self.session_data["errors"] += 1
                 time.sleep(0.1)
                 
-        self.cap.release()
-        cv2.destroyAllWindows()
+        self.frame_grabber.stop()
+        self.actuator.stop()
+        self.screen_geometry.stop()
+        self.stop_landmark_recording()
+        self.frame_source.release()
+        if not self.headless:
+            cv2.destroyAllWindows()
+        print(self.profiler.report())
         print("✅ برنامه با موفقیت بسته شد")
         
+    def detect_hands(self, image_rgb):
+        """
+        اجرای مدل روی ناحیه اطراف دست‌های فریم قبلی یا در صورت نیاز روی کل تصویر
+        
+        Returns:
+            (results, roi) - roi ناحیه برش استفاده شده یا None برای کل تصویر
+        """
+        roi = self.roi_tracker.next_roi()
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            crop = np.ascontiguousarray(image_rgb[y0:y1, x0:x1])
+            results = self.hands.process(self.governor.resize_for_inference(crop))
+            if results.multi_hand_landmarks:
+                return results, roi
+            # دست در ناحیه برش پیدا نشد؛ بررسی دوباره کل تصویر
+            self.roi_tracker.report_miss()
+        return self.hands.process(self.governor.resize_for_inference(image_rgb)), None
+        
+    def process_hands(self, image, left_hand, right_hand):
+        """
+        منطق حالت‌ها و ژست‌ها برای یک فریم (مستقل از دوربین و مدل)
+        
+        Args:
+            image: تصویر برای رسم راهنماها
+            left_hand, right_hand: نقاط دست چپ و راست یا None
+            
+        Returns:
+            تصویر نهایی
+        """
+        self.hand_features.new_frame()
+        self.overlay.clear()
+        
+        # ویژگی‌های هندسی هر دست یک بار محاسبه و تا فریم بعد نگهداری می‌شود
+        self.hand_tracker.update(left_hand, right_hand, self.frame_time)
+        
+        # تاریخچه چند فریم اخیر هر دست برای ژست‌های پویا
+        for side, hand, hand_type in (('left', left_hand, "Left"), ('right', right_hand, "right")):
+            features = self.get_finger_states(hand, hand_type) if hand is not None else None
+            self.temporal.update(side, self.hand_tracker.current[side], features,
+                                 self.calibrated_thresholds["CLICK_DISTANCE"])
+
+        # تشخیص ژست‌های پیشرفته قبل از کنترل حالت عادی
+        self.detect_advanced_gestures(image, left_hand, right_hand)
+
+        # ژست‌های دست راست (اسکرول و ماوس) با یک جستجو در جدول ژست‌ها
+        if right_hand is not None:
+            features = self.get_finger_states(right_hand, "right")
+            self.gestures.dispatch(self, image, "right", right_hand, features, alone=left_hand is None)
+        if self.pinch_dragging and (right_hand is None or self.state != "MOUSE_CONTROL"):
+            self.release_pinch_drag()
+
+        # اجرای حالت‌ها
+        if self.state == "CALIBRATING":
+            active_hand = left_hand if left_hand is not None else right_hand
+            self.run_calibration(image, active_hand)
+        
+        elif self.state == "IDLE":
+            self.draw_text_with_bg(image, "IDLE", (10, 40), color=(255, 255, 0))
+            self.draw_text_with_bg(image, "Use Left Hand to Select Mode:", (10, 80), 0.7)
+            self.draw_text_with_bg(image, "1 Finger: Mouse | 2 Fingers: System | 3 Fingers: Keyboard", (10, 110), 0.7)
+            self.draw_text_with_bg(image, "Open Palm (5 Fingers): Back to IDLE", (10, 140), 0.7)
+            self.draw_text_with_bg(image, "Right Hand: Circle = Next/Prev Track | Open Hand Swipe = Back/Forward", (10, 170), 0.7)
+
+        # کنترل حالت‌های ماوس، سیستم و کیبورد فقط اگر ژست پیشرفته فعال نباشد
+        elif right_hand is not None and self.frame_time - self.last_state_change_time > 0.5: # تاخیر برای جلوگیری از تداخل با ژست‌های پیشرفته
+            if self.state == "MOUSE_CONTROL":
+                self.run_mouse_control(image, right_hand)
+            elif self.state == "SYSTEM_CONTROL":
+                self.run_system_control(image, right_hand)
+            elif self.state == "KEYBOARD_MODE":
+                image = self.run_keyboard_mode(image, right_hand)
+        elif self.state != "CALIBRATING" and self.state != "IDLE":
+             self.draw_text_with_bg(image, f"Show Right Hand to use {self.state}", (self.wCam//2 - 200, self.hCam//2), color=(0,0,255))
+
+        # کنترل تغییر حالت با دست چپ
+        if left_hand is not None:
+            features = self.get_finger_states(left_hand, "Left")
+            self.gestures.dispatch(self, image, "left", left_hand, features, alone=right_hand is None)
+                    
+        # ترکیب برچسب‌های نیمه شفاف فقط در محدوده کادرها و در یک مرحله
+        with self.profiler.measure("overlay"):
+            self.overlay.flush(image)
+            
+        return image
+        
+    def run_headless(self):
+        """اجرای موتور ژست در thread فعلی بدون رابط کاربری (Ctrl+C برای توقف)"""
+        try:
+            self.main_loop()
+        except KeyboardInterrupt:
+            self.state = "STOPPED"
+        finally:
+            self.frame_grabber.stop()
+            self.actuator.stop()
+            self.screen_geometry.stop()
+            self.stop_landmark_recording()
+            self.frame_source.release()
+            
+    def start_landmark_recording(self, path):
+        """شروع ضبط نقاط دست برای پخش مجدد و بنچمارک"""
+        self.stop_landmark_recording()
+        self.landmark_recorder = LandmarkRecorder(path)
+        print(f"⏺️ ضبط نقاط دست در {path}")
+        
+    def stop_landmark_recording(self):
+        """توقف ضبط نقاط دست"""
+        if self.landmark_recorder:
+            self.landmark_recorder.close()
+            print(f"⏹️ {self.landmark_recorder.frames_written} فریم ضبط شد")
+            self.landmark_recorder = None
+        
     def run(self):
         """اجرای برنامه"""
         print("🚀 شروع برنامه...")
@@ -702,18 +837,44 @@ Uptime: {int(time.time() - self.session_data['start_time'])}s"""
         except Exception as e:
             print(f"❌ خطای غیرمنتظره: {e}")
         finally:
-            if hasattr(self, 'cap'):
-                self.cap.release()
+            if hasattr(self, 'frame_source'):
+                self.frame_grabber.stop()
+                self.actuator.stop()
+                self.screen_geometry.stop()
+                self.frame_source.release()
             cv2.destroyAllWindows()
 
 def main():
     """تابع اصلی"""
+    parser = argparse.ArgumentParser(description="Hand Controller Pro v3.0 - Fixed Version")
+    parser.add_argument("--source", default=None,
+                        help="منبع تصویر: شماره دوربین، فایل ویدیو، پوشه تصاویر یا synthetic[:N]")
+    parser.add_argument("--record", default=None,
+                        help="ضبط نقاط دست در فایل برای پخش مجدد با landmark_recording.py")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY, choices=["480p", "720p", "1080p"],
+                        help="کیفیت دریافت تصویر")
+    parser.add_argument("--no-roi", action="store_true",
+                        help="اجرای مدل همیشه روی کل تصویر (بدون برش اطراف دست)")
+    parser.add_argument("--keyboard", default="default", choices=KEYBOARD_LAYOUTS,
+                        help="چیدمان کیبورد مجازی (default، qwerty کامل یا persian)")
+    parser.add_argument("--filter", default="one_euro", choices=list(CURSOR_FILTERS),
+                        help="فیلتر هموارسازی مکان‌نما (legacy: هموارسازی قبلی)")
+    parser.add_argument("--predict", action="store_true",
+                        help="پیش‌بینی حرکت نوک انگشت برای جبران تأخیر دوربین و پردازش")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("Hand Controller Pro v3.0 - Fixed Version")
     print("=" * 50)
     
     try:
-        controller = FixedHandController()
+        controller = FixedHandController(frame_source=args.source, capture_quality=args.quality,
+                                         cursor_filter=args.filter, predict=args.predict)
+        controller.roi_tracker.enabled = not args.no_roi
+        if args.keyboard != "default":
+            controller.setup_virtual_keyboard(args.keyboard)
+        if args.record:
+            controller.start_landmark_recording(args.record)
         controller.run()
     except Exception as e:
         print(f"❌ خطا در راه‌اندازی: {e}")
@@ -0,0 +1,295 @@
+"""
+هندسه صفحه نمایش (چند مانیتور) با به‌روزرسانی در پس‌زمینه و نگاشت خطی از پیش محاسبه شده تصویر به صفحه
+Cached multi-monitor screen geometry and precomputed camera-to-screen affine maps
+"""
+
+import threading
+
+import numpy as np
+
+# فهرست مانیتورها و مختصات آن‌ها در دسکتاپ مجازی
+try:
+    from screeninfo import get_monitors
+    SCREENINFO_AVAILABLE = True
+except ImportError:
+    SCREENINFO_AVAILABLE = False
+
+# ابعاد صفحه وقتی نه مانیتوری گزارش شده و نه خروجی دستورات ابعاد را می‌دهد
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+
+
+class Monitor:
+    """یک مانیتور در مختصات دسکتاپ مجازی"""
+    __slots__ = ("x", "y", "width", "height", "name", "primary")
+
+    def __init__(self, x, y, width, height, name="", primary=False):
+        self.x = int(x)
+        self.y = int(y)
+        self.width = int(width)
+        self.height = int(height)
+        self.name = name or ""
+        self.primary = bool(primary)
+
+    @property
+    def rect(self):
+        """(x0, y0, x1, y1)"""
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+    def key(self):
+        return self.x, self.y, self.width, self.height, self.primary
+
+    def __repr__(self):
+        return f"Monitor({self.name!r}, {self.width}x{self.height}+{self.x}+{self.y}{', primary' if self.primary else ''})"
+
+
+def enumerate_monitors(output=None):
+    """
+    فهرست مانیتورها (مانیتور اصلی اول)
+
+    Args:
+        output: خروجی دستورات؛ اگر screeninfo نصب نباشد ابعاد صفحه از آن خوانده می‌شود
+
+    Returns:
+        لیست Monitor
+    """
+    monitors = []
+    if SCREENINFO_AVAILABLE:
+        try:
+            for info in get_monitors():
+                monitors.append(Monitor(info.x, info.y, info.width, info.height,
+                                        getattr(info, "name", ""), getattr(info, "is_primary", False)))
+        except Exception:
+            monitors = []
+    if not monitors and output is not None:
+        try:
+            width, height = output.screen_size()
+            monitors.append(Monitor(0, 0, width, height, "primary", True))
+        except Exception:
+            # بدون display (یا در برخی جلسات RDP) ابعاد صفحه در دسترس نیست
+            pass
+    if monitors and not any(monitor.primary for monitor in monitors):
+        # بدون اطلاعات، مانیتوری که مبدأ مختصات را دارد اصلی است
+        origin = next((m for m in monitors if m.x == 0 and m.y == 0), monitors[0])
+        origin.primary = True
+    monitors.sort(key=lambda monitor: not monitor.primary)
+    return monitors
+
+
+class ScreenGeometry:
+    def __init__(self, output=None, poll_interval=2.0):
+        """
+        نگهداری ابعاد مانیتورها؛ پرس‌وجو از سیستم فقط هنگام refresh (نه در هر فریم)
+
+        تغییر مانیتورها (وصل/جدا شدن یا تغییر رزولوشن) با بررسی دوره‌ای در یک thread
+        جداگانه تشخیص داده می‌شود و به listener ها اطلاع داده می‌شود.
+
+        Args:
+            output: خروجی دستورات (برای screen_size در صورت نبود screeninfo)
+            poll_interval: فاصله بررسی تغییر مانیتورها به ثانیه
+        """
+        self.output = output
+        self.poll_interval = poll_interval
+        self.monitors = []
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # آمار
+        self.refreshes = 0
+        self.changes = 0
+
+        self.refresh()
+
+    @property
+    def primary(self):
+        """مانیتور اصلی؛ اگر هیچ مانیتوری گزارش نشده باشد مانیتور جایگزین با ابعاد خروجی"""
+        return self.monitors[0] if self.monitors else self._fallback_monitor()
+
+    def _fallback_monitor(self):
+        width, height = DEFAULT_SCREEN_SIZE
+        if self.output is not None:
+            try:
+                width, height = self.output.screen_size()
+            except Exception:
+                pass
+        return Monitor(0, 0, width, height, "fallback", True)
+
+    @property
+    def bounds(self):
+        """کادر دسکتاپ مجازی شامل همه مانیتورها (x0, y0, x1, y1)"""
+        rects = [monitor.rect for monitor in self.monitors or [self.primary]]
+        return (min(r[0] for r in rects), min(r[1] for r in rects),
+                max(r[2] for r in rects), max(r[3] for r in rects))
+
+    def add_listener(self, callback):
+        """
+        ثبت تابعی که پس از تغییر مانیتورها با ScreenGeometry صدا زده می‌شود
+
+        ممکن است از thread بررسی دوره‌ای صدا زده شود.
+        """
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """
+        خواندن دوباره مانیتورها از سیستم
+
+        Returns:
+            True اگر چیدمان مانیتورها تغییر کرده باشد
+        """
+        monitors = enumerate_monitors(self.output)
+        self.refreshes += 1
+        if not monitors or [m.key() for m in monitors] == [m.key() for m in self.monitors]:
+            return False
+        self.monitors = monitors
+        self.changes += 1
+        for callback in self._listeners:
+            callback(self)
+        return True
+
+    def start(self):
+        """شروع بررسی دوره‌ای تغییر مانیتورها"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """توقف بررسی دوره‌ای"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ خطا در خواندن مشخصات مانیتورها: {e}")
+
+
+class AffineMap:
+    def __init__(self, source, target):
+        """
+        نگاشت خطی محور-به-محور از یک کادر به کادر دیگر با محدود شدن به کادر مقصد
+
+        معادل دو فراخوانی np.interp (که مقادیر بیرون بازه را به دو سر بازه می‌چسباند)
+        اما با ضرایب از پیش محاسبه شده و محاسبه اسکالر پایتون.
+
+        Args:
+            source: کادر مبدأ (x0, y0, x1, y1)، مثلاً ناحیه فعال تصویر دوربین
+            target: کادر مقصد (x0, y0, x1, y1)، مثلاً یک مانیتور
+        """
+        sx0, sy0, sx1, sy1 = source
+        tx0, ty0, tx1, ty1 = target
+        self.source = tuple(source)
+        self.target = tuple(target)
+        self.scale_x = (tx1 - tx0) / (sx1 - sx0)
+        self.scale_y = (ty1 - ty0) / (sy1 - sy0)
+        self.offset_x = tx0 - sx0 * self.scale_x
+        self.offset_y = ty0 - sy0 * self.scale_y
+        self.min_x, self.max_x = min(tx0, tx1), max(tx0, tx1)
+        self.min_y, self.max_y = min(ty0, ty1), max(ty0, ty1)
+
+    @property
+    def matrix(self):
+        """ماتریس 2x3 نگاشت (برای cv2.transform و مانند آن)"""
+        return np.array([[self.scale_x, 0.0, self.offset_x],
+                         [0.0, self.scale_y, self.offset_y]])
+
+    def map(self, x, y):
+        """نگاشت یک نقطه (x, y) به کادر مقصد"""
+        x = float(x) * self.scale_x + self.offset_x
+        y = float(y) * self.scale_y + self.offset_y
+        if x < self.min_x:
+            x = self.min_x
+        elif x > self.max_x:
+            x = self.max_x
+        if y < self.min_y:
+            y = self.min_y
+        elif y > self.max_y:
+            y = self.max_y
+        return x, y
+
+    def inverse(self, x, y):
+        """نقطه متناظر در کادر مبدأ"""
+        return (x - self.offset_x) / self.scale_x, (y - self.offset_y) / self.scale_y
+
+
+class ScreenMapper:
+    def __init__(self, geometry, frame_size, frame_reduction=100, monitor=0):
+        """
+        نگاشت نوک انگشت در ناحیه فعال تصویر دوربین به مختصات صفحه
+
+        نگاشت فقط هنگام تغییر مانیتورها، مانیتور هدف یا ناحیه فعال دوباره ساخته می‌شود.
+
+        Args:
+            geometry: ScreenGeometry
+            frame_size: ابعاد تصویر دوربین (عرض، ارتفاع)
+            frame_reduction: حاشیه پیش‌فرض ناحیه فعال در تصویر (پیکسل)
+            monitor: شماره مانیتور هدف (0 = مانیتور اصلی) یا "all" برای کل دسکتاپ مجازی
+        """
+        self.geometry = geometry
+        self.frame_size = tuple(frame_size)
+        self.frame_reduction = frame_reduction
+        self.monitor = monitor
+        self.regions = {}  # ناحیه فعال اختصاصی هر مانیتور: شماره -> (x0, y0, x1, y1) در تصویر
+        self.map = None
+        self._rebuild()
+        geometry.add_listener(lambda _geometry: self._rebuild())
+
+    @property
+    def default_region(self):
+        width, height = self.frame_size
+        margin = self.frame_reduction
+        return margin, margin, width - margin, height - margin
+
+    @property
+    def active_region(self):
+        """ناحیه فعال تصویر برای مانیتور فعلی (x0, y0, x1, y1)"""
+        return self.map.source
+
+    def set_monitor(self, monitor):
+        """انتخاب مانیتور هدف (شماره یا "all")"""
+        self.monitor = monitor
+        self._rebuild()
+
+    def set_active_region(self, region, monitor=None):
+        """
+        تعیین ناحیه فعال تصویر برای یک مانیتور
+
+        Args:
+            region: (x0, y0, x1, y1) در پیکسل‌های تصویر یا None برای ناحیه پیش‌فرض
+            monitor: شماره مانیتور (پیش‌فرض مانیتور فعلی)
+        """
+        monitor = self.monitor if monitor is None else monitor
+        if region is None:
+            self.regions.pop(monitor, None)
+        else:
+            self.regions[monitor] = tuple(region)
+        self._rebuild()
+
+    def set_frame_size(self, frame_size):
+        """به‌روزرسانی ابعاد تصویر دوربین"""
+        self.frame_size = tuple(frame_size)
+        self._rebuild()
+
+    def target_rect(self):
+        """کادر مقصد روی دسکتاپ مجازی"""
+        monitors = self.geometry.monitors
+        if self.monitor == "all":
+            return self.geometry.bounds
+        if isinstance(self.monitor, int) and 0 <= self.monitor < len(monitors):
+            return monitors[self.monitor].rect
+        return self.geometry.primary.rect
+
+    def _rebuild(self):
+        # ساخت نگاشت جدید و جایگزینی یکجا (ممکن است از thread بررسی مانیتورها صدا زده شود)
+        region = self.regions.get(self.monitor, self.default_region)
+        self.map = AffineMap(region, self.target_rect())
+
+    def to_screen(self, x, y):
+        """مختصات صفحه برای نقطه (x, y) تصویر دوربین"""
+        return self.map.map(x, y)
@@ -0,0 +1,330 @@
+"""
+تشخیص ژست‌های پویا (اسکرول، زوم، کشیدن سریع، دایره و کشیدن با نیشگون) روی تاریخچه حلقوی هر دست
+Streaming recognizer for dynamic gestures over a fixed-size per-hand ring buffer
+"""
+
+import math
+from collections import Counter, deque
+
+import numpy as np
+
+# ستون‌های تاریخچه هر دست
+T, CX, CY, IX, IY, PALM, PINCH, CODE = range(8)
+
+
+class HandHistory:
+    def __init__(self, capacity=32):
+        """
+        تاریخچه حلقوی با اندازه ثابت از ویژگی‌های یک دست
+
+        هر سطر: زمان، مرکز دست، نوک انگشت اشاره، اندازه کف دست، فاصله شست تا اشاره
+        و کد وضعیت انگشتان. افزودن و خواندن O(1) است و حافظه‌ای تخصیص داده نمی‌شود.
+
+        Args:
+            capacity: تعداد فریم‌های نگهداری شده (در 30 fps حدود یک ثانیه)
+        """
+        self.capacity = capacity
+        self._data = np.zeros((capacity, 8))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, timestamp, centroid, index_tip, palm_size, pinch, finger_code):
+        row = self._data[self._next]
+        row[T] = timestamp
+        row[CX], row[CY] = centroid
+        row[IX], row[IY] = index_tip
+        row[PALM] = palm_size
+        row[PINCH] = pinch
+        row[CODE] = finger_code
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._count = 0
+
+    def get(self, k=0):
+        """سطر k فریم قبل (0 = آخرین)"""
+        return self._data[(self._next - 1 - k) % self.capacity]
+
+    def span(self, seconds):
+        """
+        قدیمی‌ترین سطر در seconds ثانیه اخیر که وضعیت انگشتانش با آخرین سطر یکسان است
+
+        Returns:
+            k (0 اگر فقط آخرین سطر در بازه باشد)
+        """
+        latest = self.get()
+        start, code = latest[T] - seconds, latest[CODE]
+        k = 0
+        while k + 1 < self._count:
+            row = self.get(k + 1)
+            if row[T] < start or row[CODE] != code:
+                break
+            k += 1
+        return k
+
+
+class _HandState:
+    """تاریخچه و وضعیت ژست‌های پیوسته یک دست"""
+
+    def __init__(self, capacity):
+        self.history = HandHistory(capacity)
+        # اسکرول
+        self.scroll_accum = 0.0
+        self.scroll_time = None
+        # دایره: مجموع چرخش جهت حرکت نوک انگشت در بازه زمانی
+        self.turns = deque()
+        self.turn_sum = 0.0
+        self.heading = None
+        self.anchor = None
+        self.circle = 0
+        # کشیدن سریع
+        self.swipe_block = 0.0
+        # نیشگون (شست و اشاره به هم چسبیده)
+        self.pinched = False
+        self.pinch_start = None
+        self.pinch_dragging = False
+        self.pinch_event = None
+
+    def reset_circle(self):
+        self.turns.clear()
+        self.turn_sum = 0.0
+        self.heading = None
+        self.anchor = None
+
+
+class TemporalGestureRecognizer:
+    def __init__(self, capacity=32, scroll_window=0.1, scroll_deadzone=0.8, scroll_gain=400.0, min_scroll=20,
+                 zoom_step=0.6, swipe_window=0.3, swipe_distance=1.5, swipe_cooldown=0.8,
+                 circle_window=1.5, circle_step=0.15, circle_turn=0.8,
+                 pinch_release=1.3, pinch_drag_distance=0.3, tap_time=0.4):
+        """
+        تشخیص ژست‌های پویا از تاریخچه چند فریم اخیر به جای اختلاف تک فریم
+
+        همه فاصله‌ها نسبت به اندازه کف دست سنجیده می‌شوند تا به فاصله دست از دوربین
+        وابسته نباشند. هزینه هر فریم ثابت است (حداکثر capacity سطر خوانده می‌شود).
+
+        Args:
+            capacity: اندازه تاریخچه هر دست (فریم)
+            scroll_window: بازه تخمین سرعت اسکرول (ثانیه)
+            scroll_deadzone: حداقل سرعت عمودی برای اسکرول (کف دست بر ثانیه)
+            scroll_gain: مقدار اسکرول به ازای جابجایی به اندازه یک کف دست
+            min_scroll: حداقل مقدار هر دستور اسکرول (باقیمانده جمع می‌شود)
+            zoom_step: تغییر فاصله دو دست برای هر گام زوم (کف دست)
+            swipe_window: بازه کشیدن سریع (ثانیه)
+            swipe_distance: حداقل جابجایی افقی کشیدن سریع (کف دست)
+            swipe_cooldown: فاصله زمانی بین دو کشیدن سریع (ثانیه)
+            circle_window: حداکثر زمان رسم یک دایره (ثانیه)
+            circle_step: طول هر گام مسیر برای محاسبه جهت حرکت (کف دست)
+            circle_turn: کسری از یک دور کامل که دایره حساب می‌شود
+            pinch_release: ضریب آستانه برای رها شدن نیشگون (پسماند)
+            pinch_drag_distance: جابجایی نوک اشاره در حال نیشگون برای شروع کشیدن (کف دست)
+            tap_time: حداکثر مدت نیشگون بدون حرکت برای ضربه (ثانیه)
+        """
+        self.scroll_window = scroll_window
+        self.scroll_deadzone = scroll_deadzone
+        self.scroll_gain = scroll_gain
+        self.min_scroll = min_scroll
+        self.zoom_step = zoom_step
+        self.swipe_window = swipe_window
+        self.swipe_distance = swipe_distance
+        self.swipe_cooldown = swipe_cooldown
+        self.circle_window = circle_window
+        self.circle_step = circle_step
+        self.circle_turn = circle_turn
+        self.pinch_release = pinch_release
+        self.pinch_drag_distance = pinch_drag_distance
+        self.tap_time = tap_time
+
+        self.hands = {'left': _HandState(capacity), 'right': _HandState(capacity)}
+        self._zoom_anchor = None
+
+        # آمار
+        self.events = Counter()
+
+    def update(self, side, geometry, features, pinch_threshold):
+        """
+        افزودن فریم جاری یک دست
+
+        Args:
+            side: "left" یا "right"
+            geometry: HandGeometry فریم جاری یا None اگر دست دیده نشده
+            features: ویژگی‌های انگشتان (خروجی hand_features) یا None
+            pinch_threshold: فاصله شست تا اشاره برای نیشگون (پیکسل)
+        """
+        state = self.hands[side]
+        state.circle = 0
+        state.pinch_event = None
+        if geometry is None:
+            state.history.clear()
+            state.reset_circle()
+            state.scroll_time = None
+            self._zoom_anchor = None
+            if state.pinch_dragging:
+                state.pinch_event = "drop"
+                self.events["pinch_drop"] += 1
+            state.pinched = state.pinch_dragging = False
+            return
+
+        history = state.history
+        if len(history) and features["finger_code"] != history.get()[CODE]:
+            state.reset_circle()
+        history.push(geometry.timestamp, geometry.centroid, geometry.index_tip, geometry.palm_size,
+                     features["thumb_index_dist"], features["finger_code"])
+        palm = max(geometry.palm_size, 1.0)
+
+        self._update_circle(state, geometry, palm)
+        self._update_pinch(state, geometry, features, palm, pinch_threshold)
+
+    def _update_circle(self, state, geometry, palm):
+        t = geometry.timestamp
+        x, y = geometry.index_tip
+        if state.anchor is None:
+            state.anchor = (x, y)
+            return
+        dx, dy = x - state.anchor[0], y - state.anchor[1]
+        if dx * dx + dy * dy < (self.circle_step * palm) ** 2:
+            return
+        state.anchor = (x, y)
+        heading = math.atan2(dy, dx)
+        if state.heading is not None:
+            turn = (heading - state.heading + math.pi) % (2 * math.pi) - math.pi
+            state.turns.append((t, turn))
+            state.turn_sum += turn
+        state.heading = heading
+
+        while state.turns and state.turns[0][0] < t - self.circle_window:
+            state.turn_sum -= state.turns.popleft()[1]
+        if abs(state.turn_sum) >= 2 * math.pi * self.circle_turn:
+            # محور y تصویر رو به پایین است: چرخش مثبت یعنی ساعتگرد روی صفحه
+            state.circle = 1 if state.turn_sum > 0 else -1
+            self.events["circle"] += 1
+            state.reset_circle()
+
+    def _update_pinch(self, state, geometry, features, palm, threshold):
+        t = geometry.timestamp
+        x, y = geometry.index_tip
+        distance = features["thumb_index_dist"]
+        if not state.pinched:
+            # نیشگون فقط با شست و اشاره باز (مانند کلیک راست قبلی)
+            if distance < threshold and features["finger_code"] & 3 == 3:
+                state.pinched = True
+                state.pinch_start = (t, x, y)
+                state.pinch_dragging = False
+            return
+
+        if distance > threshold * self.pinch_release:
+            state.pinched = False
+            if state.pinch_dragging:
+                state.pinch_event = "drop"
+                self.events["pinch_drop"] += 1
+            elif t - state.pinch_start[0] <= self.tap_time:
+                state.pinch_event = "tap"
+                self.events["pinch_tap"] += 1
+            state.pinch_dragging = False
+        elif state.pinch_dragging:
+            state.pinch_event = "drag"
+        elif math.hypot(x - state.pinch_start[1], y - state.pinch_start[2]) >= self.pinch_drag_distance * palm:
+            state.pinch_dragging = True
+            state.pinch_event = "drag_start"
+            self.events["pinch_drag"] += 1
+
+    def pinch_event(self, side):
+        """رویداد نیشگون فریم جاری: None، "tap"، "drag_start"، "drag" یا "drop\""""
+        return self.hands[side].pinch_event
+
+    def circle(self, side):
+        """1 برای دایره ساعتگرد، -1 برای پادساعتگرد و 0 اگر در این فریم دایره‌ای کامل نشده"""
+        return self.hands[side].circle
+
+    def scroll(self, side):
+        """
+        مقدار اسکرول این فریم متناسب با سرعت عمودی نوک اشاره
+
+        Returns:
+            عدد صحیح (مثبت = بالا) یا 0
+        """
+        state = self.hands[side]
+        history = state.history
+        if len(history) < 2:
+            return 0
+        latest = history.get()
+        t = latest[T]
+        frame_dt = t - state.scroll_time if state.scroll_time is not None else 0.0
+        state.scroll_time = t
+        if frame_dt <= 0 or frame_dt > 0.25:
+            # شروع دوباره پس از وقفه یا تغییر ژست
+            state.scroll_accum = 0.0
+            return 0
+
+        k = max(history.span(self.scroll_window), 1)
+        oldest = history.get(k)
+        if oldest[CODE] != latest[CODE] or t <= oldest[T]:
+            return 0
+        palm = max(latest[PALM], 1.0)
+        velocity = (latest[IY] - oldest[IY]) / (t - oldest[T]) / palm  # کف دست بر ثانیه، مثبت = پایین
+        if abs(velocity) < self.scroll_deadzone:
+            state.scroll_accum = 0.0
+            return 0
+
+        state.scroll_accum -= velocity * frame_dt * self.scroll_gain
+        if abs(state.scroll_accum) < self.min_scroll:
+            return 0
+        amount = int(state.scroll_accum)
+        state.scroll_accum -= amount
+        self.events["scroll"] += 1
+        return amount
+
+    def swipe(self, side):
+        """
+        کشیدن سریع افقی با همان وضعیت انگشتان
+
+        Returns:
+            1 برای راست، -1 برای چپ و 0 اگر کشیدنی نبوده
+        """
+        state = self.hands[side]
+        history = state.history
+        if len(history) < 2:
+            return 0
+        latest = history.get()
+        if latest[T] < state.swipe_block:
+            return 0
+        oldest = history.get(history.span(self.swipe_window))
+        dx, dy = latest[CX] - oldest[CX], latest[CY] - oldest[CY]
+        if abs(dx) < self.swipe_distance * max(latest[PALM], 1.0) or abs(dx) < 2 * abs(dy):
+            return 0
+        state.swipe_block = latest[T] + self.swipe_cooldown
+        self.events["swipe"] += 1
+        return 1 if dx > 0 else -1
+
+    def zoom(self):
+        """
+        گام زوم با تغییر فاصله دو دست (هر zoom_step کف دست یک گام)
+
+        Returns:
+            1 اگر دست‌ها از هم دور شده‌اند، -1 اگر نزدیک شده‌اند و 0 در غیر این صورت
+        """
+        left, right = self.hands['left'].history, self.hands['right'].history
+        n = min(3, len(left), len(right))
+        if n == 0:
+            return 0
+        # میانگین چند فریم آخر برای کاهش لرزش
+        distance = sum(math.hypot(right.get(k)[CX] - left.get(k)[CX], right.get(k)[CY] - left.get(k)[CY])
+                       for k in range(n)) / n
+        step = self.zoom_step * max((left.get()[PALM] + right.get()[PALM]) / 2, 1.0)
+        if self._zoom_anchor is None:
+            self._zoom_anchor = distance
+            return 0
+        diff = distance - self._zoom_anchor
+        if abs(diff) < step:
+            return 0
+        direction = 1 if diff > 0 else -1
+        self._zoom_anchor += direction * step
+        self.events["zoom"] += 1
+        return direction
+
+    def get_stats(self):
+        return dict(self.events)
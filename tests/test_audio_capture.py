@@ -0,0 +1,94 @@
+import numpy as np
+
+from audio_capture import AudioRingBuffer, UtteranceSegmenter
+
+RATE = 16000
+FRAME = 480  # 30ms
+
+
+def _silence(frames, rng):
+    return rng.normal(0, 30, frames * FRAME).astype(np.int16)
+
+
+def _tone(frames):
+    t = np.arange(frames * FRAME) / RATE
+    return (5000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def _collect(segmenter, timeout=0.2):
+    return b"".join(segmenter.utterance(timeout))
+
+
+def test_write_straddles_wrap_point():
+    ring = AudioRingBuffer(seconds=1.0, sample_rate=10)
+    assert ring.capacity == 10
+    ring.write(np.arange(7, dtype=np.int16))
+    ring.write(np.arange(7, 13, dtype=np.int16))
+    assert ring.written == 13
+    assert ring.oldest == 3
+
+    samples, start = ring.read(3, 10)
+    assert start == 3
+    np.testing.assert_array_equal(samples, np.arange(3, 13))
+    # قسمتی قبل و قسمتی بعد از نقطه بازگشت
+    samples, start = ring.read(8, 4)
+    np.testing.assert_array_equal(samples, [8, 9, 10, 11])
+
+
+def test_write_larger_than_capacity_keeps_newest():
+    ring = AudioRingBuffer(seconds=1.0, sample_rate=10)
+    ring.write(np.arange(3, dtype=np.int16))
+    ring.write(np.arange(100, 125, dtype=np.int16))
+    assert ring.written == 28
+    samples, start = ring.read(ring.oldest, 10)
+    assert start == 18
+    np.testing.assert_array_equal(samples, np.arange(115, 125))
+
+
+def test_read_after_overrun_clamps_to_oldest():
+    ring = AudioRingBuffer(seconds=1.0, sample_rate=10)
+    ring.write(np.arange(25, dtype=np.int16))
+    samples, start = ring.read(2, 5)
+    assert ring.overruns == 1
+    assert start == 15
+    np.testing.assert_array_equal(samples, np.arange(15, 20))
+    # درخواست بیش از داده موجود
+    samples, start = ring.read(22, 10)
+    np.testing.assert_array_equal(samples, [22, 23, 24])
+
+
+def test_single_utterance_with_pre_roll():
+    rng = np.random.default_rng(0)
+    signal = np.concatenate((_silence(40, rng), _tone(20), _silence(40, rng)))
+    ring = AudioRingBuffer(seconds=10.0, sample_rate=RATE)
+    segmenter = UtteranceSegmenter(ring, frame_ms=30, start_ms=90, end_ms=600, pre_roll_ms=300)
+    ring.write(signal)
+
+    pcm = np.frombuffer(_collect(segmenter), dtype=np.int16)
+    tone_start = 40 * FRAME
+    start = tone_start - segmenter.pre_roll
+    np.testing.assert_array_equal(pcm, signal[start:start + len(pcm)])
+    # تمام صدا و سپس end_ms سکوت
+    assert len(pcm) == segmenter.pre_roll + 20 * FRAME + segmenter.end_frames * FRAME
+    assert segmenter.utterances == 1
+
+    # باقیمانده سکوت گفته دیگری ندارد
+    assert _collect(segmenter) == b""
+    assert segmenter.utterances == 1
+
+
+def test_abandoned_utterance_is_skipped():
+    rng = np.random.default_rng(1)
+    signal = np.concatenate((_silence(40, rng), _tone(30), _silence(30, rng), _tone(20), _silence(40, rng)))
+    ring = AudioRingBuffer(seconds=10.0, sample_rate=RATE)
+    segmenter = UtteranceSegmenter(ring, frame_ms=30, start_ms=90, end_ms=600, pre_roll_ms=300)
+    ring.write(signal)
+
+    chunks = segmenter.utterance(0.2)
+    next(chunks)
+    chunks.close()  # مثلاً اجرای زودهنگام دستور
+
+    pcm = np.frombuffer(_collect(segmenter), dtype=np.int16)
+    second_start = (40 + 30 + 30) * FRAME - segmenter.pre_roll
+    np.testing.assert_array_equal(pcm, signal[second_start:second_start + len(pcm)])
+    assert len(pcm) == segmenter.pre_roll + 20 * FRAME + segmenter.end_frames * FRAME
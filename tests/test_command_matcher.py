@@ -0,0 +1,48 @@
+import random
+
+from command_matcher import CommandMatcher
+
+
+def _brute_force(phrases, text):
+    found = None
+    for end in range(1, len(text) + 1):
+        for phrase in phrases:
+            if text.endswith(phrase, 0, end) and (found is None or len(phrase) > len(found)):
+                found = phrase
+    return found
+
+
+def test_prefers_longest_phrase():
+    matcher = CommandMatcher(["باز کن", "کروم را باز کن", "فایرفاکس را باز کن"])
+    assert matcher.match("لطفا کروم را باز کن") == "کروم را باز کن"
+    assert matcher.match("برنامه را باز کن") == "باز کن"
+    assert matcher.match("سلام") is None
+
+
+def test_overlapping_phrases():
+    matcher = CommandMatcher(["he", "she", "his", "hers"])
+    assert matcher.find_all("ushers") == [(1, 4, "she"), (2, 6, "hers")]
+    assert matcher.match("ushers") == "hers"
+    # در تساوی طول، عبارتی که زودتر تمام شده
+    assert CommandMatcher(["ab", "bc"]).match("abc") == "ab"
+
+
+def test_suffix_inherited_through_fail_links():
+    matcher = CommandMatcher(["abcd", "bc"])
+    assert matcher.match("abce") == "bc"
+    assert matcher.find_all("xbcx") == [(1, 3, "bc")]
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(200):
+        phrases = list({"".join(rng.choice("abc ") for _ in range(rng.randint(1, 5))) for _ in range(8)})
+        text = "".join(rng.choice("abc ") for _ in range(30))
+        assert CommandMatcher(phrases).match(text) == _brute_force(phrases, text)
+
+
+def test_empty():
+    matcher = CommandMatcher()
+    assert len(matcher) == 0
+    assert matcher.match("باز کن") is None
+    assert CommandMatcher([""]).match("abc") is None
@@ -0,0 +1,37 @@
+from frame_capture import FrameGrabber
+from frame_sources import SyntheticSource
+
+
+def _drain(grabber, limit=20):
+    frames = []
+    for _ in range(limit):
+        frame = grabber.read(timeout=0.2)
+        if frame is None:
+            if grabber.exhausted:
+                break
+            continue
+        frames.append(frame)
+    return frames
+
+
+def test_live_source_end_is_detected():
+    grabber = FrameGrabber(SyntheticSource(64, 48, num_frames=5, fps=200))
+    assert grabber.is_live
+    grabber.start()
+    try:
+        frames = _drain(grabber)
+    finally:
+        grabber.stop()
+    assert grabber.exhausted
+    assert 1 <= len(frames) <= 5
+    assert grabber.read(timeout=0.1) is None
+
+
+def test_recorded_source_reads_every_frame():
+    grabber = FrameGrabber(SyntheticSource(64, 48, num_frames=5))
+    assert not grabber.is_live
+    grabber.start()
+    frames = _drain(grabber)
+    assert grabber.exhausted
+    assert [frame.seq for frame in frames] == [1, 2, 3, 4, 5]
+    assert grabber.frames_dropped == 0
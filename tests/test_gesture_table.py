@@ -0,0 +1,106 @@
+import pytest
+
+from gesture_table import ACTIVE_MODES, GestureTable, default_gestures, pattern_codes
+
+STATES = ("IDLE", "CALIBRATING") + ACTIVE_MODES
+
+
+def _fingers(code):
+    return [code >> bit & 1 for bit in range(5)]
+
+
+def _old_right(f, state):
+    """شاخه‌های قبلی دست راست (کلیک راست با ژست pinch جایگزین شده است)"""
+    names = set()
+    if f[1] == 1 and f[2] == 1 and sum(f) == 2:
+        names.add("scroll")
+    if state == "MOUSE_CONTROL":
+        if f[1] == 1 and f[2] == 0:
+            names.add("mouse_move")
+        if f[1] == 1 and f[2] == 1:
+            names.add("left_click")
+        if all(x == 0 for x in f):
+            names.add("drag_start")
+        elif not (f[1] == 1 and f[2] == 0):
+            names.add("drag_end")
+    return names
+
+
+def _old_left(f, state):
+    if sum(f) == 5 and state not in ("IDLE", "CALIBRATING"):
+        return {"mode_idle"}
+    if state == "IDLE":
+        if sum(f) == 1 and f[1] == 1:
+            return {"mode_mouse"}
+        if sum(f) == 2 and f[1] == 1 and f[2] == 1:
+            return {"mode_system"}
+        if sum(f) == 3 and f[1] == 1 and f[2] == 1 and f[3] == 1:
+            return {"mode_keyboard"}
+    return set()
+
+
+@pytest.fixture(scope="module")
+def table():
+    gestures = [g for g in default_gestures() if g.name not in ("swipe", "circle", "pinch")]
+    return GestureTable(gestures)
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_codes_match_old_branches(table, state):
+    for code in range(32):
+        f = _fingers(code)
+        assert {g.name for g in table.candidates("right", state, code)} == _old_right(f, state)
+        assert {g.name for g in table.candidates("left", state, code)} == _old_left(f, state)
+
+
+def test_pattern_codes():
+    assert pattern_codes("00000") == {0}
+    assert pattern_codes("11111") == {31}
+    assert pattern_codes("?1000") == {2, 3}
+    assert len(pattern_codes("?????")) == 32
+    with pytest.raises(ValueError):
+        pattern_codes("0101")
+
+
+class _Controller:
+    def __init__(self, state, frame_time=10.0, last_change=0.0):
+        self.state = state
+        self.frame_time = frame_time
+        self.last_state_change_time = last_change
+        self.calibrated_thresholds = {"CLICK_DISTANCE": 40}
+        self.calls = []
+
+    def mouse_click(self, image, hand, features, button):
+        self.calls.append(("click", button))
+
+    def mouse_move(self, image, hand, features):
+        self.calls.append(("move",))
+
+    def drag(self, image, hand, features, pressed):
+        self.calls.append(("drag", pressed))
+
+    def set_mode(self, image, hand, features, state):
+        self.calls.append(("mode", state))
+        self.state = state
+        self.last_state_change_time = self.frame_time
+
+
+def test_dispatch_checks_distance_and_settle(table):
+    controller = _Controller("MOUSE_CONTROL")
+    code = 0b00111  # شست، اشاره و میانی باز (بدون ژست اسکرول)
+    table.dispatch(controller, None, "right", None, {"finger_code": code, "index_middle_dist": 60})
+    assert controller.calls == [("drag", False)]
+    controller.calls.clear()
+    table.dispatch(controller, None, "right", None, {"finger_code": code, "index_middle_dist": 20})
+    assert controller.calls == [("click", "left"), ("drag", False)]
+
+    settling = _Controller("MOUSE_CONTROL", frame_time=10.0, last_change=9.8)
+    table.dispatch(settling, None, "right", None, {"finger_code": 0b00010})
+    assert settling.calls == []
+
+
+def test_dispatch_mode_change_stops_later_gestures(table):
+    controller = _Controller("IDLE")
+    table.dispatch(controller, None, "left", None, {"finger_code": 0b00010})
+    assert controller.calls == [("mode", "MOUSE_CONTROL")]
+    assert table.fired["mode_mouse"] >= 1
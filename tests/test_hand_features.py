@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+import pytest
+
+from hand_features import compute_hand_features
+
+FINGER_TIPS = [4, 8, 12, 16, 20]
+
+
+def _per_finger(points, hand_type):
+    """منطق قبلی get_finger_states (یک انگشت در هر بار)"""
+    states = []
+    if hand_type.lower() == 'right':
+        states.append(1 if points[FINGER_TIPS[0], 0] > points[FINGER_TIPS[0] - 1, 0] else 0)
+    else:
+        states.append(1 if points[FINGER_TIPS[0], 0] < points[FINGER_TIPS[0] - 1, 0] else 0)
+    for i in range(1, 5):
+        states.append(1 if points[FINGER_TIPS[i], 1] < points[FINGER_TIPS[i] - 2, 1] else 0)
+    thumb, index, middle = (points[tip, :2] for tip in FINGER_TIPS[:3])
+    return (states, math.hypot(*(index - thumb)), math.hypot(*(middle - index)))
+
+
+@pytest.mark.parametrize("hand_type", ["right", "Left"])
+def test_matches_per_finger_logic(hand_type):
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        points = (rng.random((21, 3)) * (1280, 720, 1)).astype(np.float32)
+        features = compute_hand_features(points, hand_type)
+        states, thumb_index, index_middle = _per_finger(points, hand_type)
+        assert features["finger_states"] == states
+        assert features["finger_code"] == sum(bit << i for i, bit in enumerate(states))
+        assert features["thumb_index_dist"] == pytest.approx(thumb_index, rel=1e-5)
+        assert features["index_middle_dist"] == pytest.approx(index_middle, rel=1e-5)
+
+
+def test_tip_distances_symmetric():
+    points = np.random.default_rng(1).random((21, 3)).astype(np.float32) * 500
+    distances = compute_hand_features(points, "right")["tip_distances"]
+    assert distances.shape == (5, 5)
+    np.testing.assert_allclose(distances, distances.T)
+    np.testing.assert_allclose(np.diag(distances), 0.0)
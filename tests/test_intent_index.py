@@ -0,0 +1,70 @@
+import pytest
+
+from intent_index import CharNgramEncoder, FUZZY_EXCLUDED, IntentIndex, is_negated, normalize_persian
+
+# کلیدهای دستورات LocalAIController
+COMMANDS = [
+    "باز کن", "بستن", "کامپیوتر را خاموش کن", "کامپیوتر را ریست کن", "صدا را کم کن", "صدا را زیاد کن",
+    "صدا را قطع کن", "صدا را روشن کن", "کروم را باز کن", "فایرفاکس را باز کن", "یوتیوب را باز کن",
+    "گوگل را باز کن", "جستجو کن", "سایت را باز کن", "فایل اکسپلورر را باز کن", "دسکتاپ را نشان بده",
+    "همه پنجره‌ها را کوچک کن", "برنامه‌ها را نشان بده", "سیستم را بررسی کن", "چی می‌دونی", "کمکم کن",
+    "برنامه‌نویسی", "ترجمه کن", "خلاصه کن", "تحلیل کن", "اسکرین شات بگیر", "فایل را کپی کن",
+    "فایل را حذف کن", "پوشه بساز", "فایل را باز کن",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return IntentIndex.from_commands(dict.fromkeys(COMMANDS), encoder=CharNgramEncoder(), cache_dir=None)
+
+
+def test_normalize_persian():
+    assert normalize_persian("همه  پنجره‌ها را كوچك كن!") == "همه پنجره ها را کوچک کن"
+    assert normalize_persian("۱۲٣") == "123"
+
+
+def test_excluded_commands_are_not_indexed(index):
+    for key in FUZZY_EXCLUDED:
+        assert key not in index.keys
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("کروم رو باز کن", "کروم را باز کن"),
+    ("صدارا کم کن", "صدا را کم کن"),
+    ("همه پنجره ها رو کوچیک کن", "همه پنجره‌ها را کوچک کن"),
+    ("اسکرینشات بگیر", "اسکرین شات بگیر"),
+    ("صدا رو بالا ببر", "صدا را زیاد کن"),
+    ("دسکتاپ رو نشون بده", "دسکتاپ را نشان بده"),
+])
+def test_matches_variants(index, text, expected):
+    assert index.match(text)[0] == expected
+
+
+@pytest.mark.parametrize("text", [
+    "کامپیوتر رو خاموش نکن",
+    "کامپیوتر رو چک کن",
+    "چراغ را خاموش کن",
+    "کامپیوتر را روشن کن",
+    "کامپیوتر رو خاموش کن",
+    "فایل رو حذف نکن",
+    "صدا رو کم نکن",
+    "صدا رو بالا نبر",
+    "کروم رو نبند",
+    "هوا چطوره",
+    "امروز چند شنبه است",
+])
+def test_rejects_negative_examples(index, text):
+    assert index.match(text)[0] is None
+
+
+def test_is_negated():
+    assert is_negated("کامپیوتر رو خاموش نکن", "کامپیوتر را خاموش کن")
+    assert is_negated("صدا رو بالا نبر", "صدا را بالا ببر")
+    assert not is_negated("دسکتاپ رو نشون بده", "دسکتاپ را نشان بده")
+
+
+def test_cache_round_trip(tmp_path):
+    first = IntentIndex.from_commands(dict.fromkeys(COMMANDS), encoder=CharNgramEncoder(), cache_dir=str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    second = IntentIndex.from_commands(dict.fromkeys(COMMANDS), encoder=CharNgramEncoder(), cache_dir=str(tmp_path))
+    assert (first.matrix == second.matrix).all()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from landmark_recording import HEADER_SIZE, LandmarkRecorder, LandmarkRecording, RECORD_DTYPE
+
+
+def _hand(seed):
+    return np.random.default_rng(seed).random((21, 3), dtype=np.float32)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "session.lmrec")
+    frames = [
+        (0.0, []),
+        (0.033, [("Right", _hand(1))]),
+        (0.066, [("Left", _hand(2)), ("Right", _hand(3))]),
+    ]
+    recorder = LandmarkRecorder(path)
+    for timestamp, hands in frames:
+        recorder.write(timestamp, hands)
+    recorder.close()
+    assert recorder.frames_written == len(frames)
+
+    recording = LandmarkRecording(path)
+    assert len(recording) == len(frames)
+    assert recording.duration() == pytest.approx(0.066)
+    assert recording.hands(0) == (None, None)
+
+    left, right = recording.hands(1)
+    assert left is None
+    np.testing.assert_array_equal(right, frames[1][1][0][1])
+
+    left, right = recording.hands(2)
+    np.testing.assert_array_equal(left, frames[2][1][0][1])
+    np.testing.assert_array_equal(right, frames[2][1][1][1])
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = str(tmp_path / "session.lmrec")
+    recorder = LandmarkRecorder(path)
+    recorder.write(1.0, [("Right", _hand(4))])
+    recorder.write(2.0, [("Right", _hand(5))])
+    recorder.close()
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_SIZE + RECORD_DTYPE.itemsize + 10)
+
+    recording = LandmarkRecording(path)
+    assert len(recording) == 1
+    np.testing.assert_array_equal(recording.hands(0)[1], _hand(4))
+
+
+def test_empty_recording(tmp_path):
+    path = str(tmp_path / "session.lmrec")
+    LandmarkRecorder(path).close()
+    recording = LandmarkRecording(path)
+    assert len(recording) == 0
+    assert recording.duration() == 0.0
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * (HEADER_SIZE + 16))
+    with pytest.raises(ValueError):
+        LandmarkRecording(str(path))
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from tts_worker import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, TTSWorker
+
+
+class FakeEngine:
+    """موتور جایگزین pyttsx3: هر کلمه یک رویداد started-word و تا release مسدود"""
+
+    def __init__(self):
+        self.spoken = []
+        self.on_word = None
+        self.release = threading.Event()
+        self.speaking = threading.Event()
+        self._stopped = False
+
+    def connect(self, name, callback):
+        self.on_word = callback
+
+    def say(self, text):
+        self.text = text
+
+    def stop(self):
+        self._stopped = True
+
+    def runAndWait(self):
+        self._stopped = False
+        self.speaking.set()
+        while not self.release.wait(0.005):
+            self.on_word("started-word", 0, 1)
+            if self._stopped:
+                self.spoken.append(self.text + "!")
+                self.speaking.clear()
+                return
+        self.spoken.append(self.text)
+        self.speaking.clear()
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timeout")
+        time.sleep(0.005)
+
+
+def _worker(engine, **kwargs):
+    worker = TTSWorker(engine_factory=lambda: engine, **kwargs)
+    worker.start()
+    return worker
+
+
+def test_queue_full_evicts_lowest_priority():
+    engine = FakeEngine()
+    worker = _worker(engine, max_queue=2, max_age=None)
+    try:
+        assert worker.say("busy")
+        _wait(engine.speaking.is_set)
+        assert worker.say("low", PRIORITY_LOW)
+        assert worker.say("normal")
+        # صف پر: جمله کم‌اولویت جای خود را به جمله مهم‌تر می‌دهد
+        assert worker.say("high", PRIORITY_HIGH)
+        # جمله کم‌اولویت جدید در صف پر پذیرفته نمی‌شود
+        assert not worker.say("low again", PRIORITY_LOW)
+        assert worker.get_stats()["dropped_full"] == 2
+        assert worker.get_stats()["queue_depth"] == 2
+
+        engine.release.set()
+        _wait(lambda: worker.get_stats()["spoken"] == 3)
+        assert engine.spoken == ["busy", "high", "normal"]
+    finally:
+        engine.release.set()
+        worker.stop()
+
+
+def test_interrupt_evicts_pending_and_current():
+    engine = FakeEngine()
+    worker = _worker(engine, max_age=None)
+    try:
+        worker.say("long answer")
+        _wait(engine.speaking.is_set)
+        worker.say("pending 1")
+        worker.say("pending 2", PRIORITY_LOW)
+        worker.say("urgent", PRIORITY_HIGH + 1)
+        worker.say("stop", PRIORITY_HIGH, interrupt=True)
+        _wait(lambda: engine.spoken[:1] == ["long answer!"])
+        engine.release.set()
+        _wait(lambda: worker.get_stats()["spoken"] == 2)
+
+        assert engine.spoken == ["long answer!", "urgent", "stop"]
+        stats = worker.get_stats()
+        assert stats["interrupted"] == 1
+        assert stats["dropped_interrupted"] == 2
+        assert stats["dropped_stale"] == 0
+    finally:
+        engine.release.set()
+        worker.stop()
+
+
+def test_stale_utterances_are_dropped():
+    engine = FakeEngine()
+    worker = _worker(engine, max_age=0.05)
+    try:
+        worker.say("first")
+        _wait(engine.speaking.is_set)
+        worker.say("old")
+        time.sleep(0.1)
+        engine.release.set()
+        _wait(lambda: worker.get_stats()["spoken"] == 1)
+        time.sleep(0.05)
+        assert engine.spoken == ["first"]
+        assert worker.get_stats()["dropped_stale"] == 1
+    finally:
+        worker.stop()
+
+
+def test_failed_engine_is_not_retried():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        raise RuntimeError("no audio device")
+
+    worker = TTSWorker(engine_factory=factory)
+    worker.say("hello")
+    _wait(lambda: worker.failed)
+    assert not worker.say("again", PRIORITY_NORMAL)
+    time.sleep(0.05)
+    assert len(attempts) == 1
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from virtual_keyboard import KEYBOARD_LAYOUTS, PERSIAN_ROWS, KeyButton, KeyGrid, build_keyboard
+
+
+def _linear_hit(buttons, x, y):
+    """جستجوی قبلی: اولین کلیدی که نقطه داخل آن است"""
+    for button in buttons:
+        bx, by = button.pos
+        w, h = button.size
+        if bx < x < bx + w and by < y < by + h:
+            return button
+    return None
+
+
+@pytest.mark.parametrize("layout", KEYBOARD_LAYOUTS)
+def test_grid_matches_linear_scan(layout):
+    buttons = build_keyboard(layout, 1280, 720)
+    grid = KeyGrid(buttons)
+    rng = np.random.default_rng(0)
+    points = list(zip(rng.uniform(-50, 1330, 5000), rng.uniform(-50, 770, 5000)))
+    # لبه‌ها و گوشه‌های کلیدها
+    for button in buttons:
+        x, y = button.pos
+        w, h = button.size
+        points += [(x, y), (x + w, y + h), (x + 1, y + 1), (x + w - 1, y + h - 1), (x + w / 2, y + h / 2)]
+    for x, y in points:
+        assert grid.hit(x, y) is _linear_hit(buttons, x, y)
+
+
+def test_overlapping_keys_return_first():
+    buttons = [KeyButton([0, 0], "A", [100, 100]), KeyButton([50, 50], "B", [100, 100])]
+    grid = KeyGrid(buttons, cell_size=10)
+    assert grid.hit(75, 75) is buttons[0]
+    assert grid.hit(125, 125) is buttons[1]
+
+
+def test_empty_grid():
+    assert KeyGrid([]).hit(10, 10) is None
+
+
+def test_persian_keys_send_physical_keys():
+    buttons = build_keyboard("persian", 1280, 720)
+    letters = {button.text: button for button in buttons if not button.key.startswith("layout:")}
+    for _, labels, positions in PERSIAN_ROWS:
+        for label, position in zip(labels, positions):
+            assert letters[label].key == position
+            assert letters[label].apply("سلام ") == "سلام " + label
+    assert all(button.key.isascii() for button in buttons)
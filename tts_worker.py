@@ -0,0 +1,240 @@
+"""
+یک thread مالک موتور تبدیل متن به گفتار با صف اولویت‌دار محدود، قطع گفتار و حذف جمله‌های کهنه
+Single-owner text-to-speech worker with a bounded priority queue, interruption and stale-drop
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+# تبدیل متن به گفتار
+try:
+    import pyttsx3
+    PYTTSX3_AVAILABLE = True
+except ImportError:
+    PYTTSX3_AVAILABLE = False
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+
+class Utterance:
+    """یک جمله در صف: متن، اولویت، زمان ورود به صف و حداکثر عمر (ثانیه)"""
+    __slots__ = ("text", "priority", "created", "max_age")
+
+    def __init__(self, text, priority, created, max_age):
+        self.text = text
+        self.priority = priority
+        self.created = created
+        self.max_age = max_age
+
+    def is_stale(self, now):
+        return self.max_age is not None and now - self.created > self.max_age
+
+
+class TTSWorker:
+    def __init__(self, rate=150, volume=0.8, max_queue=8, max_age=5.0, engine_factory=None):
+        """
+        تنها مالک موتور pyttsx3
+
+        موتور در همان thread کارگر ساخته و فقط همان‌جا استفاده می‌شود، بنابراین فراخوانی
+        همزمان speak از چند thread با هم تداخل ندارند. جمله‌ها به ترتیب اولویت (و در اولویت
+        برابر به ترتیب ورود) گفته می‌شوند؛ اگر صف پر باشد کم‌اولویت‌ترین و قدیمی‌ترین جمله
+        کنار گذاشته می‌شود و جمله‌ای که بیش از max_age در صف مانده دیگر گفته نمی‌شود.
+
+        Args:
+            rate: سرعت گفتار
+            volume: بلندی صدا (0 تا 1)
+            max_queue: حداکثر جمله‌های در انتظار
+            max_age: حداکثر زمان انتظار هر جمله در صف (None برای بدون محدودیت)
+            engine_factory: تابع ساخت موتور (پیش‌فرض pyttsx3.init)
+        """
+        self.rate = rate
+        self.volume = volume
+        self.max_queue = max_queue
+        self.max_age = max_age
+        self.engine_factory = engine_factory
+        self._queue = []  # (-اولویت، شماره ورود، جمله)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._interrupt = threading.Event()
+        self._current = None
+        self._running = False
+        self._failed = False  # موتور راه‌اندازی نشد؛ تلاش دوباره فایده‌ای ندارد
+        self._thread = None
+
+        # آمار
+        self.spoken = 0
+        self.interrupted = 0
+        self.dropped_stale = 0
+        self.dropped_full = 0
+        self.dropped_interrupted = 0  # جمله‌های در انتظاری که با interrupt کنار گذاشته شدند
+        self.last_latency = 0.0  # انتظار در صف تا شروع گفتار (ثانیه)
+        self.total_latency = 0.0
+        self.speech_seconds = 0.0
+        self.max_depth = 0
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def failed(self):
+        return self._failed
+
+    def start(self):
+        """شروع thread کارگر"""
+        if self._running or self._failed:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """توقف کارگر؛ جمله‌های در انتظار کنار گذاشته و جمله در حال گفتن قطع می‌شود"""
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._interrupt.set()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def say(self, text, priority=PRIORITY_NORMAL, interrupt=False, max_age=None):
+        """
+        افزودن جمله به صف (بدون انتظار برای گفته شدن)
+
+        Args:
+            text: متن
+            priority: PRIORITY_LOW، PRIORITY_NORMAL یا PRIORITY_HIGH
+            interrupt: قطع جمله در حال گفتن و حذف جمله‌های در انتظار با اولویت کمتر یا برابر
+            max_age: حداکثر زمان انتظار این جمله (پیش‌فرض max_age کارگر)
+
+        Returns:
+            True اگر جمله در صف قرار گرفت
+        """
+        if not text or self._failed:
+            return False
+        if not self._running:
+            self.start()
+        utterance = Utterance(text, priority, time.perf_counter(), self.max_age if max_age is None else max_age)
+        with self._condition:
+            if interrupt:
+                kept = [item for item in self._queue if item[2].priority > priority]
+                self.dropped_interrupted += len(self._queue) - len(kept)
+                self._queue = kept
+                heapq.heapify(self._queue)
+                if self._current is not None and self._current.priority <= priority:
+                    self._interrupt.set()
+            if len(self._queue) >= self.max_queue:
+                # کم‌اولویت‌ترین و قدیمی‌ترین جمله (یا خود جمله جدید) کنار گذاشته می‌شود
+                victim = max(self._queue, key=lambda item: (item[0], -item[1]))
+                if victim[2].priority >= priority:
+                    self.dropped_full += 1
+                    return False
+                self._queue.remove(victim)
+                heapq.heapify(self._queue)
+                self.dropped_full += 1
+            heapq.heappush(self._queue, (-priority, next(self._order), utterance))
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._condition.notify()
+        return True
+
+    def clear(self):
+        """حذف همه جمله‌های در انتظار و قطع جمله در حال گفتن"""
+        with self._condition:
+            self.dropped_interrupted += len(self._queue)
+            self._queue.clear()
+            if self._current is not None:
+                self._interrupt.set()
+
+    def _next(self):
+        """جمله بعدی که هنوز کهنه نشده است، یا None هنگام توقف"""
+        with self._condition:
+            while self._running:
+                now = time.perf_counter()
+                while self._queue:
+                    utterance = heapq.heappop(self._queue)[2]
+                    if utterance.is_stale(now):
+                        self.dropped_stale += 1
+                        continue
+                    self._current = utterance
+                    self._interrupt.clear()
+                    return utterance
+                self._condition.wait()
+        return None
+
+    def _create_engine(self):
+        if self.engine_factory is not None:
+            return self.engine_factory()
+        if not PYTTSX3_AVAILABLE:
+            raise ImportError("pyttsx3 نصب نیست")
+        try:
+            # موتور SAPI5 ویندوز در thread غیر اصلی نیاز به مقداردهی COM دارد
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        engine = pyttsx3.init()
+        engine.setProperty('rate', self.rate)
+        engine.setProperty('volume', self.volume)
+        return engine
+
+    def _run(self):
+        try:
+            engine = self._create_engine()
+        except Exception as e:
+            print(f"❌ خطا در راه‌اندازی تبدیل متن به گفتار: {e}")
+            with self._condition:
+                self._failed = True
+                self._running = False
+                self._queue.clear()
+            return
+
+        def on_word(name, location, length):
+            # قطع از داخل حلقه خود موتور (همان thread مالک)
+            if self._interrupt.is_set():
+                engine.stop()
+
+        engine.connect('started-word', on_word)
+
+        while True:
+            utterance = self._next()
+            if utterance is None:
+                break
+            start = time.perf_counter()
+            self.last_latency = start - utterance.created
+            self.total_latency += self.last_latency
+            try:
+                engine.say(utterance.text)
+                engine.runAndWait()
+            except Exception as e:
+                print(f"❌ خطا در تبدیل متن به گفتار: {e}")
+            self.speech_seconds += time.perf_counter() - start
+            with self._condition:
+                self._current = None
+                if self._interrupt.is_set():
+                    self.interrupted += 1
+                else:
+                    self.spoken += 1
+
+    def get_stats(self):
+        started = self.spoken + self.interrupted
+        return {
+            "queue_depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "speaking": self._current is not None,
+            "spoken": self.spoken,
+            "interrupted": self.interrupted,
+            "dropped_stale": self.dropped_stale,
+            "dropped_full": self.dropped_full,
+            "dropped_interrupted": self.dropped_interrupted,
+            "failed": self._failed,
+            "last_latency": self.last_latency,
+            "avg_latency": self.total_latency / started if started else 0.0,
+            "avg_speech_seconds": self.speech_seconds / started if started else 0.0,
+        }
@@ -0,0 +1,356 @@
+"""
+کیبورد مجازی: چیدمان‌ها، اندیس مکانی برای پیدا کردن کلید زیر انگشت و لایه از پیش رسم شده
+Virtual keyboard layouts, grid hit-test index and cached, pre-rendered keyboard layer
+"""
+
+import cv2
+import numpy as np
+
+# رسم برچسب‌های غیر لاتین (مثلاً فارسی) که فونت‌های OpenCV ندارند
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# فونت‌هایی که به ترتیب برای برچسب‌های فارسی امتحان می‌شوند
+UNICODE_FONTS = ("tahoma.ttf", "arial.ttf", "segoeui.ttf", "DejaVuSans.ttf",
+                 "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+# اندازه کلید در چیدمان اصلی؛ اندازه متن و محل آن به همین نسبت تغییر می‌کند
+BASE_KEY_SIZE = 80
+
+
+class KeyButton:
+    def __init__(self, pos, text, size=[80, 80], color=(100, 0, 100), key=None, output=None, hint=None):
+        """
+        یک کلید کیبورد مجازی
+
+        Args:
+            pos: گوشه بالا-چپ [x, y]
+            text: برچسب نمایش داده شده
+            size: [عرض، ارتفاع]
+            color: رنگ کلید (BGR)
+            key: کلید ارسالی به سیستم ("backspace"، "space"، "enter"، "exit"، "layout:<نام>" یا یک حرف)
+            output: متنی که به متن تایپ شده اضافه می‌شود (پیش‌فرض همان key)
+            hint: برچسب لاتین جایگزین وقتی فونت مناسب برای برچسب پیدا نشود
+        """
+        self.pos = pos
+        self.size = size
+        self.text = text
+        self.color = color
+        self.key = key if key is not None else text
+        self.output = output if output is not None else self.key
+        self.hint = hint
+        self.is_pressed = False
+
+    def apply(self, typed_text):
+        """متن تایپ شده پس از فشردن این کلید"""
+        if self.key == "backspace":
+            return typed_text[:-1]
+        return typed_text + self.output
+
+
+# چیدمان کامل QWERTY (حروف کوچک، با علائم)
+QWERTY_ROWS = [
+    (0.0, "`1234567890-="),
+    (0.5, "qwertyuiop[]"),
+    (0.75, "asdfghjkl;'"),
+    (1.25, "zxcvbnm,./"),
+]
+
+# چیدمان استاندارد فارسی؛ برچسب لاتین هر کلید همان کلید QWERTY هم‌مکان است و همان کلید فیزیکی
+# ارسال می‌شود (حرف فارسی را چیدمان فارسی سیستم عامل تولید می‌کند)
+PERSIAN_ROWS = [
+    (0.0, "۱۲۳۴۵۶۷۸۹۰", "1234567890"),
+    (0.5, "ضصثقفغعهخحجچ", "qwertyuiop[]"),
+    (0.75, "شسیبلاتنمکگ", "asdfghjkl;'"),
+    (1.25, "ظطزرذدپو.ژ", "zxcvbnm,./"),
+]
+
+KEYBOARD_LAYOUTS = ("default", "qwerty", "persian")
+
+
+def _default_layout():
+    """چیدمان اصلی برنامه (مختصات ثابت برای تصویر 1280x720)"""
+    keys = [
+        ["Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P"],
+        ["A", "S", "D", "F", "G", "H", "J", "K", "L", ";"],
+        ["Z", "X", "C", "V", "B", "N", "M", ",", ".", "/"],
+        ["1", "2", "3", "4", "5", "6", "7", "8", "9", "0"]
+    ]
+    buttons = []
+    for i in range(len(keys)):
+        for j, key in enumerate(keys[i]):
+            buttons.append(KeyButton([100 * j + 50, 100 * i + 150], key))
+
+    # دکمه‌های ویژه
+    buttons.append(KeyButton([50, 450], "Space", [400, 80], (0, 100, 100), key="space", output=" "))
+    buttons.append(KeyButton([460, 450], "<-", [100, 80], (100, 100, 0), key="backspace"))
+    buttons.append(KeyButton([570, 450], "Enter", [100, 80], (0, 100, 0), key="enter", output="\n"))
+    buttons.append(KeyButton([680, 450], "Exit", [150, 80], (100, 0, 0), key="exit", output=""))
+    return buttons
+
+
+def _staggered_layout(rows, switch_label, switch_layout, frame_width, frame_height):
+    """
+    چیدمان پله‌ای مانند کیبورد واقعی که به اندازه تصویر مقیاس می‌شود
+
+    Args:
+        rows: لیست (فاصله شروع ردیف بر حسب کلید، برچسب‌ها[، کلیدهای فیزیکی لاتین هم‌مکان])
+        switch_label, switch_layout: دکمه تغییر زبان و چیدمان مقصد آن
+    """
+    margin = 50
+    top = int(frame_height * 0.15)
+    # کیبورد نباید روی کادر متن تایپ شده (از 0.76 ارتفاع تصویر) بیفتد
+    bottom = int(frame_height * 0.74)
+    columns = max(offset + len(labels) for offset, labels, *_ in rows)
+    pitch = int(min(100, (frame_width - 2 * margin) / columns, (bottom - top) / (len(rows) + 1)))
+    size = int(pitch * 0.85)
+
+    buttons = []
+    for i, (offset, labels, *hints) in enumerate(rows):
+        for j, label in enumerate(labels):
+            hint = hints[0][j] if hints else None
+            pos = [margin + int((offset + j) * pitch), top + i * pitch]
+            buttons.append(KeyButton(pos, label, [size, size], key=hint, output=label, hint=hint))
+
+    # ردیف پایین: تغییر زبان، فاصله، پاک کردن، ورود، خروج
+    y = top + len(rows) * pitch
+    specials = [
+        (switch_label, 1.5, (80, 60, 0), "layout:" + switch_layout, ""),
+        ("Space", 5.0, (0, 100, 100), "space", " "),
+        ("<-", 1.5, (100, 100, 0), "backspace", None),
+        ("Enter", 2.0, (0, 100, 0), "enter", "\n"),
+        ("Exit", 1.5, (100, 0, 0), "exit", ""),
+    ]
+    x = margin
+    for label, width, color, key, output in specials:
+        buttons.append(KeyButton([x, y], label, [int(width * pitch) - (pitch - size), size], color,
+                                 key=key, output=output))
+        x += int(width * pitch)
+    return buttons
+
+
+def build_keyboard(layout="default", frame_width=1280, frame_height=720):
+    """
+    ساخت دکمه‌های یک چیدمان
+
+    Args:
+        layout: "default"، "qwerty" (کامل) یا "persian"
+        frame_width, frame_height: ابعاد تصویر (برای چیدمان‌های مقیاس‌پذیر)
+    """
+    if layout == "default":
+        return _default_layout()
+    if layout == "qwerty":
+        return _staggered_layout(QWERTY_ROWS, "FA", "persian", frame_width, frame_height)
+    if layout == "persian":
+        return _staggered_layout(PERSIAN_ROWS, "EN", "qwerty", frame_width, frame_height)
+    raise ValueError(f"چیدمان کیبورد نامعتبر: {layout}")
+
+
+class KeyGrid:
+    def __init__(self, buttons, cell_size=None):
+        """
+        اندیس شبکه‌ای برای پیدا کردن کلید زیر یک نقطه در زمان ثابت
+
+        هر خانه شبکه فهرست کوتاه کلیدهایی را که با آن هم‌پوشانی دارند نگه می‌دارد؛
+        بنابراین جستجو مستقل از تعداد کلیدها است و نتیجه با بررسی همه کلیدها یکسان است.
+
+        Args:
+            buttons: لیست دکمه‌ها
+            cell_size: اندازه خانه‌های شبکه به پیکسل (پیش‌فرض نصف کوچکترین کلید)
+        """
+        self.buttons = buttons
+        if not buttons:
+            self.cells = []
+            self.columns = self.rows = 0
+            self.x0 = self.y0 = 0
+            self.cell_size = 1
+            return
+
+        self.cell_size = cell_size or max(8, min(min(button.size) for button in buttons) // 2)
+        self.x0 = min(button.pos[0] for button in buttons)
+        self.y0 = min(button.pos[1] for button in buttons)
+        x1 = max(button.pos[0] + button.size[0] for button in buttons)
+        y1 = max(button.pos[1] + button.size[1] for button in buttons)
+        self.columns = (x1 - self.x0) // self.cell_size + 1
+        self.rows = (y1 - self.y0) // self.cell_size + 1
+
+        cells = [[] for _ in range(self.columns * self.rows)]
+        for index, button in enumerate(buttons):
+            x, y = button.pos
+            w, h = button.size
+            for row in range((y - self.y0) // self.cell_size, (y + h - self.y0) // self.cell_size + 1):
+                for column in range((x - self.x0) // self.cell_size, (x + w - self.x0) // self.cell_size + 1):
+                    cells[row * self.columns + column].append(index)
+        self.cells = [tuple(cell) for cell in cells]
+
+    def hit(self, x, y):
+        """
+        کلید زیر نقطه (x, y)
+
+        Returns:
+            دکمه یا None
+        """
+        column = int((x - self.x0) // self.cell_size)
+        row = int((y - self.y0) // self.cell_size)
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return None
+        for index in self.cells[row * self.columns + column]:
+            button = self.buttons[index]
+            bx, by = button.pos
+            w, h = button.size
+            if bx < x < bx + w and by < y < by + h:
+                return button
+        return None
+
+
+def _label_style(button):
+    """مقیاس فونت، ضخامت و محل متن متناسب با ارتفاع کلید"""
+    scale = button.size[1] / BASE_KEY_SIZE
+    x, y = button.pos
+    return 4 * scale, max(1, int(round(4 * scale))), (x + int(20 * scale), y + int(60 * scale))
+
+
+class KeyboardLayer:
+    def __init__(self, alpha=0.5):
+        """
+        کیبورد یک بار در یک لایه و ماسک رسم می‌شود و در هر فریم فقط با محدوده
+        کیبورد در تصویر ترکیب می‌شود
+
+        Args:
+            alpha: سهم تصویر دوربین در ترکیب (سهم کیبورد 1 - alpha)
+        """
+        self.alpha = alpha
+        self._key = None
+        self.bbox = None
+        self.layer = None
+        self.mask = None
+        self._scratch = None
+        self._glyphs = {}
+        self._font_path = None
+
+        # آمار
+        self.renders = 0
+
+    def invalidate(self):
+        """رسم دوباره لایه در فریم بعد (پس از تغییر چیدمان دکمه‌ها)"""
+        self._key = None
+
+    def _unicode_glyph(self, text, height):
+        """ماسک برچسب غیر لاتین (یک بار برای هر متن و اندازه) یا None اگر فونتی پیدا نشود"""
+        cache_key = (text, height)
+        if cache_key in self._glyphs:
+            return self._glyphs[cache_key]
+
+        glyph = None
+        if PIL_AVAILABLE:
+            font = None
+            for path in ((self._font_path,) if self._font_path else UNICODE_FONTS):
+                try:
+                    font = ImageFont.truetype(path, height)
+                    self._font_path = path
+                    break
+                except OSError:
+                    continue
+            if font is not None:
+                left, top, right, bottom = font.getbbox(text)
+                canvas = Image.new("L", (max(1, right), max(1, bottom)), 0)
+                ImageDraw.Draw(canvas).text((0, 0), text, fill=255, font=font)
+                glyph = np.asarray(canvas)[top:, left:].copy()
+        self._glyphs[cache_key] = glyph
+        return glyph
+
+    def _put_label(self, image, button, x0=0, y0=0):
+        """رسم برچسب کلید (مختصات نسبت به (x0, y0))"""
+        font_scale, thickness, (tx, ty) = _label_style(button)
+        tx, ty = tx - x0, ty - y0
+        text = button.text
+        if not text.isascii():
+            glyph = self._unicode_glyph(text, int(button.size[1] * 0.55))
+            if glyph is not None:
+                # برچسب فارسی وسط کلید
+                x = button.pos[0] - x0 + (button.size[0] - glyph.shape[1]) // 2
+                y = button.pos[1] - y0 + (button.size[1] - glyph.shape[0]) // 2
+                h, w = glyph.shape
+                ix0, iy0 = max(x, 0), max(y, 0)
+                ix1, iy1 = min(x + w, image.shape[1]), min(y + h, image.shape[0])
+                if ix1 > ix0 and iy1 > iy0:
+                    region = image[iy0:iy1, ix0:ix1]
+                    region[glyph[iy0 - y:iy1 - y, ix0 - x:ix1 - x] > 127] = (255, 255, 255)
+                return
+            text = button.hint or "?"
+        cv2.putText(image, text, (tx, ty), cv2.FONT_HERSHEY_PLAIN, font_scale, (255, 255, 255), thickness)
+
+    @staticmethod
+    def _extent(button):
+        """کادر دکمه به همراه متن آن (متن ممکن است از دکمه بیرون بزند)"""
+        x, y = button.pos
+        w, h = button.size
+        font_scale, thickness, (tx, ty) = _label_style(button)
+        text = button.text if button.text.isascii() else (button.hint or "?")
+        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_PLAIN, font_scale, thickness)
+        return (min(x, tx - 2), min(y, ty - text_height - 2),
+                max(x + w, tx + text_width + 2) + 1, max(y + h, ty + baseline + 2) + 1)
+
+    def _render(self, buttons, frame_shape):
+        height, width = frame_shape[:2]
+        extents = [self._extent(button) for button in buttons]
+        x0 = max(0, min(extent[0] for extent in extents))
+        y0 = max(0, min(extent[1] for extent in extents))
+        x1 = min(width, max(extent[2] for extent in extents))
+        y1 = min(height, max(extent[3] for extent in extents))
+        if x1 <= x0 or y1 <= y0:
+            self.bbox = None
+            return
+
+        layer = np.zeros((y1 - y0, x1 - x0, 3), np.uint8)
+        for button in buttons:
+            x, y = button.pos[0] - x0, button.pos[1] - y0
+            w, h = button.size
+            color = button.color if hasattr(button, 'color') else (100, 0, 100)
+            cv2.rectangle(layer, (x, y), (x + w, y + h), color, cv2.FILLED)
+            self._put_label(layer, button, x0, y0)
+
+        self.bbox = (x0, y0, x1, y1)
+        self.layer = layer
+        # ماسک برای هر کانال جداگانه (کانال‌های صفر رنگ دکمه بدون تغییر می‌مانند)
+        self.mask = np.where(layer > 0, 255, 0).astype(np.uint8)
+        self._scratch = np.empty_like(layer)
+        self.renders += 1
+
+    def draw(self, image, buttons):
+        """
+        ترکیب کیبورد با تصویر (درجا)
+
+        Args:
+            image: تصویر BGR
+            buttons: لیست دکمه‌ها (pos، size، text و color)
+
+        Returns:
+            همان تصویر
+        """
+        if not buttons:
+            return image
+
+        key = (id(buttons), len(buttons), image.shape)
+        if key != self._key:
+            self._render(buttons, image.shape)
+            self._key = key
+        if self.bbox is None:
+            return image
+
+        x0, y0, x1, y1 = self.bbox
+        roi = image[y0:y1, x0:x1]
+        cv2.addWeighted(roi, self.alpha, self.layer, 1 - self.alpha, 0, dst=self._scratch)
+        cv2.copyTo(self._scratch, self.mask, roi)
+        return image
+
+    def draw_key(self, image, button, color, label=True):
+        """رسم یک کلید به صورت برجسته (hover یا فشرده شدن) روی تصویر"""
+        x, y = button.pos
+        w, h = button.size
+        cv2.rectangle(image, (x - 5, y - 5), (x + w + 5, y + h + 5), color, cv2.FILLED)
+        if label:
+            self._put_label(image, button)